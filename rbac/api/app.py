@@ -0,0 +1,54 @@
+from typing import Optional
+from fastapi import FastAPI
+from rbac.core import RBACManager
+from rbac.core.jobs import JobRunner
+from rbac.storage import get_storage
+from rbac.api.main import router as rbac_router
+from rbac.api.fastpath import router as fast_router
+from rbac.api.profiling import ProfilingMiddleware, RequestProfiler, router as profiling_router
+
+OPENAPI_TAGS = [
+    {"name": "Users", "description": "Manage user accounts and their assigned roles."},
+    {"name": "Roles", "description": "Create roles and assign them to users."},
+    {"name": "Permissions", "description": "Manage permissions and assign them to roles."},
+    {"name": "Access Control", "description": "Evaluate access and user permissions."},
+    {"name": "SSD", "description": "Static Separation of Duty constraint management."},
+    {"name": "DSD", "description": "Dynamic Separation of Duty constraint management."},
+    {"name": "Sessions", "description": "Session-level role activation and validation."},
+    {"name": "Jobs", "description": "Heavy read-only computations run in worker processes."},
+    {"name": "Diagnostics", "description": "Request profiles, when profiling is enabled."},
+]
+
+
+def create_app(
+    manager: Optional[RBACManager] = None,
+    prefix: str = "/rbac",
+    token_key: Optional[bytes] = None,
+    profiler: Optional[RequestProfiler] = None,
+    job_workers: int = 2,
+) -> FastAPI:
+    """
+    Build the RBAC API around `manager`. A manager over fresh in-memory storage
+    is created when none is given. Nothing is constructed at import time.
+    `token_key` is the HMAC key for capability tokens; without it `/tokens` returns 503.
+    With `profiler`, sampled requests are profiled and `{prefix}/profiles` lists them.
+    `/jobs` runs on a pool of `job_workers` processes, started on the first job.
+    """
+    app = FastAPI(
+        title="RBAC API",
+        version="1.0",
+        description="A modular Role-Based Access Control system with SSD and DSD support.",
+        openapi_tags=OPENAPI_TAGS,
+    )
+    app.state.rbac = manager or RBACManager(storage=get_storage())
+    app.state.token_key = token_key
+    app.state.jobs = JobRunner(app.state.rbac, max_workers=job_workers)
+    app.add_event_handler("shutdown", app.state.jobs.shutdown)
+    app.include_router(rbac_router, prefix=prefix)
+    app.include_router(fast_router, prefix=f"{prefix}/fast")
+    if profiler is not None:
+        profiler.routes_prefix = f"{prefix}/profiles"
+        app.state.profiler = profiler
+        app.add_middleware(ProfilingMiddleware, profiler=profiler)
+        app.include_router(profiling_router, prefix=profiler.routes_prefix)
+    return app
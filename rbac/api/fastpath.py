@@ -0,0 +1,66 @@
+"""
+Low-overhead decision routes.
+
+These routes read the raw request body and write pre-encoded bytes, skipping
+pydantic model construction and stdlib JSON. `/check-batch` also accepts the
+binary batch format from `rbac.codec` for service-to-service calls. The body
+is read on the event loop; the manager is called in the threadpool, like the
+other routes, since a check may recompile the policy or journal an expiry.
+"""
+from fastapi import APIRouter, Request, Response
+from starlette.concurrency import run_in_threadpool
+from rbac.codec import BATCH_CONTENT_TYPE, decode_checks, dumps, encode_results, loads
+
+router = APIRouter()
+
+JSON = "application/json"
+_GRANTED = dumps({"has_permission": True})
+_DENIED = dumps({"has_permission": False})
+
+
+def _error(status_code: int, detail: str) -> Response:
+    return Response(dumps({"detail": detail}), status_code=status_code, media_type=JSON)
+
+
+@router.post("/check-permission", summary="Check user access (fast path)", tags=["Access Control"])
+async def fast_check_permission(request: Request):
+    """Same contract as `/check-permission` without per-request model validation."""
+    try:
+        body = loads(await request.body())
+        username, permission = body["username"], body["permission"]
+        if not isinstance(username, str) or not isinstance(permission, str):
+            raise TypeError("username and permission must be strings")
+    except (ValueError, KeyError, TypeError):
+        return _error(422, 'Expected {"username": str, "permission": str}')
+    try:
+        granted = await run_in_threadpool(request.app.state.rbac.check_permission, username, permission)
+    except ValueError as e:
+        return _error(404, str(e))
+    return Response(_GRANTED if granted else _DENIED, media_type=JSON)
+
+
+@router.post("/check-batch", summary="Check many permissions in one call", tags=["Access Control"])
+async def fast_check_batch(request: Request):
+    """
+    Checks a batch of (username, permission) pairs. Accepts the binary batch
+    format, or JSON `{"checks": [[username, permission], ...]}` answered with
+    `{"results": [true | false | null, ...]}` where null marks unknown names.
+    """
+    body = await request.body()
+    rbac = request.app.state.rbac
+    if request.headers.get("content-type", "").startswith(BATCH_CONTENT_TYPE):
+        try:
+            checks = decode_checks(body)
+        except ValueError as e:
+            return _error(422, str(e))
+        results = await run_in_threadpool(rbac.check_permissions, checks)
+        return Response(encode_results(results), media_type=BATCH_CONTENT_TYPE)
+
+    try:
+        checks = [(username, permission) for username, permission in loads(body)["checks"]]
+        if not all(isinstance(username, str) and isinstance(permission, str) for username, permission in checks):
+            raise TypeError("usernames and permissions must be strings")
+    except (ValueError, KeyError, TypeError):
+        return _error(422, 'Expected {"checks": [[username, permission], ...]}')
+    results = await run_in_threadpool(rbac.check_permissions, checks)
+    return Response(dumps({"results": results}), media_type=JSON)
@@ -1,94 +1,151 @@
-from fastapi import APIRouter, HTTPException
+import json
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from rbac.core import RBACManager
-from rbac.storage import get_storage
+from rbac.models import Role
+from rbac.tokens import peek
 
 # Schemas
-from rbac.schemas.users import UserCreate, AssignRole, GetUserRolesResponse, RemoveUserRoleResponse
-from rbac.schemas.roles import RoleCreateRequest, RoleListResponse, GrantPermission
-from rbac.schemas.permissions import PermissionCreate, PermissionListResponse, CheckAccess, PermissionCheckRequest
+from rbac.schemas.users import (
+    UserCreate, UserResponse, AssignRole, BulkAssignRoles, GetUserRolesResponse, RemoveUserRoleResponse
+)
+from rbac.schemas.roles import (
+    RoleCreateRequest, RoleListResponse, RoleResponse, GrantPermission, BulkGrantPermissions,
+)
+from rbac.schemas.permissions import (
+    PermissionCreate, PermissionListResponse, CheckAccess, PermissionCheckRequest, ExplainResponse
+)
 from rbac.schemas.session import SessionCreateRequest, SessionResponse
-from rbac.schemas.ssd import SSDCreateRequest, SSDListResponse
+from rbac.schemas.ssd import SSDCreateRequest, SSDListResponse, ConstraintAuditResponse
 from rbac.schemas.dsd import DSDConflictSetRequest, DSDConflictSetUpdateRequest, DSDConflictSetsResponse
+from rbac.schemas.jobs import JobRequest, JobResponse
+from rbac.schemas.tokens import TokenRequest, TokenResponse, PermissionDictionaryResponse
+from rbac.schemas.policy import CompileStatsResponse, LintReportResponse, PolicyDocument, PolicyDiffResponse
 
 router = APIRouter()
-rbac = RBACManager(storage=get_storage())
+
+
+def get_rbac(request: Request) -> RBACManager:
+    """Returns the RBACManager bound to the application by `create_app`."""
+    return request.app.state.rbac
+
+
+RBAC = Annotated[RBACManager, Depends(get_rbac)]
 
 # --- User Management ---
 
-@router.post("/users", summary="Create a new user", tags=["Users"])
-def create_user(payload: UserCreate):
+@router.post("/users", response_model=UserResponse, summary="Create a new user", tags=["Users"])
+def create_user(payload: UserCreate, rbac: RBAC):
     """Creates a new user."""
-    return rbac.add_user(payload.username)
+    user = rbac.add_user(payload.username)
+    return {"username": user.username, "roles": sorted(user.get_role_names())}
 
 
 @router.get("/users", response_model=list[str], summary="List all users", tags=["Users"])
-def list_users():
-    """Lists all registered users."""
-    return [user.username for user in rbac.storage.get_all_users()]
+def list_users(rbac: RBAC, prefix: Optional[str] = None, limit: Optional[int] = Query(None, ge=1)):
+    """Lists registered users, or with `prefix`/`limit` the matching names in sorted order."""
+    if prefix is None and limit is None:
+        return [user.username for user in rbac.storage.get_all_users()]
+    return [user.username for user in rbac.storage.find_users(prefix or "", limit=limit)]
 
 
 @router.get("/users/{username}/roles", response_model=GetUserRolesResponse, tags=["Users"])
-def get_user_roles(username: str):
-    """Gets roles assigned to a user."""
+def get_user_roles(username: str, rbac: RBAC):
+    """Gets roles assigned to a user, with the expiry of temporary assignments."""
+    rbac.expire_assignments()
     user = rbac.storage.get_user(username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return {"username": username, "roles": list(user.get_role_names())}
+    expirations = {
+        role: datetime.fromtimestamp(expires, tz=timezone.utc) for role, expires in user.expirations.items()
+    }
+    return {"username": username, "roles": list(user.get_role_names()), "expirations": expirations}
 
 
 @router.delete("/users/{username}/roles/{role}", response_model=RemoveUserRoleResponse, tags=["Users"])
-def remove_role_from_user(username: str, role: str):
+def remove_role_from_user(username: str, role: str, rbac: RBAC):
     """Removes a role from a user."""
-    user = rbac.storage.get_user(username)
-    if not user:
+    if not rbac.storage.get_user(username):
         raise HTTPException(status_code=404, detail="User not found")
-    user.roles = {r for r in user.roles if r.name != role}
-    rbac.storage.save_user(user)
+    rbac.revoke_role(username, role)
     return {"username": username, "removed_role": role}
 
 # --- Role Management ---
 
-@router.post("/roles", summary="Create a new role", tags=["Roles"])
-def create_role(data: RoleCreateRequest):
+@router.post("/roles", response_model=RoleResponse, summary="Create a new role", tags=["Roles"])
+def create_role(data: RoleCreateRequest, rbac: RBAC):
     """Creates a new role."""
-    return rbac.add_role(data.to_role())
+    role = rbac.add_role(Role(data.name))
+    return {"name": role.name, "permissions": [], "parents": []}
 
 
 @router.get("/roles", response_model=RoleListResponse, tags=["Roles"])
-def list_roles():
-    """Lists all roles."""
-    return {"roles": list(rbac.storage.get_all_role_names())}
+def list_roles(rbac: RBAC, prefix: Optional[str] = None, limit: Optional[int] = Query(None, ge=1)):
+    """Lists all roles, or with `prefix`/`limit` the matching names in sorted order."""
+    if prefix is None and limit is None:
+        return {"roles": [role.name for role in rbac.storage.get_all_roles()]}
+    return {"roles": [role.name for role in rbac.storage.find_roles(prefix or "", limit=limit)]}
 
 
 @router.post("/assign-role", summary="Assign role to user", tags=["Roles"])
-def assign_role(payload: AssignRole):
-    """Assigns a role to a user."""
-    rbac.assign_role(payload.username, payload.role)
+def assign_role(payload: AssignRole, rbac: RBAC):
+    """Assigns a role to a user, optionally until `expires_at`."""
+    try:
+        rbac.assign_role(payload.username, payload.role, expires_at=payload.expires_at)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"status": "success"}
 
 
+@router.post("/assign-roles", summary="Assign many roles at once", tags=["Roles"])
+def assign_roles(payload: BulkAssignRoles, rbac: RBAC):
+    """Assigns every (username, role) pair with batched storage access, or none if any pair fails."""
+    try:
+        rbac.assign_roles(
+            [(item.username, item.role_name) for item in payload.assignments], expires_at=payload.expires_at
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "assigned": len(payload.assignments)}
+
+
 @router.post("/grant-permission", summary="Grant permission to a role", tags=["Roles"])
-def grant_permission(payload: GrantPermission):
+def grant_permission(payload: GrantPermission, rbac: RBAC):
     """Grants a permission to a role."""
     rbac.grant_permission(payload.role, payload.permission)
     return {"status": "success"}
 
+@router.post("/grant-permissions", summary="Grant many permissions at once", tags=["Roles"])
+def grant_permissions(payload: BulkGrantPermissions, rbac: RBAC):
+    """Grants every (role, permission) pair with batched storage access, or none if any pair fails."""
+    try:
+        rbac.grant_permissions([(item.role, item.permission) for item in payload.grants])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "granted": len(payload.grants)}
+
 # --- Permission Management ---
 
 @router.post("/permissions", summary="Create a new permission", tags=["Permissions"])
-def create_permission(payload: PermissionCreate):
+def create_permission(payload: PermissionCreate, rbac: RBAC):
     """Creates a new permission."""
     return rbac.add_permission(payload.name)
 
 
 @router.get("/permissions", response_model=PermissionListResponse, tags=["Permissions"])
-def list_permissions():
-    """Lists all permissions."""
-    return {"permissions": list(rbac.storage.get_all_permission_names())}
+def list_permissions(rbac: RBAC, prefix: Optional[str] = None, limit: Optional[int] = Query(None, ge=1)):
+    """Lists all permissions, or with `prefix`/`limit` the matching names in sorted order."""
+    if prefix is None and limit is None:
+        return {"permissions": [permission.name for permission in rbac.storage.get_all_permissions()]}
+    found = rbac.storage.find_permissions(prefix or "", limit=limit)
+    return {"permissions": [permission.name for permission in found]}
 
 
 @router.post("/check-permission", summary="Check user access", tags=["Permissions"])
-def check_permission(payload: CheckAccess):
+def check_permission(payload: CheckAccess, rbac: RBAC):
     """Checks if the user has a given permission."""
     try:
         result = rbac.check_permission(payload.username, payload.permission)
@@ -97,32 +154,169 @@ def check_permission(payload: CheckAccess):
         raise HTTPException(status_code=404, detail=str(e))
 
 @router.post("/check-permission-h", summary="Check user access (Hierarchical)", tags=["Permissions"])
-def check_permission_h(data: PermissionCheckRequest):
+def check_permission_h(data: PermissionCheckRequest, rbac: RBAC):
     """Checks if user has a permission (hierarchical version)."""
     return {"has_permission": rbac.check_permission(data.username, data.permission)}
 
 @router.get("/users/{username}/permissions", response_model=list[str], tags=["Permissions"])
-def get_effective_permissions(username: str):
+def get_effective_permissions(username: str, rbac: RBAC):
     """Lists all effective permissions for a user."""
     return list(rbac.get_user_permissions(username))
 
+
+@router.get("/users/{username}/explain/{permission}", response_model=ExplainResponse, tags=["Access Control"])
+def explain_permission(username: str, permission: str, rbac: RBAC):
+    """Explains which role path grants a permission, or which roles would."""
+    try:
+        return asdict(rbac.explain(username, permission))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/reports/permissions", summary="Export effective permissions of all users", tags=["Access Control"])
+def export_permission_report(rbac: RBAC, format: Literal["csv", "columnar"] = "csv"):
+    """Streams every (user, permission) pair as CSV or as NDJSON column chunks."""
+    matrix = rbac.permission_matrix()
+    if format == "columnar":
+        chunks = (json.dumps(chunk) + "\n" for chunk in matrix.iter_columns())
+        return StreamingResponse(chunks, media_type="application/x-ndjson")
+    return StreamingResponse(matrix.iter_csv(), media_type="text/csv")
+
+
+@router.get("/lint", response_model=LintReportResponse, tags=["Access Control"])
+def lint_policy(rbac: RBAC):
+    """Reports redundant parent links, grants and assignments."""
+    return _lint_response(rbac.lint())
+
+
+@router.post("/lint/apply", response_model=LintReportResponse, tags=["Access Control"])
+def apply_policy_reduction(rbac: RBAC):
+    """Removes redundant parent links, grants and assignments."""
+    return _lint_response(rbac.lint(apply=True))
+
+
+def _lint_response(report) -> dict:
+    return {**asdict(report), "traversal_saved": report.traversal_saved}
+
+
+@router.post("/compile", response_model=CompileStatsResponse, tags=["Access Control"])
+def compile_policy(rbac: RBAC):
+    """Compiles the current policy into a read-optimized decision table."""
+    return asdict(rbac.compile())
+
+@router.put("/policy", response_model=PolicyDiffResponse, tags=["Access Control"])
+def reconcile_policy(document: PolicyDocument, rbac: RBAC, dry_run: bool = False, prune: bool = False):
+    """
+    Reconciles the live policy with the desired document, applying only what differs.
+    With `dry_run` the diff is reported without changes; with `prune` unlisted entities are removed.
+    """
+    try:
+        diff = rbac.reconcile(document.model_dump(exclude_none=True), dry_run=dry_run, prune=prune)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**asdict(diff), "change_count": diff.change_count}
+
+# --- Capability tokens ---
+
+@router.post("/tokens", response_model=TokenResponse, tags=["Access Control"])
+def issue_token(payload: TokenRequest, request: Request, rbac: RBAC):
+    """Issues a signed token embedding the effective permissions of a user or session."""
+    key = request.app.state.token_key
+    if key is None:
+        raise HTTPException(status_code=503, detail="Token signing is not configured")
+    try:
+        token = rbac.issue_capability_token(
+            key, username=payload.username, session_id=payload.session_id, ttl=payload.ttl_seconds
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404 if "not found" in str(e) else 400, detail=str(e))
+    capability = peek(token)
+    return {
+        "token": token,
+        "expires_at": datetime.fromtimestamp(capability.expires_at, tz=timezone.utc),
+        "policy_version": capability.policy_version,
+        "dictionary_version": capability.dictionary_version,
+    }
+
+
+@router.get("/tokens/dictionary", response_model=PermissionDictionaryResponse, tags=["Access Control"])
+def get_permission_dictionary(rbac: RBAC):
+    """Returns the permission dictionary and policy version that token verifiers need."""
+    return {**rbac.permission_dictionary().to_dict(), "policy_version": rbac.policy_version}
+
+# --- Background jobs ---
+
+@router.post("/jobs", response_model=JobResponse, status_code=202, tags=["Jobs"])
+def submit_job(payload: JobRequest, request: Request):
+    """Starts an audit, lint, permission report or policy diff in a worker process."""
+    return _job_response(request.app.state.jobs.submit(payload.kind, payload.params))
+
+
+@router.get("/jobs", response_model=list[JobResponse], tags=["Jobs"])
+def list_jobs(request: Request):
+    """Lists known jobs with their status and progress."""
+    return [_job_response(job) for job in request.app.state.jobs.list()]
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+def get_job(job_id: str, request: Request):
+    """Returns a job's status and progress."""
+    return _job_response(_known_job(request, job_id))
+
+
+@router.get("/jobs/{job_id}/result", tags=["Jobs"])
+def get_job_result(job_id: str, request: Request):
+    """Returns the result of a finished job; permission reports are CSV."""
+    job = _known_job(request, job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if not job.done:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.kind == "permission_report":
+        return PlainTextResponse(job.result, media_type="text/csv")
+    return job.result
+
+
+def _known_job(request: Request, job_id: str):
+    try:
+        return request.app.state.jobs.get(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _job_response(job) -> dict:
+    return {
+        **{key: getattr(job, key) for key in ("job_id", "kind", "status", "progress", "policy_version", "error")},
+        "submitted_at": datetime.fromtimestamp(job.submitted_at, tz=timezone.utc),
+        "finished_at": datetime.fromtimestamp(job.finished_at, tz=timezone.utc) if job.finished_at else None,
+    }
+
 # --- SSD ---
 
 @router.get("/ssd", response_model=SSDListResponse, tags=["SSD"])
-def get_ssd_sets():
+def get_ssd_sets(rbac: RBAC):
     """Retrieves all SSD (Static Separation of Duty) sets."""
-    return {"sets": rbac.ssd.get_all_sets()}
+    return {"sets": rbac.ssd.get_all_sets(), "limits": rbac.ssd.get_limits()}
+
+
+@router.get("/ssd/violations", response_model=ConstraintAuditResponse, tags=["SSD"])
+def get_constraint_violations(rbac: RBAC):
+    """Audits all users against SSD sets and all live sessions against DSD sets."""
+    return asdict(rbac.audit_constraints())
 
 
 @router.post("/ssd", summary="Create SSD conflict set", tags=["SSD"])
-def create_ssd_conflicts(request: SSDCreateRequest):
+def create_ssd_conflicts(request: SSDCreateRequest, rbac: RBAC):
     """Creates a new SSD conflict set."""
-    rbac.ssd.add_set(request.name, set(request.roles))
+    try:
+        rbac.ssd.add_set(request.name, set(request.roles), request.max_roles)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"status": "created"}
 
 
 @router.delete("/ssd/{name}", summary="Delete SSD conflict set", tags=["SSD"])
-def delete_ssd_set(name: str):
+def delete_ssd_set(name: str, rbac: RBAC):
     """Deletes an SSD conflict set by name."""
     rbac.ssd.remove_set(name)
     return {"status": "deleted"}
@@ -130,27 +324,33 @@ def delete_ssd_set(name: str):
 # --- DSD ---
 
 @router.get("/dsd", response_model=DSDConflictSetsResponse, tags=["DSD"])
-def get_dsd_conflict_sets():
+def get_dsd_conflict_sets(rbac: RBAC):
     """Retrieves all DSD (Dynamic Separation of Duty) conflict sets."""
-    return {"conflict_sets": rbac.dsd.get_conflict_sets()}
+    return {"conflict_sets": rbac.dsd.get_conflict_sets(), "limits": rbac.dsd.get_limits()}
 
 
 @router.post("/dsd", summary="Add new DSD conflict set", tags=["DSD"])
-def add_dsd_conflict_set(req: DSDConflictSetRequest):
+def add_dsd_conflict_set(req: DSDConflictSetRequest, rbac: RBAC):
     """Adds a new DSD conflict set."""
-    rbac.dsd.add_set(req.name, req.roles)
+    try:
+        rbac.dsd.add_set(req.name, req.roles, req.max_roles)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"status": "created"}
 
 
 @router.put("/dsd/{set_name}", summary="Update DSD conflict set", tags=["DSD"])
-def update_dsd_conflict_set(set_name: str, req: DSDConflictSetUpdateRequest):
+def update_dsd_conflict_set(set_name: str, req: DSDConflictSetUpdateRequest, rbac: RBAC):
     """Updates an existing DSD conflict set."""
-    rbac.dsd.add_set(set_name, req.roles)
+    try:
+        rbac.dsd.add_set(set_name, req.roles, req.max_roles)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {"status": "updated"}
 
 
 @router.delete("/dsd/{set_name}", summary="Delete DSD conflict set", tags=["DSD"])
-def delete_dsd_conflict_set(set_name: str):
+def delete_dsd_conflict_set(set_name: str, rbac: RBAC):
     """Deletes a DSD conflict set."""
     rbac.dsd.remove_set(set_name)
     return {"status": "deleted"}
@@ -158,7 +358,55 @@ def delete_dsd_conflict_set(set_name: str):
 # --- Session ---
 
 @router.post("/sessions", response_model=SessionResponse, tags=["Sessions"])
-def create_session(request: SessionCreateRequest):
+def create_session(request: SessionCreateRequest, rbac: RBAC):
     """Creates a user session with selected active roles."""
-    session = rbac.create_session(request.username, request.active_roles)
-    return SessionResponse(username=session.user.username, active_roles=session.active_roles)
+    try:
+        session = rbac.create_session(request.username, request.active_roles)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _session_response(session)
+
+
+@router.get("/sessions/{session_id}", response_model=SessionResponse, tags=["Sessions"])
+def get_session(session_id: str, rbac: RBAC):
+    """Returns a live session and its active roles."""
+    return _session_response(_live_session(rbac, session_id))
+
+
+@router.post("/sessions/{session_id}/roles/{role}", response_model=SessionResponse, tags=["Sessions"])
+def activate_session_role(session_id: str, role: str, rbac: RBAC):
+    """Activates an assigned role in a live session, enforcing DSD."""
+    _live_session(rbac, session_id)
+    try:
+        session = rbac.activate_session_role(session_id, role)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _session_response(session)
+
+
+@router.delete("/sessions/{session_id}/roles/{role}", response_model=SessionResponse, tags=["Sessions"])
+def deactivate_session_role(session_id: str, role: str, rbac: RBAC):
+    """Deactivates a role in a live session."""
+    _live_session(rbac, session_id)
+    return _session_response(rbac.deactivate_session_role(session_id, role))
+
+
+@router.delete("/sessions/{session_id}", summary="End a session", tags=["Sessions"])
+def end_session(session_id: str, rbac: RBAC):
+    """Ends a live session."""
+    _live_session(rbac, session_id)
+    rbac.end_session(session_id)
+    return {"status": "deleted"}
+
+
+def _live_session(rbac: RBACManager, session_id: str):
+    try:
+        return rbac.get_session(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _session_response(session) -> SessionResponse:
+    return SessionResponse(
+        session_id=session.session_id, username=session.user.username, active_roles=session.active_roles
+    )
@@ -0,0 +1,181 @@
+"""
+Opt-in sampling profiler for API requests.
+
+Pass a `RequestProfiler` to `create_app(profiler=...)` to install
+`ProfilingMiddleware` and the `/profiles` routes; without one neither is
+installed and requests pay nothing. A `sample_rate` fraction of requests
+(optionally only under `path_prefix`) is profiled, and a profile is kept when
+the request took at least `slow_ms`.
+
+Profiling is statistical: while a profiled request runs, a sampler thread reads
+`sys._current_frames()` every `interval` seconds and counts the stacks of
+threads executing `rbac` code. This also covers sync routes, which FastAPI runs
+in worker threads that a cProfile enabled in the middleware would not see.
+Samples from other requests running at the same moment are included too.
+
+Profiles are written as folded stacks (`frame;frame;frame count` per line, as
+read by flamegraph.pl and speedscope) to `directory`, keeping the newest
+`max_profiles` files.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+PROFILE_SUFFIX = ".folded"
+_RBAC_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_MAX_DEPTH = 64
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class StackSampler:
+    """Background thread counting the folded stacks of threads running `rbac` code."""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rbac-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own:
+                    stack = _fold(frame)
+                    if stack is not None:
+                        self.samples[stack] += 1
+
+
+def _fold(frame) -> Optional[str]:
+    names = []
+    in_rbac = False
+    while frame is not None and len(names) < _MAX_DEPTH:
+        code = frame.f_code
+        if code.co_filename.startswith(_RBAC_ROOT) and code.co_filename != __file__:
+            in_rbac = True
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    if not in_rbac:
+        return None
+    return ";".join(reversed(names))
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their profiles in a rotating directory."""
+
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: float = 0.01,
+        slow_ms: float = 0.0,
+        path_prefix: str = "",
+        max_profiles: int = 100,
+        interval: float = 0.001,
+    ):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.path_prefix = path_prefix
+        self.max_profiles = max_profiles
+        self.interval = interval
+        self.routes_prefix: Optional[str] = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def should_profile(self, path: str) -> bool:
+        if not path.startswith(self.path_prefix):
+            return False
+        if self.routes_prefix is not None and path.startswith(self.routes_prefix):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def record(self, method: str, path: str, seconds: float, samples: Counter[str]) -> Optional[str]:
+        """Writes a profile if the request was slow enough; returns its file name."""
+        elapsed_ms = seconds * 1000
+        if elapsed_ms < self.slow_ms:
+            return None
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        name = f"{stamp}-{method}-{_UNSAFE.sub('_', path.strip('/')) or 'root'}-{elapsed_ms:.1f}ms{PROFILE_SUFFIX}"
+        lines = [f"{stack} {count}\n" for stack, count in samples.most_common()]
+        with self._lock:
+            with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            self._rotate()
+        logger.info("Profiled %s %s in %.1fms (%d samples): %s", method, path, elapsed_ms, sum(samples.values()), name)
+        return name
+
+    def _rotate(self) -> None:
+        for name in self.list_profiles()[self.max_profiles:]:
+            os.remove(os.path.join(self.directory, name))
+
+    def list_profiles(self) -> list[str]:
+        """Profile file names, newest first."""
+        names = [name for name in os.listdir(self.directory) if name.endswith(PROFILE_SUFFIX)]
+        return sorted(names, reverse=True)
+
+    def read_profile(self, name: str) -> str:
+        """Returns a profile's contents. Raises ValueError for names not in the listing."""
+        if name not in self.list_profiles():
+            raise ValueError(f"Profile '{name}' not found.")
+        with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+            return f.read()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that samples the stacks of selected requests."""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_profile(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        sampler = StackSampler(self.profiler.interval)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.profiler.record(scope["method"], scope["path"], elapsed, sampler.stop())
+
+
+@router.get("", response_model=list[str], tags=["Diagnostics"])
+def list_profiles(request: Request):
+    """Lists stored request profiles, newest first."""
+    return request.app.state.profiler.list_profiles()
+
+
+@router.get("/{name}", response_class=PlainTextResponse, tags=["Diagnostics"])
+def download_profile(name: str, request: Request):
+    """Downloads a profile in folded-stack format."""
+    try:
+        return request.app.state.profiler.read_profile(name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,87 @@
+"""
+Compare decision endpoints in-process over ASGI.
+
+    python -m rbac.bench.decisions --requests 5000 --batch-size 100
+
+Prints one JSON object with requests (or checks) per second for the pydantic
+route, the fast JSON route and the JSON and binary batch routes.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+
+from rbac.api import create_app
+from rbac.bench.policy import PolicyShape, build_policy, sample_checks
+from rbac.codec import BATCH_CONTENT_TYPE, decode_results, encode_checks
+
+
+async def _time_requests(client: httpx.AsyncClient, requests: list[dict]) -> float:
+    started = time.perf_counter()
+    for request in requests:
+        response = await client.post(**request)
+        response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def run(shape: PolicyShape, requests: int, batch_size: int) -> dict:
+    manager = build_policy(shape)
+    app = create_app(manager)
+    checks = sample_checks(shape, requests)
+    batches = [checks[i:i + batch_size] for i in range(0, len(checks), batch_size)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        plain = await _time_requests(client, [
+            {"url": "/rbac/check-permission", "json": {"username": u, "permission": p}} for u, p in checks
+        ])
+        fast = await _time_requests(client, [
+            {"url": "/rbac/fast/check-permission", "json": {"username": u, "permission": p}} for u, p in checks
+        ])
+        batch_json = await _time_requests(client, [
+            {"url": "/rbac/fast/check-batch", "json": {"checks": batch}} for batch in batches
+        ])
+        batch_binary = await _time_requests(client, [
+            {
+                "url": "/rbac/fast/check-batch",
+                "content": encode_checks(batch),
+                "headers": {"content-type": BATCH_CONTENT_TYPE},
+            }
+            for batch in batches
+        ])
+        response = await client.post(
+            "/rbac/fast/check-batch", content=encode_checks(checks[:10]),
+            headers={"content-type": BATCH_CONTENT_TYPE},
+        )
+        assert decode_results(response.content) == manager.check_permissions(checks[:10])
+
+    return {
+        "requests": requests,
+        "batch_size": batch_size,
+        "check_permission_rps": requests / plain,
+        "fast_check_permission_rps": requests / fast,
+        "fast_speedup": plain / fast,
+        "batch_json_checks_per_second": requests / batch_json,
+        "batch_binary_checks_per_second": requests / batch_binary,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--users", type=int, default=PolicyShape.users)
+    parser.add_argument("--roles", type=int, default=PolicyShape.roles)
+    parser.add_argument("--permissions", type=int, default=PolicyShape.permissions)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    shape = PolicyShape(users=args.users, roles=args.roles, permissions=args.permissions)
+    print(json.dumps(asyncio.run(run(shape, args.requests, args.batch_size)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
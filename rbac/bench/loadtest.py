@@ -0,0 +1,185 @@
+"""
+Concurrent load test for the RBAC API.
+
+    python -m rbac.bench.loadtest --clients 50 --requests 20000 --mix check=90,assign=5,session=5
+    python -m rbac.bench.loadtest --url http://127.0.0.1:8000 --output run.json
+
+Without --url the app is built in-process and driven over ASGI. With --url the
+harness seeds a synthetic policy through the API of a running server first.
+Prints (or writes) a JSON report with throughput and p50/p95/p99/max latency per route.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import time
+from dataclasses import asdict
+from typing import Optional
+
+import httpx
+
+from rbac.api import create_app
+from rbac.bench.policy import PolicyShape, build_policy
+from rbac.bench.stats import summarize
+
+OPERATIONS = ("check", "assign", "session")
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    """Parses 'check=90,assign=5,session=5' into operation weights."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}', expected one of {OPERATIONS}")
+        mix[name] = int(weight)
+    return mix
+
+
+async def seed_over_http(client: httpx.AsyncClient, shape: PolicyShape) -> dict[str, list[str]]:
+    """Creates a flat synthetic policy through the API; returns each user's roles."""
+    rng = random.Random(shape.seed)
+    permissions = [f"perm{i}" for i in range(shape.permissions)]
+    roles = [f"role{i}" for i in range(shape.roles)]
+    for name in permissions:
+        (await client.post("/rbac/permissions", json={"name": name})).raise_for_status()
+    for role in roles:
+        (await client.post("/rbac/roles", json={"name": role})).raise_for_status()
+        for name in rng.sample(permissions, min(shape.permissions_per_role, len(permissions))):
+            (await client.post("/rbac/grant-permission", json={"role": role, "permission": name})).raise_for_status()
+    assignments = {}
+    for i in range(shape.users):
+        username = f"user{i}"
+        (await client.post("/rbac/users", json={"username": username})).raise_for_status()
+        assignments[username] = rng.sample(roles, min(shape.roles_per_user, len(roles)))
+        for role in assignments[username]:
+            (await client.post("/rbac/assign-role", json={"username": username, "role": role})).raise_for_status()
+    return assignments
+
+
+class LoadTest:
+    """Drives a mix of operations from many concurrent clients and records latencies per route."""
+
+    def __init__(self, client: httpx.AsyncClient, shape: PolicyShape, assignments: dict[str, list[str]],
+                 mix: dict[str, int], seed: int = 1):
+        self.client = client
+        self.shape = shape
+        self.assignments = assignments
+        self.users = list(assignments)
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.rng = random.Random(seed)
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def _timed(self, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies.setdefault(route, []).append(time.perf_counter() - started)
+        if response is None or response.status_code >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+            return None
+        return response
+
+    async def _one(self) -> None:
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        username = self.rng.choice(self.users)
+        if operation == "check":
+            permission = f"perm{self.rng.randrange(self.shape.permissions)}"
+            await self._timed("check", "POST", "/rbac/check-permission",
+                              json={"username": username, "permission": permission})
+        elif operation == "assign":
+            role = self.rng.choice(self.assignments[username])
+            await self._timed("assign", "POST", "/rbac/assign-role", json={"username": username, "role": role})
+        elif self.assignments[username]:
+            active = [self.rng.choice(self.assignments[username])]
+            response = await self._timed("session_create", "POST", "/rbac/sessions",
+                                         json={"username": username, "active_roles": active})
+            if response is not None:
+                await self._timed("session_end", "DELETE", f"/rbac/sessions/{response.json()['session_id']}")
+
+    async def run(self, clients: int, requests: int) -> float:
+        """Runs `requests` operations across `clients` workers; returns elapsed seconds."""
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await self._one()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> dict:
+        routes = {
+            route: summarize(values, elapsed, self.errors.get(route, 0))
+            for route, values in sorted(self.latencies.items())
+        }
+        everything = [value for values in self.latencies.values() for value in values]
+        return {"routes": routes, "total": summarize(everything, elapsed, sum(self.errors.values()))}
+
+
+async def run(shape: PolicyShape, mix: dict[str, int], clients: int, requests: int,
+              url: Optional[str] = None) -> dict:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    if url:
+        client = httpx.AsyncClient(base_url=url, limits=limits)
+    else:
+        manager = build_policy(shape)
+        transport = httpx.ASGITransport(app=create_app(manager))
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest")
+    async with client:
+        if url:
+            assignments = await seed_over_http(client, shape)
+        else:
+            assignments = {u.username: sorted(u.get_role_names()) for u in manager.storage.get_all_users()}
+        test = LoadTest(client, shape, assignments, mix)
+        elapsed = await test.run(clients, requests)
+
+    return {
+        "config": {
+            "target": url or "asgi",
+            "clients": clients,
+            "requests": requests,
+            "mix": mix,
+            "policy": asdict(shape),
+            "python": platform.python_version(),
+        },
+        "elapsed_seconds": elapsed,
+        **test.report(elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server; in-process ASGI when omitted")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--mix", default="check=90,assign=5,session=5")
+    parser.add_argument("--users", type=int, default=PolicyShape.users)
+    parser.add_argument("--roles", type=int, default=PolicyShape.roles)
+    parser.add_argument("--permissions", type=int, default=PolicyShape.permissions)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    shape = PolicyShape(users=args.users, roles=args.roles, permissions=args.permissions, seed=args.seed)
+    report = asyncio.run(run(shape, parse_mix(args.mix), args.clients, args.requests, args.url))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Memory footprint of a synthetic policy.
+
+    python -m rbac.bench.memory --users 100000 --roles 500 --permissions 5000
+    python -m rbac.bench.memory --users 10000 --project-users 1000000
+
+Builds the policy under tracemalloc, compiles it, and prints a JSON report with
+bytes per category, per-entity costs and, optionally, a projection to a larger policy.
+"""
+import argparse
+import json
+import logging
+import tracemalloc
+from dataclasses import asdict
+
+from rbac.bench.policy import PolicyShape, build_policy
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=PolicyShape.users)
+    parser.add_argument("--roles", type=int, default=PolicyShape.roles)
+    parser.add_argument("--permissions", type=int, default=PolicyShape.permissions)
+    parser.add_argument("--roles-per-user", type=int, default=PolicyShape.roles_per_user)
+    parser.add_argument("--permissions-per-role", type=int, default=PolicyShape.permissions_per_role)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-compile", action="store_true", help="Skip building the compiled policy")
+    parser.add_argument("--project-users", type=int, help="Extrapolate to this many users")
+    parser.add_argument("--project-roles", type=int, help="Extrapolate to this many roles")
+    parser.add_argument("--project-permissions", type=int, help="Extrapolate to this many permissions")
+    parser.add_argument("--top", type=int, default=10, help="Allocation sites to list")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    shape = PolicyShape(
+        users=args.users, roles=args.roles, permissions=args.permissions,
+        roles_per_user=args.roles_per_user, permissions_per_role=args.permissions_per_role, seed=args.seed,
+    )
+    tracemalloc.start()
+    manager = build_policy(shape)
+    if not args.no_compile:
+        manager.compile()
+    report = manager.memory_report(top=args.top)
+    tracemalloc.stop()
+
+    output = {"policy": asdict(shape), "total_bytes": report.total_bytes, **asdict(report)}
+    if args.project_users or args.project_roles or args.project_permissions:
+        target = {
+            "users": args.project_users or shape.users,
+            "roles": args.project_roles or shape.roles,
+            "permissions": args.project_permissions or shape.permissions,
+        }
+        output["projection"] = {**target, "total_bytes": report.extrapolate(**target)}
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
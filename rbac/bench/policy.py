@@ -0,0 +1,59 @@
+"""Synthetic policies for benchmarks and load tests."""
+import random
+from dataclasses import dataclass
+
+from rbac.core import RBACManager
+from rbac.models import Role
+from rbac.storage import InMemoryStorage
+
+
+@dataclass
+class PolicyShape:
+    """Size of a synthetic policy."""
+    users: int = 1_000
+    roles: int = 50
+    permissions: int = 500
+    roles_per_user: int = 2
+    permissions_per_role: int = 20
+    parents_per_role: int = 1
+    seed: int = 0
+
+
+def build_policy(shape: PolicyShape, manager: RBACManager = None) -> RBACManager:
+    """
+    Populates `manager` (a new in-memory one by default) with users `user{i}`,
+    roles `role{i}` and permissions `perm{i}`. Each role may inherit from roles
+    with lower indices, so the hierarchy is acyclic.
+    """
+    manager = manager or RBACManager(InMemoryStorage())
+    rng = random.Random(shape.seed)
+
+    permissions = [f"perm{i}" for i in range(shape.permissions)]
+    for name in permissions:
+        manager.add_permission(name)
+
+    roles = []
+    for i in range(shape.roles):
+        role = Role(f"role{i}")
+        for parent in rng.sample(roles, min(shape.parents_per_role, len(roles))):
+            role.add_parent(parent)
+        manager.add_role(role)
+        roles.append(role)
+        for name in rng.sample(permissions, min(shape.permissions_per_role, len(permissions))):
+            manager.grant_permission(role.name, name)
+
+    for i in range(shape.users):
+        username = f"user{i}"
+        manager.add_user(username)
+        for role in rng.sample(roles, min(shape.roles_per_user, len(roles))):
+            manager.assign_role(username, role.name)
+    return manager
+
+
+def sample_checks(shape: PolicyShape, count: int, seed: int = 1) -> list[tuple[str, str]]:
+    """Returns `count` random (username, permission) pairs over a synthetic policy."""
+    rng = random.Random(seed)
+    return [
+        (f"user{rng.randrange(shape.users)}", f"perm{rng.randrange(shape.permissions)}")
+        for _ in range(count)
+    ]
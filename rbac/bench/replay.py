@@ -0,0 +1,204 @@
+"""
+Replay a recorded trace (see `rbac.bench.trace`) against an RBACManager.
+
+    python -m rbac.bench.replay traffic.rbt
+    python -m rbac.bench.replay traffic.rbt --compile --name-filter --pace 1.0
+    python -m rbac.bench.replay traffic.rbt --factory mypkg:make_manager --output run.json
+
+The manager is built from the trace's policy snapshot by `--factory`, a
+`module:function` called with (storage, ssd, dsd) from
+`rbac.storage.journal.load_state`, or as a plain `RBACManager` by default.
+Expiry times in the snapshot are relative to the start of recording and are
+shifted to the start of the replay.
+Events run in order on one thread, back to back or, with `--pace`, spaced as
+recorded (divided by the pace). Prints (or writes) a JSON report with
+throughput and p50/p95/p99/max latency per operation, decisions that differ
+from the recorded ones, and how often checks were served by the compiled table,
+recompiled it, or were rejected by the name filter.
+"""
+import argparse
+import importlib
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from rbac.bench.stats import summarize
+from rbac.bench.trace import (
+    DENIED, ERROR, GRANTED, OP_ACTIVATE, OP_ADD_PERMISSION, OP_ADD_ROLE, OP_ADD_USERS, OP_ASSIGN,
+    OP_CHECK, OP_CHECK_BATCH, OP_DEACTIVATE, OP_END_SESSION, OP_GRANT, OP_LINT, OP_RECONCILE,
+    OP_REVOKE, OP_SESSION, TraceEvent, read_trace,
+)
+from rbac.core import RBACManager
+from rbac.models import Role
+from rbac.storage.journal import load_state
+
+
+def _pairs(names: list[str]) -> list[tuple[str, str]]:
+    return list(zip(names[::2], names[1::2]))
+
+
+def _add_role(manager: RBACManager, names: list[str]) -> None:
+    role = Role(names[0])
+    for parent_name in names[1:]:
+        parent = manager.storage.get_role(parent_name)
+        if parent is None:
+            raise ValueError(f"Role '{parent_name}' not found.")
+        role.add_parent(parent)
+    manager.add_role(role)
+
+
+def _assign(manager: RBACManager, event: TraceEvent) -> None:
+    expires_at = None
+    if event.expires_in:
+        expires_at = datetime.fromtimestamp(time.time() + event.expires_in, tz=timezone.utc)
+    manager.assign_roles(_pairs(event.names), expires_at=expires_at)
+
+
+def _run_event(manager: RBACManager, event: TraceEvent, sessions: dict[str, str]):
+    op, names = event.op, event.names
+    if op == OP_CHECK:
+        return manager.check_permission(names[0], names[1])
+    if op == OP_CHECK_BATCH:
+        return manager.check_permissions(_pairs(names))
+    if op == OP_SESSION:
+        session = manager.create_session(names[0], set(names[2:]))
+        sessions[names[1]] = session.session_id
+    elif op == OP_END_SESSION:
+        manager.end_session(sessions.pop(names[0], names[0]))
+    elif op == OP_ACTIVATE:
+        manager.activate_session_role(sessions.get(names[0], names[0]), names[1])
+    elif op == OP_DEACTIVATE:
+        manager.deactivate_session_role(sessions.get(names[0], names[0]), names[1])
+    elif op == OP_RECONCILE:
+        manager.reconcile(json.loads(names[0]), dry_run=bool(event.flags & 1), prune=bool(event.flags & 2))
+    elif op == OP_LINT:
+        manager.lint(apply=True)
+    elif op == OP_ADD_USERS:
+        manager.add_users(names)
+    elif op == OP_ADD_ROLE:
+        _add_role(manager, names)
+    elif op == OP_ADD_PERMISSION:
+        manager.add_permission(names[0])
+    elif op == OP_ASSIGN:
+        _assign(manager, event)
+    elif op == OP_REVOKE:
+        manager.revoke_role(names[0], names[1])
+    elif op == OP_GRANT:
+        manager.grant_permissions(_pairs(names))
+    else:
+        raise ValueError(f"Unknown trace opcode {op}")
+    return None
+
+
+def replay(events: list[TraceEvent], manager: RBACManager, pace: Optional[float] = None) -> dict:
+    """Runs `events` against `manager` and reports latency, decision and cache figures."""
+    latencies: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    sessions: dict[str, str] = {}
+    decisions = {"granted": 0, "denied": 0, "errors": 0, "mismatches": 0}
+    cache = {"compiled_hits": 0, "compiled_misses": 0, "recompiles": 0, "name_filter_rejections": 0}
+    name_filter = manager.name_filter
+    rejected_before = name_filter.rejected if name_filter is not None else 0
+
+    started = time.perf_counter()
+    for event in events:
+        if pace:
+            time.sleep(event.delay / pace)
+        compiled = manager.compiled
+        checks = []
+        if event.op == OP_CHECK:
+            checks = [(event.names[0], event.names[1])]
+        elif event.op == OP_CHECK_BATCH:
+            checks = _pairs(event.names)
+        if checks and compiled is not None:
+            current = compiled.version == manager._revision
+            hits = sum(current and compiled.lookup(username, perm) is not None for username, perm in checks)
+            cache["compiled_hits"] += hits
+            cache["compiled_misses"] += len(checks) - hits
+        outcomes = []
+        began = time.perf_counter()
+        try:
+            result = _run_event(manager, event, sessions)
+            if event.op == OP_CHECK_BATCH:
+                outcomes = [ERROR if r is None else GRANTED if r else DENIED for r in result]
+            else:
+                outcomes = [GRANTED if result else DENIED]
+        except ValueError:
+            outcomes = [ERROR] * max(len(checks), 1)
+            errors[event.label] = errors.get(event.label, 0) + 1
+        latencies.setdefault(event.label, []).append(time.perf_counter() - began)
+        if compiled is not None and manager.compiled is not compiled:
+            cache["recompiles"] += 1
+        if checks:
+            recorded = event.results if event.op == OP_CHECK_BATCH else [event.outcome]
+            for outcome, expected in zip(outcomes, recorded):
+                decisions[{GRANTED: "granted", ERROR: "errors"}.get(outcome, "denied")] += 1
+                decisions["mismatches"] += outcome != expected
+    elapsed = time.perf_counter() - started
+
+    name_filter = manager.name_filter
+    if name_filter is not None:
+        cache["name_filter_rejections"] = name_filter.rejected - rejected_before
+    every = [latency for values in latencies.values() for latency in values]
+    return {
+        "events": len(events),
+        "elapsed_seconds": elapsed,
+        "operations": {
+            label: summarize(values, elapsed, errors.get(label, 0)) for label, values in sorted(latencies.items())
+        },
+        "total": summarize(every, elapsed, sum(errors.values())),
+        "decisions": decisions,
+        "cache": cache,
+    }
+
+
+def _load_factory(spec: str) -> Callable[..., RBACManager]:
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="Trace file written by rbac.bench.trace.TraceRecorder")
+    parser.add_argument("--factory", help="module:function building an RBACManager from (storage, ssd, dsd)")
+    parser.add_argument("--compile", action="store_true", help="Compile the policy before replaying")
+    parser.add_argument("--name-filter", action="store_true", help="Enable the negative-lookup name filter")
+    parser.add_argument("--pace", type=float, help="Replay with recorded spacing divided by this factor")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    with open(args.trace, "rb") as f:
+        snapshot, events = read_trace(f.read())
+    storage, ssd, dsd = load_state(snapshot, expiry_offset=time.time())
+    if args.factory:
+        manager = _load_factory(args.factory)(storage, ssd, dsd)
+    else:
+        manager = RBACManager(storage, ssd_constraint=ssd, dsd_constraint=dsd)
+    if args.compile:
+        manager.compile()
+    if args.name_filter:
+        manager.enable_name_filter()
+
+    report = {
+        "config": {
+            "trace": args.trace,
+            "factory": args.factory,
+            "compile": args.compile,
+            "name_filter": args.name_filter,
+            "pace": args.pace,
+        },
+        **replay(events, manager, args.pace),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
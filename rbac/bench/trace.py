@@ -0,0 +1,311 @@
+"""
+Binary traces of decision and mutation traffic.
+
+`TraceRecorder` wraps an `RBACManager`'s public methods in place, so traffic
+reaching the manager from any caller (the API included) is captured while it
+is started:
+
+    recorder = TraceRecorder(manager, "traffic.rbt")
+    recorder.start()
+    ...
+    recorder.stop()
+
+Replay a trace with `python -m rbac.bench.replay traffic.rbt`.
+
+File layout: the magic `RBTR`, a version byte, `<u32 len>` and a snapshot of the
+policy at start (`rbac.storage.journal.encode_state`, empty when disabled, with
+expiry times relative to the start of recording), then events. Names are
+interned: the first use of a string is preceded by a `NAME` event
+(`<u8 0><u32 len><utf-8>`), later events refer to it by index. Each event is
+
+    <u8 op><u8 outcome><u32 microseconds since the previous event><u32 count><u32 name index> * count
+
+followed by an op-specific tail:
+
+- assignments: `<f64 seconds until expiry>` (0 = permanent),
+- batch checks: one outcome byte per pair,
+- reconcile: `<u8 flags>` (1 = dry run, 2 = prune).
+
+Session events name the user, the session ID (empty if creation failed) and
+the requested roles; session role changes name the session ID and the role;
+batch checks, assignments and grants list flattened pairs; reconcile names the
+policy document as JSON. `lint` is recorded only with `apply=True`.
+Outcomes are 0 = denied (or done), 1 = granted, 2 = ValueError (or, in a
+batch, an unknown user or permission). Calls made by other manager methods
+(`add_user` calling `add_users`, `check_permissions` calling
+`check_permission`) are recorded once.
+"""
+from __future__ import annotations
+
+import json
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import BinaryIO, Optional
+
+from rbac.storage.journal import encode_state
+
+MAGIC = b"RBTR"
+VERSION = 2
+
+OP_NAME = 0
+OP_CHECK = 1
+OP_SESSION = 2
+OP_END_SESSION = 3
+OP_ADD_USERS = 4
+OP_ADD_ROLE = 5
+OP_ADD_PERMISSION = 6
+OP_ASSIGN = 7
+OP_REVOKE = 8
+OP_GRANT = 9
+OP_CHECK_BATCH = 10
+OP_ACTIVATE = 11
+OP_DEACTIVATE = 12
+OP_RECONCILE = 13
+OP_LINT = 14
+
+OP_LABELS = {
+    OP_CHECK: "check",
+    OP_SESSION: "create_session",
+    OP_END_SESSION: "end_session",
+    OP_ADD_USERS: "add_users",
+    OP_ADD_ROLE: "add_role",
+    OP_ADD_PERMISSION: "add_permission",
+    OP_ASSIGN: "assign_roles",
+    OP_REVOKE: "revoke_role",
+    OP_GRANT: "grant_permissions",
+    OP_CHECK_BATCH: "check_batch",
+    OP_ACTIVATE: "activate_session_role",
+    OP_DEACTIVATE: "deactivate_session_role",
+    OP_RECONCILE: "reconcile",
+    OP_LINT: "lint",
+}
+
+DENIED = 0
+GRANTED = 1
+ERROR = 2
+
+_FILE_HEADER = struct.Struct("<4sBI")
+_EVENT = struct.Struct("<BBII")
+_NAME = struct.Struct("<BI")
+_U8 = struct.Struct("<B")
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+_MAX_DELAY_US = 0xFFFFFFFF
+
+
+@dataclass
+class TraceEvent:
+    """One recorded call. `delay` is the seconds since the previous event started."""
+    op: int
+    outcome: int
+    delay: float
+    names: list[str]
+    expires_in: float = 0.0
+    results: list[int] = field(default_factory=list)
+    flags: int = 0
+
+    @property
+    def label(self) -> str:
+        return OP_LABELS[self.op]
+
+
+def _pairs(pairs) -> list[str]:
+    return [name for pair in pairs for name in pair]
+
+
+def _expiry_tail(expires_at: Optional[datetime]) -> bytes:
+    expires_in = 0.0 if expires_at is None else max(expires_at.timestamp() - time.time(), 1e-6)
+    return _F64.pack(expires_in)
+
+
+def _reconcile(document: dict, dry_run: bool = False, prune: bool = False):
+    return OP_RECONCILE, [json.dumps(document, sort_keys=True)], _U8.pack(dry_run | prune << 1)
+
+
+# Maps each recorded manager method to a function turning its arguments into
+# (op, names, tail), or None when the call is not recorded.
+_ENCODERS = {
+    "check_permission": lambda username, perm_name: (OP_CHECK, [username, perm_name], b""),
+    "check_permissions": lambda checks: (OP_CHECK_BATCH, _pairs(checks), b""),
+    "create_session": lambda username, active_role_names: (OP_SESSION, [username, *sorted(active_role_names)], b""),
+    "end_session": lambda session_id: (OP_END_SESSION, [session_id], b""),
+    "activate_session_role": lambda session_id, role_name: (OP_ACTIVATE, [session_id, role_name], b""),
+    "deactivate_session_role": lambda session_id, role_name: (OP_DEACTIVATE, [session_id, role_name], b""),
+    "add_user": lambda username: (OP_ADD_USERS, [username], b""),
+    "add_users": lambda usernames: (OP_ADD_USERS, list(usernames), b""),
+    "add_role": lambda role: (OP_ADD_ROLE, [role.name, *sorted(p.name for p in role.parents)], b""),
+    "add_permission": lambda perm_name: (OP_ADD_PERMISSION, [perm_name], b""),
+    "assign_role": lambda username, role_name, expires_at=None: (
+        OP_ASSIGN, [username, role_name], _expiry_tail(expires_at)
+    ),
+    "assign_roles": lambda assignments, expires_at=None: (
+        OP_ASSIGN, _pairs(assignments), _expiry_tail(expires_at)
+    ),
+    "revoke_role": lambda username, role_name: (OP_REVOKE, [username, role_name], b""),
+    "grant_permission": lambda role_name, perm_name: (OP_GRANT, [role_name, perm_name], b""),
+    "grant_permissions": lambda grants: (OP_GRANT, _pairs(grants), b""),
+    "reconcile": _reconcile,
+    "lint": lambda apply=False: (OP_LINT, [], b"") if apply else None,
+}
+
+
+def _batch_outcomes(results: list[Optional[bool]]) -> bytes:
+    return bytes(ERROR if result is None else GRANTED if result else DENIED for result in results)
+
+
+class TraceWriter:
+    """Appends events to a binary trace, interning names."""
+
+    def __init__(self, out: BinaryIO, snapshot: bytes = b""):
+        self.out = out
+        self.events = 0
+        self._names: dict[str, int] = {}
+        self._last = time.perf_counter()
+        out.write(_FILE_HEADER.pack(MAGIC, VERSION, len(snapshot)) + snapshot)
+
+    def _name(self, name: str, parts: list[bytes]) -> int:
+        index = self._names.get(name)
+        if index is None:
+            index = self._names[name] = len(self._names)
+            data = name.encode("utf-8")
+            parts.append(_NAME.pack(OP_NAME, len(data)) + data)
+        return index
+
+    def write(
+        self, op: int, outcome: int, names: list[str], tail: bytes = b"", started: Optional[float] = None,
+    ) -> None:
+        started = time.perf_counter() if started is None else started
+        delay_us = min(max(round((started - self._last) * 1e6), 0), _MAX_DELAY_US)
+        self._last = max(self._last, started)
+        parts: list[bytes] = []
+        indexes = [self._name(name, parts) for name in names]
+        parts.append(_EVENT.pack(op, outcome, delay_us, len(indexes)))
+        parts.extend(_U32.pack(index) for index in indexes)
+        parts.append(tail)
+        self.out.write(b"".join(parts))
+        self.events += 1
+
+
+def read_trace(data: bytes) -> tuple[bytes, list[TraceEvent]]:
+    """Splits a trace into its policy snapshot and events. Raises ValueError if it is not a trace."""
+    if len(data) < _FILE_HEADER.size:
+        raise ValueError("Not an RBAC trace: too short")
+    magic, version, snapshot_size = _FILE_HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not an RBAC trace of version {VERSION}")
+    offset = _FILE_HEADER.size
+    snapshot = data[offset:offset + snapshot_size]
+    offset += snapshot_size
+    names: list[str] = []
+    events = []
+    while offset < len(data):
+        if data[offset] == OP_NAME:
+            _, size = _NAME.unpack_from(data, offset)
+            start = offset + _NAME.size
+            names.append(data[start:start + size].decode("utf-8"))
+            offset = start + size
+            continue
+        op, outcome, delay_us, count = _EVENT.unpack_from(data, offset)
+        offset += _EVENT.size
+        indexes = struct.unpack_from(f"<{count}I", data, offset)
+        offset += 4 * count
+        event = TraceEvent(op, outcome, delay_us / 1e6, [names[i] for i in indexes])
+        if op == OP_ASSIGN:
+            (event.expires_in,) = _F64.unpack_from(data, offset)
+            offset += _F64.size
+        elif op == OP_CHECK_BATCH:
+            event.results = list(data[offset:offset + count // 2])
+            offset += count // 2
+        elif op == OP_RECONCILE:
+            (event.flags,) = _U8.unpack_from(data, offset)
+            offset += _U8.size
+        events.append(event)
+    return snapshot, events
+
+
+class TraceRecorder:
+    """
+    Records calls to `manager` into the trace file at `path` between `start()`
+    and `stop()`. With `snapshot=True` the policy at start is stored too, so a
+    replay starts from the same state. Recording costs a lock and a small write
+    per call; events are buffered and flushed on `stop()`.
+    """
+
+    def __init__(self, manager, path: str, snapshot: bool = True):
+        self.manager = manager
+        self.path = path
+        self.snapshot = snapshot
+        self.writer: Optional[TraceWriter] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self) -> None:
+        if self.writer is not None:
+            raise ValueError("Recorder is already started.")
+        manager = self.manager
+        snapshot = b""
+        if self.snapshot:
+            snapshot = encode_state(manager.storage, manager.ssd, manager.dsd, expiry_offset=-time.time())
+        self.writer = TraceWriter(open(self.path, "wb"), snapshot)
+        for method_name, encoder in _ENCODERS.items():
+            setattr(manager, method_name, self._wrap(getattr(manager, method_name), encoder))
+
+    def stop(self) -> int:
+        """Restores the manager's methods and closes the trace; returns the number of events recorded."""
+        if self.writer is None:
+            return 0
+        for method_name in _ENCODERS:
+            self.manager.__dict__.pop(method_name, None)
+        with self._lock:
+            writer, self.writer = self.writer, None
+            writer.out.close()
+        return writer.events
+
+    def __enter__(self) -> TraceRecorder:
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _wrap(self, method, encoder):
+        local = self._local
+
+        def recorded(*args, **kwargs):
+            if getattr(local, "active", False):
+                return method(*args, **kwargs)
+            args = tuple(list(value) if isinstance(value, Iterator) else value for value in args)
+            encoded = encoder(*args, **kwargs)
+            if encoded is None:
+                return method(*args, **kwargs)
+            op, names, tail = encoded
+            local.active = True
+            started = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except ValueError:
+                if op == OP_SESSION:
+                    names.insert(1, "")
+                if op == OP_CHECK_BATCH:
+                    tail = bytes([ERROR]) * (len(names) // 2)
+                self._record(op, ERROR, names, tail, started)
+                raise
+            finally:
+                local.active = False
+            if op == OP_SESSION:
+                names.insert(1, result.session_id)
+            elif op == OP_CHECK_BATCH:
+                tail = _batch_outcomes(result)
+            self._record(op, GRANTED if op == OP_CHECK and result else DENIED, names, tail, started)
+            return result
+
+        return recorded
+
+    def _record(self, op: int, outcome: int, names: list[str], tail: bytes, started: float) -> None:
+        with self._lock:
+            if self.writer is not None:
+                self.writer.write(op, outcome, names, tail, started)
@@ -0,0 +1,19 @@
+"""
+Python SDK for the RBAC API.
+
+    from rbac.client import RBACClient
+
+    with RBACClient("http://rbac.internal:8000") as rbac:
+        if rbac.check("alice", "doc:read"):
+            ...
+
+`AsyncRBACClient` offers the same calls as coroutines. Both batch concurrent
+permission checks into binary `/fast/check-batch` requests, coalesce identical
+in-flight checks and keep a bounded TTL cache of decisions.
+"""
+from .aio import AsyncRBACClient
+from .base import ClientStats
+from .cache import DecisionCache
+from .sync import RBACClient
+
+__all__ = ["AsyncRBACClient", "ClientStats", "DecisionCache", "RBACClient"]
@@ -0,0 +1,149 @@
+"""asyncio client."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+import httpx
+
+from rbac.client.base import (
+    BATCH_HEADERS, ClientStats, assignment_body, batch_results, limits, raise_for_status,
+)
+from rbac.client.cache import MISS, DecisionCache
+from rbac.codec import encode_checks
+
+
+class AsyncRBACClient:
+    """
+    asyncio counterpart of `RBACClient` over a pooled `httpx.AsyncClient`.
+
+    Cache misses are queued; a background task sends the queue as one binary
+    `/fast/check-batch` request once `batch_window` seconds have passed or
+    `max_batch` checks are waiting. Identical checks share one future, so
+    concurrent callers asking the same question cause one lookup.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:8000",
+        prefix: str = "/rbac",
+        cache_ttl: float = 5.0,
+        cache_size: int = 10_000,
+        batch_window: float = 0.002,
+        max_batch: int = 256,
+        timeout: float = 5.0,
+        max_connections: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        headers: Optional[dict[str, str]] = None,
+    ):
+        self.prefix = prefix
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.cache = DecisionCache(cache_size, cache_ttl)
+        self.stats = ClientStats()
+        self._http = httpx.AsyncClient(
+            base_url=base_url, timeout=timeout, limits=limits(max_connections),
+            transport=transport, headers=headers,
+        )
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self._pending: list[tuple[str, str]] = []
+        self._full = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+
+    # --- Decisions ---
+
+    async def check(self, username: str, permission: str) -> Optional[bool]:
+        """Whether `username` holds `permission`; None if either is unknown to the server."""
+        key = (username, permission)
+        decision = self.cache.get(key)
+        self.stats.checks += 1
+        if decision is not MISS:
+            return decision
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+        else:
+            future = self._inflight[key] = asyncio.get_running_loop().create_future()
+            self._pending.append(key)
+            if len(self._pending) == 1:
+                self._full.clear()
+                self._spawn(self._flush_after_window())
+            if len(self._pending) >= self.max_batch:
+                self._full.set()
+        return await asyncio.shield(future)
+
+    async def check_many(self, checks: list[tuple[str, str]]) -> list[Optional[bool]]:
+        """Checks many pairs concurrently; they share batches with any other pending checks."""
+        return list(await asyncio.gather(*(self.check(username, permission) for username, permission in checks)))
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_after_window(self) -> None:
+        if self.batch_window > 0 and not self._full.is_set():
+            try:
+                await asyncio.wait_for(self._full.wait(), self.batch_window)
+            except asyncio.TimeoutError:
+                pass
+        batch, self._pending = self._pending, []
+        for start in range(0, len(batch), self.max_batch):
+            await self._send(batch[start:start + self.max_batch])
+
+    async def _send(self, keys: list[tuple[str, str]]) -> None:
+        # Answers for users invalidated while the request is in flight are not cached.
+        generations = [self.cache.generation(username) for username, _ in keys]
+        try:
+            response = await self._http.post(
+                f"{self.prefix}/fast/check-batch", content=encode_checks(keys), headers=BATCH_HEADERS
+            )
+            results = batch_results(response, len(keys))
+        except Exception as e:
+            for key in keys:
+                future = self._inflight.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.stats.batches += 1
+        self.stats.checks_sent += len(keys)
+        for key, result, generation in zip(keys, results, generations):
+            self.cache.put(key, result, generation)
+            future = self._inflight.pop(key)
+            if not future.done():
+                future.set_result(result)
+
+    # --- Other routes ---
+
+    async def user_permissions(self, username: str) -> set[str]:
+        """Returns the user's effective permissions."""
+        response = await self._http.get(f"{self.prefix}/users/{username}/permissions")
+        raise_for_status(response)
+        return set(response.json())
+
+    async def assign_role(self, username: str, role: str, expires_at: Optional[datetime] = None) -> None:
+        """Assigns a role and drops the user's cached decisions. Raises ValueError if the server rejects it."""
+        response = await self._http.post(
+            f"{self.prefix}/assign-role", json=assignment_body(username, role, expires_at)
+        )
+        self.cache.invalidate(username)
+        raise_for_status(response)
+
+    async def revoke_role(self, username: str, role: str) -> None:
+        """Revokes a role and drops the user's cached decisions."""
+        response = await self._http.delete(f"{self.prefix}/users/{username}/roles/{role}")
+        self.cache.invalidate(username)
+        raise_for_status(response)
+
+    async def aclose(self) -> None:
+        """Waits for queued checks to be sent, then closes the connection pool."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await self._http.aclose()
+
+    async def __aenter__(self) -> AsyncRBACClient:
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
@@ -0,0 +1,52 @@
+"""Pieces shared by the sync and async clients."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import httpx
+
+from rbac.codec import BATCH_CONTENT_TYPE, decode_results, loads
+
+BATCH_HEADERS = {"content-type": BATCH_CONTENT_TYPE, "accept": BATCH_CONTENT_TYPE}
+
+
+@dataclass
+class ClientStats:
+    """Counters describing how checks were answered."""
+    checks: int = 0
+    coalesced: int = 0
+    batches: int = 0
+    checks_sent: int = 0
+
+
+def batch_results(response: httpx.Response, expected: int) -> list[Optional[bool]]:
+    """Decodes a binary batch response, raising for error statuses and size mismatches."""
+    raise_for_status(response)
+    results = decode_results(response.content)
+    if len(results) != expected:
+        raise ValueError(f"Expected {expected} results, got {len(results)}")
+    return results
+
+
+def raise_for_status(response: httpx.Response) -> None:
+    """Raises ValueError with the server's detail for 4xx responses, and httpx errors for 5xx."""
+    if 400 <= response.status_code < 500:
+        try:
+            detail = loads(response.content).get("detail", response.text)
+        except (ValueError, AttributeError):
+            detail = response.text
+        raise ValueError(str(detail))
+    response.raise_for_status()
+
+
+def assignment_body(username: str, role: str, expires_at: Optional[datetime]) -> dict:
+    body = {"username": username, "role": role}
+    if expires_at is not None:
+        body["expires_at"] = expires_at.isoformat()
+    return body
+
+
+def limits(max_connections: int) -> httpx.Limits:
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
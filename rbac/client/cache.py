@@ -0,0 +1,76 @@
+"""Bounded TTL cache for permission decisions."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+MISS = object()
+
+
+class DecisionCache:
+    """
+    LRU map of (username, permission) to a decision (True, False, or None for
+    unknown names) that expires `ttl` seconds after it was stored. Safe to share
+    between threads.
+
+    Each user has a generation that changes when their decisions are
+    invalidated. A caller that read `generation(username)` before asking the
+    server passes it to `put`, and the answer is dropped if it is out of date.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Optional[bool]]] = OrderedDict()
+        self._epoch = 0
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str]):
+        """Returns the cached decision, or `MISS` if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return MISS
+
+    def generation(self, username: str) -> int:
+        """A number that grows each time `username`'s decisions (or all decisions) are invalidated."""
+        with self._lock:
+            return self._epoch + self._generations.get(username, 0)
+
+    def put(self, key: tuple[str, str], decision: Optional[bool], generation: Optional[int] = None) -> None:
+        """Stores a decision, unless `generation` is given and the user has been invalidated since."""
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._epoch + self._generations.get(key[0], 0):
+                return
+            self._entries[key] = (self.clock() + self.ttl, decision)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        """Drops every decision, or only those about `username`."""
+        with self._lock:
+            if username is None:
+                self._epoch += 1
+                self._entries.clear()
+                return
+            self._generations[username] = self._generations.get(username, 0) + 1
+            for key in [key for key in self._entries if key[0] == username]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
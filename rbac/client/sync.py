@@ -0,0 +1,184 @@
+"""Thread-safe blocking client."""
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Optional
+
+import httpx
+
+from rbac.client.base import (
+    BATCH_HEADERS, ClientStats, assignment_body, batch_results, limits, raise_for_status,
+)
+from rbac.client.cache import MISS, DecisionCache
+from rbac.codec import encode_checks
+
+
+class _Waiter:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Optional[bool] = None
+        self.error: Optional[BaseException] = None
+
+    def resolve(self, value: Optional[bool]) -> None:
+        self.value = value
+        self.event.set()
+
+    def fail(self, error: BaseException) -> None:
+        self.error = error
+        self.event.set()
+
+    def result(self, timeout: Optional[float]) -> Optional[bool]:
+        if not self.event.wait(timeout):
+            raise TimeoutError("Timed out waiting for a batched permission check")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class RBACClient:
+    """
+    Blocking client for the RBAC API over a pooled `httpx.Client`.
+
+    `check` answers from a local TTL cache when it can. Otherwise the first
+    caller of a new batch waits up to `batch_window` seconds (or until
+    `max_batch` checks are queued) for other threads, then sends every queued
+    check in one binary `/fast/check-batch` request. Threads asking for a check
+    that is already queued or in flight wait for that answer instead of sending
+    their own. Decisions are True, False, or None for an unknown user or permission.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:8000",
+        prefix: str = "/rbac",
+        cache_ttl: float = 5.0,
+        cache_size: int = 10_000,
+        batch_window: float = 0.002,
+        max_batch: int = 256,
+        timeout: float = 5.0,
+        max_connections: int = 20,
+        transport: Optional[httpx.BaseTransport] = None,
+        headers: Optional[dict[str, str]] = None,
+    ):
+        self.prefix = prefix
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.cache = DecisionCache(cache_size, cache_ttl)
+        self.stats = ClientStats()
+        self._http = httpx.Client(
+            base_url=base_url, timeout=timeout, limits=limits(max_connections),
+            transport=transport, headers=headers,
+        )
+        self._lock = threading.Lock()
+        self._inflight: dict[tuple[str, str], _Waiter] = {}
+        self._pending: list[tuple[str, str]] = []
+        self._full = threading.Event()
+
+    # --- Decisions ---
+
+    def check(self, username: str, permission: str) -> Optional[bool]:
+        """Whether `username` holds `permission`; None if either is unknown to the server."""
+        key = (username, permission)
+        decision = self.cache.get(key)
+        self.stats.checks += 1
+        if decision is not MISS:
+            return decision
+        leader = False
+        with self._lock:
+            waiter = self._inflight.get(key)
+            if waiter is not None:
+                self.stats.coalesced += 1
+            else:
+                waiter = self._inflight[key] = _Waiter()
+                self._pending.append(key)
+                if len(self._pending) == 1:
+                    leader = True
+                    self._full.clear()
+                if len(self._pending) >= self.max_batch:
+                    self._full.set()
+        if leader:
+            if self.batch_window > 0:
+                self._full.wait(self.batch_window)
+            with self._lock:
+                batch, self._pending = self._pending, []
+            self._send(batch)
+        return waiter.result(self.timeout)
+
+    def check_many(self, checks: list[tuple[str, str]]) -> list[Optional[bool]]:
+        """Checks many pairs without waiting for a batch window: cache misses are sent right away."""
+        results: list = [self.cache.get(key) for key in checks]
+        self.stats.checks += len(checks)
+        waiters: dict[int, _Waiter] = {}
+        to_send = []
+        with self._lock:
+            for i, key in enumerate(checks):
+                if results[i] is not MISS:
+                    continue
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    waiter = self._inflight[key] = _Waiter()
+                    to_send.append(key)
+                else:
+                    self.stats.coalesced += 1
+                waiters[i] = waiter
+        for start in range(0, len(to_send), self.max_batch):
+            self._send(to_send[start:start + self.max_batch])
+        for i, waiter in waiters.items():
+            results[i] = waiter.result(self.timeout)
+        return results
+
+    def _send(self, keys: list[tuple[str, str]]) -> None:
+        # Answers for users invalidated while the request is in flight are not cached.
+        generations = [self.cache.generation(username) for username, _ in keys]
+        try:
+            response = self._http.post(
+                f"{self.prefix}/fast/check-batch", content=encode_checks(keys), headers=BATCH_HEADERS
+            )
+            results = batch_results(response, len(keys))
+        except Exception as e:
+            with self._lock:
+                waiters = [self._inflight.pop(key) for key in keys]
+            for waiter in waiters:
+                waiter.fail(e)
+            return
+        self.stats.batches += 1
+        self.stats.checks_sent += len(keys)
+        for key, result, generation in zip(keys, results, generations):
+            self.cache.put(key, result, generation)
+        with self._lock:
+            waiters = [self._inflight.pop(key) for key in keys]
+        for waiter, result in zip(waiters, results):
+            waiter.resolve(result)
+
+    # --- Other routes ---
+
+    def user_permissions(self, username: str) -> set[str]:
+        """Returns the user's effective permissions."""
+        response = self._http.get(f"{self.prefix}/users/{username}/permissions")
+        raise_for_status(response)
+        return set(response.json())
+
+    def assign_role(self, username: str, role: str, expires_at: Optional[datetime] = None) -> None:
+        """Assigns a role and drops the user's cached decisions. Raises ValueError if the server rejects it."""
+        response = self._http.post(f"{self.prefix}/assign-role", json=assignment_body(username, role, expires_at))
+        self.cache.invalidate(username)
+        raise_for_status(response)
+
+    def revoke_role(self, username: str, role: str) -> None:
+        """Revokes a role and drops the user's cached decisions."""
+        response = self._http.delete(f"{self.prefix}/users/{username}/roles/{role}")
+        self.cache.invalidate(username)
+        raise_for_status(response)
+
+    def close(self) -> None:
+        self._http.close()
+
+    def __enter__(self) -> RBACClient:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,98 @@
+"""
+Compact encodings for permission-check traffic between services.
+
+Binary batch request (content type `application/x-rbac-batch`):
+
+    <u32 count> then per check: <u16 len><username utf-8> <u16 len><permission utf-8>
+
+Binary batch response:
+
+    <u32 count> then one byte per check: 0 = denied, 1 = granted, 2 = unknown user or permission
+
+JSON bodies are handled with orjson when it is installed and the stdlib otherwise.
+"""
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    orjson = None
+
+BATCH_CONTENT_TYPE = "application/x-rbac-batch"
+
+DENIED = 0
+GRANTED = 1
+UNKNOWN = 2
+
+_COUNT = struct.Struct("<I")
+_LEN = struct.Struct("<H")
+
+
+def dumps(value: Any) -> bytes:
+    """Serializes `value` to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Parses JSON bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_checks(checks: list[tuple[str, str]]) -> bytes:
+    """Encodes (username, permission) pairs as a binary batch request."""
+    parts = [_COUNT.pack(len(checks))]
+    for username, permission in checks:
+        for value in (username, permission):
+            data = value.encode("utf-8")
+            if len(data) > 0xFFFF:
+                raise ValueError(f"Name too long to encode: {value[:32]!r}...")
+            parts.append(_LEN.pack(len(data)))
+            parts.append(data)
+    return b"".join(parts)
+
+
+def decode_checks(data: bytes) -> list[tuple[str, str]]:
+    """Decodes a binary batch request. Raises ValueError if it is malformed."""
+    try:
+        (count,) = _COUNT.unpack_from(data, 0)
+        offset = _COUNT.size
+        checks = []
+        for _ in range(count):
+            names = []
+            for _ in range(2):
+                (size,) = _LEN.unpack_from(data, offset)
+                offset += _LEN.size
+                if offset + size > len(data):
+                    raise ValueError("Truncated batch")
+                names.append(data[offset:offset + size].decode("utf-8"))
+                offset += size
+            checks.append((names[0], names[1]))
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed batch: {e}") from e
+    if offset != len(data):
+        raise ValueError("Trailing bytes after batch")
+    return checks
+
+
+def encode_results(results: list[Optional[bool]]) -> bytes:
+    """Encodes batch results; None marks an unknown user or permission."""
+    return _COUNT.pack(len(results)) + bytes(
+        UNKNOWN if result is None else GRANTED if result else DENIED for result in results
+    )
+
+
+def decode_results(data: bytes) -> list[Optional[bool]]:
+    """Decodes a binary batch response."""
+    (count,) = _COUNT.unpack_from(data, 0)
+    body = data[_COUNT.size:_COUNT.size + count]
+    if len(body) != count:
+        raise ValueError("Truncated batch response")
+    return [None if code == UNKNOWN else code == GRANTED for code in body]
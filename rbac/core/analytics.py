@@ -0,0 +1,104 @@
+"""
+Bulk "who can do what" reporting.
+
+The effective user-by-permission matrix is derived from a `CompiledPolicy`: role
+masks already fold in the ancestor closure, and users with identical role sets
+share one row. Each distinct row is decoded to permission names once and then
+streamed for all of its users, either as CSV text chunks or as columnar chunks.
+"""
+from __future__ import annotations
+
+from typing import Iterator
+
+from rbac.core.compiled import CompiledPolicy
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _csv_field(value: str) -> str:
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+class PermissionMatrix:
+    """Effective permissions of every user, backed by a compiled policy."""
+
+    def __init__(self, policy: CompiledPolicy):
+        self.policy = policy
+        self._names = sorted(policy.permission_index, key=policy.permission_index.get)
+        self._decoded: dict[int, list[str]] = {}
+
+    def _row(self, group: int) -> list[str]:
+        row = self._decoded.get(group)
+        if row is None:
+            row = [self._names[bit] for bit in _bits(self.policy.group_masks[group])]
+            self._decoded[group] = row
+        return row
+
+    def permissions_of(self, username: str) -> list[str]:
+        """Returns the concrete permissions a user holds, or [] for unknown users."""
+        group = self.policy.user_groups.get(username)
+        return [] if group is None else list(self._row(group))
+
+    def iter_rows(self) -> Iterator[tuple[str, list[str]]]:
+        """Yields (username, permissions) for every user, sorted by username."""
+        user_groups = self.policy.user_groups
+        for username in sorted(user_groups):
+            yield username, self._row(user_groups[username])
+
+    def user_counts(self) -> dict[str, int]:
+        """Returns how many users hold each permission."""
+        counts = dict.fromkeys(self._names, 0)
+        members: dict[int, int] = {}
+        for group in self.policy.user_groups.values():
+            members[group] = members.get(group, 0) + 1
+        for group, size in members.items():
+            for name in self._row(group):
+                counts[name] += size
+        return counts
+
+    def iter_csv(self, chunk_rows: int = 10_000) -> Iterator[str]:
+        """
+        Yields CSV text in chunks of about `chunk_rows` (username, permission) lines.
+        Each user's lines are produced with one join over pre-escaped names.
+        """
+        escaped: dict[int, list[str]] = {}
+        user_groups = self.policy.user_groups
+        parts = ["username,permission\n"]
+        pending = 0
+        for username in sorted(user_groups):
+            group = user_groups[username]
+            names = escaped.get(group)
+            if names is None:
+                names = escaped[group] = [_csv_field(name) for name in self._row(group)]
+            if not names:
+                continue
+            user = _csv_field(username)
+            parts.append(f"{user}," + f"\n{user},".join(names) + "\n")
+            pending += len(names)
+            if pending >= chunk_rows:
+                yield "".join(parts)
+                parts = []
+                pending = 0
+        if parts:
+            yield "".join(parts)
+
+    def iter_columns(self, chunk_rows: int = 65_536) -> Iterator[dict[str, list[str]]]:
+        """Yields column chunks {"username": [...], "permission": [...]} of up to `chunk_rows` rows."""
+        usernames: list[str] = []
+        permissions: list[str] = []
+        for username, names in self.iter_rows():
+            for name in names:
+                usernames.append(username)
+                permissions.append(name)
+                if len(usernames) >= chunk_rows:
+                    yield {"username": usernames, "permission": permissions}
+                    usernames, permissions = [], []
+        if usernames:
+            yield {"username": usernames, "permission": permissions}
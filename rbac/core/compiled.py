@@ -0,0 +1,159 @@
+"""
+Read-optimized snapshot of the RBAC policy.
+
+Every registered concrete permission gets a bit index. Each role is compiled to an
+integer bitmask of its effective permissions (inherited and wildcard grants
+included), and users who hold the same set of roles share one role group whose
+mask is the OR of its roles' masks. A check is then two dict lookups and a bit test.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from rbac.matching import PermissionTrie, is_pattern
+from rbac.models import Role
+from rbac.storage import AbstractStorage
+
+
+@dataclass
+class CompileStats:
+    """Figures reported after compiling a policy."""
+    compile_seconds: float
+    memory_bytes: int
+    users: int
+    role_groups: int
+    roles: int
+    permissions: int
+
+
+class CompiledPolicy:
+    """
+    Frozen decision table built from a storage snapshot.
+    `version` is the manager's revision (bumped on every policy change) at build
+    time, and `role_generation` the storage's `RoleGeneration.value`.
+    """
+
+    def __init__(self, version: int):
+        self.version = version
+        self.role_generation = 0
+        self.permission_index: dict[str, int] = {}
+        self.role_masks: dict[str, int] = {}
+        self.group_index: dict[frozenset[str], int] = {}
+        self.group_masks: list[int] = []
+        self.user_groups: dict[str, int] = {}
+        self.stats: Optional[CompileStats] = None
+
+    @classmethod
+    def build(cls, storage: AbstractStorage, version: int) -> CompiledPolicy:
+        """Compiles users, roles and permissions currently held by `storage`."""
+        started = time.perf_counter()
+        policy = cls(version)
+        if storage.role_generation is not None:
+            policy.role_generation = storage.role_generation.value
+
+        names = sorted(p.name for p in storage.get_all_permissions() if not is_pattern(p.name))
+        policy.permission_index = {name: bit for bit, name in enumerate(names)}
+
+        for role in storage.get_all_roles():
+            policy._effective_mask(role)
+
+        for user in storage.get_all_users():
+            policy.assign_user(user.username, {role.name for role in user.roles})
+
+        policy.stats = CompileStats(
+            compile_seconds=time.perf_counter() - started,
+            memory_bytes=policy.memory_bytes(),
+            users=len(policy.user_groups),
+            role_groups=len(policy.group_masks),
+            roles=len(policy.role_masks),
+            permissions=len(policy.permission_index),
+        )
+        return policy
+
+    def _direct_mask(self, role: Role) -> int:
+        mask = 0
+        patterns = []
+        for permission in role.permissions:
+            bit = self.permission_index.get(permission.name)
+            if bit is not None:
+                mask |= 1 << bit
+            elif is_pattern(permission.name):
+                patterns.append(permission.name)
+        if patterns:
+            matcher = PermissionTrie(patterns)
+            for name, bit in self.permission_index.items():
+                if matcher.matches(name):
+                    mask |= 1 << bit
+        return mask
+
+    def _effective_mask(self, role: Role) -> int:
+        """
+        Computes the role's mask as the OR of direct masks over its ancestor
+        closure, memoizing every role visited into `role_masks`.
+        """
+        stack = [role]
+        while stack:
+            current = stack[-1]
+            if current.name in self.role_masks:
+                stack.pop()
+                continue
+            pending = [p for p in current.parents if p.name not in self.role_masks]
+            if pending:
+                stack.extend(pending)
+                continue
+            mask = self._direct_mask(current)
+            for parent in current.parents:
+                mask |= self.role_masks[parent.name]
+            self.role_masks[current.name] = mask
+            stack.pop()
+        return self.role_masks[role.name]
+
+    def assign_user(self, username: str, role_names: set[str]) -> bool:
+        """
+        Points `username` at the group for `role_names`, creating it if needed.
+        Returns False if a role is unknown to this snapshot and a rebuild is required.
+        """
+        key = frozenset(role_names)
+        group = self.group_index.get(key)
+        if group is None:
+            mask = 0
+            for name in key:
+                role_mask = self.role_masks.get(name)
+                if role_mask is None:
+                    return False
+                mask |= role_mask
+            group = len(self.group_masks)
+            self.group_masks.append(mask)
+            self.group_index[key] = group
+        self.user_groups[username] = group
+        return True
+
+    def lookup(self, username: str, perm_name: str) -> Optional[bool]:
+        """
+        Returns the decision, or None if the user or permission is not covered by
+        this snapshot (unknown names, or concrete names only reachable by pattern).
+        """
+        group = self.user_groups.get(username)
+        bit = self.permission_index.get(perm_name)
+        if group is None or bit is None:
+            return None
+        return bool(self.group_masks[group] >> bit & 1)
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the decision structures in bytes."""
+        total = sys.getsizeof(self.permission_index) + sys.getsizeof(self.role_masks)
+        total += sys.getsizeof(self.group_index) + sys.getsizeof(self.group_masks)
+        total += sys.getsizeof(self.user_groups)
+        total += sum(sys.getsizeof(mask) for mask in self.role_masks.values())
+        total += sum(sys.getsizeof(mask) for mask in self.group_masks)
+        total += sum(sys.getsizeof(key) for key in self.group_index)
+        return total
+
+    def __repr__(self) -> str:
+        return (
+            f"<CompiledPolicy version={self.version} users={len(self.user_groups)} "
+            f"groups={len(self.group_masks)} permissions={len(self.permission_index)}>"
+        )
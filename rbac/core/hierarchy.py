@@ -0,0 +1,164 @@
+"""
+Precomputed role-hierarchy data.
+
+`RoleHierarchy` memoizes, per role, the breadth-first closure over `Role.parents`
+(each ancestor with its distance and predecessor) and indexes which roles grant a
+permission directly. It is a snapshot: rebuild it when roles change.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable, Optional
+
+from rbac.matching import PermissionTrie, is_pattern
+from rbac.models import Role
+
+
+class RoleHierarchy:
+    """Closure and grant index over a set of roles."""
+
+    def __init__(self, roles: Iterable[Role]):
+        self._roles: dict[str, Role] = {}
+        self._closures: dict[str, dict[str, int]] = {}
+        self._predecessors: dict[str, dict[str, str]] = {}
+        self._direct: dict[str, PermissionTrie] = {}
+        self._patterns: dict[str, list[str]] = {}
+        self._exact_holders: dict[str, set[str]] = {}
+        self._pattern_holders: set[str] = set()
+        self._children: Optional[dict[str, list[str]]] = None
+        for role in roles:
+            self._index(role)
+
+    def _index(self, role: Role) -> None:
+        if role.name in self._roles:
+            return
+        self._roles[role.name] = role
+        names = sorted(p.name for p in role.permissions)
+        self._direct[role.name] = PermissionTrie(names)
+        for name in names:
+            if is_pattern(name):
+                self._pattern_holders.add(role.name)
+                self._patterns.setdefault(role.name, []).append(name)
+            else:
+                self._exact_holders.setdefault(name, set()).add(role.name)
+
+    def ancestors(self, role: Role) -> dict[str, int]:
+        """
+        Returns every role reachable from `role` through parents, including the
+        role itself at distance 0, mapped to its shortest distance.
+        """
+        closure = self._closures.get(role.name)
+        if closure is not None:
+            return closure
+
+        self._index(role)
+        closure = {role.name: 0}
+        predecessors: dict[str, str] = {}
+        queue = deque([role])
+        while queue:
+            current = queue.popleft()
+            distance = closure[current.name] + 1
+            for parent in sorted(current.parents, key=lambda r: r.name):
+                if parent.name not in closure:
+                    self._index(parent)
+                    closure[parent.name] = distance
+                    predecessors[parent.name] = current.name
+                    queue.append(parent)
+        self._closures[role.name] = closure
+        self._predecessors[role.name] = predecessors
+        return closure
+
+    def path(self, role: Role, ancestor: str) -> list[str]:
+        """Returns the shortest role path from `role` to `ancestor`, both inclusive."""
+        if ancestor not in self.ancestors(role):
+            return []
+        predecessors = self._predecessors[role.name]
+        path = [ancestor]
+        while path[-1] != role.name:
+            path.append(predecessors[path[-1]])
+        path.reverse()
+        return path
+
+    def direct_grant(self, role_name: str, permission_name: str) -> Optional[str]:
+        """
+        Returns the grant on the role itself (not its ancestors) that covers the
+        permission: the name itself or the first matching pattern. None if none does.
+        """
+        matcher = self._direct.get(role_name)
+        if matcher is None or not matcher.matches(permission_name):
+            return None
+        if role_name in self._exact_holders.get(permission_name, ()):
+            return permission_name
+        return next(
+            pattern for pattern in self._patterns[role_name]
+            if PermissionTrie([pattern]).matches(permission_name)
+        )
+
+    def holders(self, permission_name: str) -> list[str]:
+        """Returns the names of all indexed roles that grant the permission directly."""
+        names = set(self._exact_holders.get(permission_name, ()))
+        names.update(r for r in self._pattern_holders if self._direct[r].matches(permission_name))
+        return sorted(names)
+
+    def hops(self, sources: Iterable[str]) -> dict[str, int]:
+        """
+        Returns, for every role connected to one of `sources`, the fewest parent
+        links between them, followed in either direction (0 for the sources).
+        """
+        if self._children is None:
+            self._children = {}
+            for role in list(self._roles.values()):
+                for parent in role.parents:
+                    self._children.setdefault(parent.name, []).append(role.name)
+        distances = {name: 0 for name in sources if name in self._roles}
+        queue = deque(distances)
+        while queue:
+            name = queue.popleft()
+            role = self._roles[name]
+            for neighbour in [*(p.name for p in role.parents), *self._children.get(name, ())]:
+                if neighbour not in distances and neighbour in self._roles:
+                    distances[neighbour] = distances[name] + 1
+                    queue.append(neighbour)
+        return distances
+
+    def role(self, name: str) -> Optional[Role]:
+        """Returns an indexed role by name."""
+        return self._roles.get(name)
+
+
+def _parents_generation(storage) -> int:
+    generation = storage.role_generation
+    return generation.parents if generation is not None else 0
+
+
+class ConstrainedClosure:
+    """
+    Maps a role name to the roles it stands for under a constraint engine: the
+    role and its ancestors, keeping only those that belong to at least one of
+    the engine's sets. Closures are memoized and remain valid until parent links
+    or the engine's sets change (see `is_current`).
+    """
+
+    def __init__(self, storage, engine):
+        self.storage = storage
+        self.engine = engine
+        self.version = engine.version
+        self.parents_generation = _parents_generation(storage)
+        self._hierarchy = RoleHierarchy(())
+        self._closures: dict[str, tuple[str, ...]] = {}
+
+    def is_current(self) -> bool:
+        return (
+            self.version is not None
+            and self.version == self.engine.version
+            and self.parents_generation == _parents_generation(self.storage)
+        )
+
+    def __call__(self, role_name: str) -> tuple[str, ...]:
+        closure = self._closures.get(role_name)
+        if closure is None:
+            role = self.storage.get_role(role_name)
+            names = self._hierarchy.ancestors(role) if role is not None else (role_name,)
+            closure = tuple(name for name in names if self.engine.sets_for_role(name))
+            self._closures[role_name] = closure
+        return closure
@@ -0,0 +1,207 @@
+"""
+Background jobs for heavy, read-only policy computations.
+
+`JobRunner.submit` encodes a snapshot of the manager's storage and constraint
+engines (the journal record format) and hands it to a process pool, so the
+work runs outside the API worker's GIL and decisions keep their latency. Each
+worker rebuilds an `RBACManager` from the snapshot and runs one operation:
+
+- `audit`: SSD/DSD violations (`RBACManager.audit_constraints`, users only),
+- `lint`: the redundancy report of `RBACManager.lint`,
+- `permission_report`: the effective user-by-permission CSV,
+- `policy_diff`: the changes `reconcile(params["document"], prune=...)` would make.
+
+Workers report coarse progress through a queue; results are plain
+JSON-compatible values. Jobs see the policy as of submission.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional
+
+from rbac.storage.journal import encode_state, load_state
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_progress_queue = None
+
+
+@dataclass
+class Job:
+    """State of one submitted job."""
+    job_id: str
+    kind: str
+    policy_version: int
+    status: str = QUEUED
+    progress: float = 0.0
+    submitted_at: float = 0.0
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+
+# --- Worker side ---
+
+def _init_worker(progress_queue) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _report(job_id: str, progress: float) -> None:
+    if _progress_queue is not None:
+        _progress_queue.put((job_id, progress))
+
+
+def _audit(manager, params: dict) -> dict:
+    return asdict(manager.audit_constraints())
+
+
+def _lint(manager, params: dict) -> dict:
+    report = manager.lint()
+    return {**asdict(report), "traversal_saved": report.traversal_saved}
+
+
+def _permission_report(manager, params: dict) -> str:
+    return "".join(manager.permission_matrix().iter_csv())
+
+
+def _policy_diff(manager, params: dict) -> dict:
+    diff = manager.reconcile(params["document"], dry_run=True, prune=params.get("prune", False))
+    return {**asdict(diff), "change_count": diff.change_count}
+
+
+OPERATIONS: dict[str, Callable[[Any, dict], Any]] = {
+    "audit": _audit,
+    "lint": _lint,
+    "permission_report": _permission_report,
+    "policy_diff": _policy_diff,
+}
+
+
+def run_job(job_id: str, kind: str, snapshot: bytes, params: dict) -> Any:
+    """Rebuilds the policy from `snapshot` and runs operation `kind` on it. Executed in a worker process."""
+    from rbac.core.manager import RBACManager
+
+    _report(job_id, 0.05)
+    storage, ssd, dsd = load_state(snapshot)
+    manager = RBACManager(storage, ssd_constraint=ssd, dsd_constraint=dsd)
+    _report(job_id, 0.3)
+    result = OPERATIONS[kind](manager, params)
+    _report(job_id, 0.95)
+    return result
+
+
+# --- Parent side ---
+
+class JobRunner:
+    """
+    Submits jobs to a process pool and tracks them by ID. The pool, using the
+    spawn start method, is created on the first submission; at most
+    `max_jobs` jobs are remembered, oldest finished first.
+    """
+
+    def __init__(self, manager, max_workers: int = 2, max_jobs: int = 100):
+        self.manager = manager
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.jobs: dict[str, Job] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._progress = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            self._progress = context.Queue()
+            self._executor = ProcessPoolExecutor(
+                self.max_workers, mp_context=context, initializer=_init_worker, initargs=(self._progress,),
+            )
+        return self._executor
+
+    def submit(self, kind: str, params: Optional[dict] = None) -> Job:
+        """Queues operation `kind` against a snapshot of the current policy. Raises ValueError for unknown kinds."""
+        if kind not in OPERATIONS:
+            raise ValueError(f"Unknown job kind '{kind}', expected one of {sorted(OPERATIONS)}")
+        manager = self.manager
+        snapshot = encode_state(manager.storage, manager.ssd, manager.dsd)
+        job = Job(uuid.uuid4().hex, kind, manager.policy_version, submitted_at=time.time())
+        with self._lock:
+            future = self._pool().submit(run_job, job.job_id, kind, snapshot, params or {})
+            self.jobs[job.job_id] = job
+            self._evict()
+        future.add_done_callback(lambda f: self._finished(job, f))
+        logger.info("Job %s (%s) submitted at policy version %d, snapshot %d bytes",
+                    job.job_id, kind, job.policy_version, len(snapshot))
+        return job
+
+    def _finished(self, job: Job, future: Future) -> None:
+        error = CancelledError("cancelled at shutdown") if future.cancelled() else future.exception()
+        if error is None:
+            job.result = future.result()
+            job.status = SUCCEEDED
+        else:
+            job.error = f"{type(error).__name__}: {error}"
+            job.status = FAILED
+            logger.error("Job %s (%s) failed: %s", job.job_id, job.kind, job.error)
+        job.progress = 1.0
+        job.finished_at = time.time()
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(len(self.jobs) - self.max_jobs, 0)]:
+            del self.jobs[job_id]
+
+    def _drain_progress(self) -> None:
+        if self._progress is None:
+            return
+        while True:
+            try:
+                job_id, progress = self._progress.get_nowait()
+            except queue.Empty:
+                return
+            job = self.jobs.get(job_id)
+            if job is not None and not job.done:
+                job.status = RUNNING
+                job.progress = max(job.progress, progress)
+
+    def get(self, job_id: str) -> Job:
+        """Returns a job with current progress. Raises ValueError if it is unknown."""
+        self._drain_progress()
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise ValueError(f"Job '{job_id}' not found.")
+        return job
+
+    def list(self) -> list[Job]:
+        self._drain_progress()
+        return list(self.jobs.values())
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Job:
+        """Blocks until the job finishes or `timeout` passes, then returns it."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        job = self.get(job_id)
+        while not job.done and (deadline is None or time.monotonic() < deadline):
+            time.sleep(0.01)
+        return self.get(job_id)
+
+    def shutdown(self) -> None:
+        """Stops the pool, cancelling queued jobs."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
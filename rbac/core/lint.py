@@ -0,0 +1,124 @@
+"""
+Policy lint based on the transitive reduction of the role hierarchy.
+
+Finds, in bulk:
+
+- parent links implied by another parent (edges outside the transitive reduction),
+- permissions granted directly to a role that already inherits them (a pattern
+  only when an inherited pattern covers everything it matches),
+- users assigned both a role and one of its ancestors (the role held permanently).
+
+Traversal cost is the work `Role.get_all_permissions` does for every assigned role
+of every user: one step per parent link and per direct grant across the closure.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from rbac.core.hierarchy import RoleHierarchy
+from rbac.matching import is_pattern, subsumes
+from rbac.models import Role
+from rbac.storage import AbstractStorage
+
+
+@dataclass
+class LintReport:
+    """Redundant edges found in a policy and the traversal work they cost."""
+    redundant_parents: list[tuple[str, str]] = field(default_factory=list)
+    redundant_grants: list[tuple[str, str]] = field(default_factory=list)
+    redundant_assignments: list[tuple[str, str]] = field(default_factory=list)
+    traversal_cost_before: int = 0
+    traversal_cost_after: int = 0
+    applied: bool = False
+
+    @property
+    def traversal_saved(self) -> int:
+        return self.traversal_cost_before - self.traversal_cost_after
+
+
+def _inherited(permission_name: str, parents: list[Role]) -> bool:
+    """Whether a parent grants `permission_name`; a pattern must be covered by a parent's pattern as a whole."""
+    if not is_pattern(permission_name):
+        return any(parent.grants(permission_name) for parent in parents)
+    return any(
+        subsumes(granted.name, permission_name)
+        for parent in parents
+        for granted in parent.get_all_permissions()
+    )
+
+
+def lint_policy(storage: AbstractStorage) -> LintReport:
+    """Computes a lint report for every user and role in `storage` without changing it."""
+    roles = storage.get_all_roles()
+    hierarchy = RoleHierarchy(roles)
+    report = LintReport()
+
+    for role in sorted(roles, key=lambda r: r.name):
+        parents = sorted(role.parents, key=lambda r: r.name)
+        for parent in parents:
+            if any(parent.name in hierarchy.ancestors(other) for other in parents if other is not parent):
+                report.redundant_parents.append((role.name, parent.name))
+        for permission in sorted(role.permissions, key=lambda p: p.name):
+            if _inherited(permission.name, parents):
+                report.redundant_grants.append((role.name, permission.name))
+
+    users = sorted(storage.get_all_users(), key=lambda u: u.username)
+    for user in users:
+        assigned = sorted(user.roles, key=lambda r: r.name)
+        # A time-bound role does not make another assignment redundant: it may lapse first.
+        permanent = [role for role in assigned if role.name not in user.expirations]
+        for role in assigned:
+            if any(role.name in hierarchy.ancestors(other) for other in permanent if other is not role):
+                report.redundant_assignments.append((user.username, role.name))
+
+    removed_parents = set(report.redundant_parents)
+    removed_grants = set(report.redundant_grants)
+    removed_assignments = set(report.redundant_assignments)
+
+    def weight(name: str, reduced: bool) -> int:
+        role = hierarchy.role(name)
+        if not reduced:
+            return len(role.parents) + len(role.permissions)
+        return (
+            sum((name, p.name) not in removed_parents for p in role.parents)
+            + sum((name, p.name) not in removed_grants for p in role.permissions)
+        )
+
+    costs: dict[tuple[str, bool], int] = {}
+
+    def cost(role: Role, reduced: bool) -> int:
+        key = (role.name, reduced)
+        if key not in costs:
+            costs[key] = sum(weight(name, reduced) for name in hierarchy.ancestors(role))
+        return costs[key]
+
+    for user in users:
+        for role in user.roles:
+            report.traversal_cost_before += cost(role, reduced=False)
+            if (user.username, role.name) not in removed_assignments:
+                report.traversal_cost_after += cost(role, reduced=True)
+    return report
+
+
+def apply_reduction(storage: AbstractStorage, report: LintReport) -> None:
+    """
+    Removes the redundant parents, grants and assignments listed in `report`.
+    Effective permissions are unchanged, but a user can no longer activate a
+    removed ancestor role on its own in a session.
+    """
+    roles = storage.get_roles(
+        {name for name, _ in report.redundant_parents} | {name for name, _ in report.redundant_grants}
+    )
+    users = storage.get_users({name for name, _ in report.redundant_assignments})
+    with storage.unit_of_work() as work:
+        for role_name, parent_name in report.redundant_parents:
+            roles[role_name].remove_parent(parent_name)
+            work.save_role(roles[role_name])
+        for role_name, permission_name in report.redundant_grants:
+            roles[role_name].remove_permission(permission_name)
+            work.save_role(roles[role_name])
+        for username, role_name in report.redundant_assignments:
+            users[username].remove_role(role_name)
+            work.save_user(users[username])
+    report.applied = True
+
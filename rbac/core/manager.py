@@ -1,7 +1,24 @@
+import heapq
 import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+from rbac.core.analytics import PermissionMatrix
+from rbac.core.audit import ConstraintAudit, audit_constraints
+from rbac.core.compiled import CompiledPolicy, CompileStats
+from rbac.core.hierarchy import ConstrainedClosure, RoleHierarchy
+from rbac.core.lint import LintReport, apply_reduction, lint_policy
+from rbac.core.memory import MemoryReport, memory_report
+from rbac.core.namefilter import NameFilter, NameFilterStats
+from rbac.core.reconcile import PolicyDiff, apply_diff, constraint_sets, diff_policy, validate_diff
 from rbac.dsd.memory import InMemoryDSDConstraint
+from rbac.matching import PermissionTrie, is_pattern, validate_pattern
 from rbac.models import User, Role, Permission
 from rbac.storage import AbstractStorage
+from rbac.tokens import PermissionDictionary, issue_token
 from rbac.ssd.base import AbstractSSDConstraint
 from rbac.ssd.memory import InMemorySSDConstraint
 from rbac.dsd.base import DSDConstraint
@@ -9,6 +26,23 @@ from rbac.models import Session
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class Explanation:
+    """
+    Why a permission check passes or fails. On a grant, `path` runs from the user
+    through the shortest chain of roles to the role holding `matched_grant`.
+    On a deny, `nearest_misses` lists roles that would grant the permission,
+    closest first by parent links from the user's roles.
+    """
+    username: str
+    permission: str
+    granted: bool
+    path: list[str] = field(default_factory=list)
+    matched_grant: Optional[str] = None
+    nearest_misses: list[str] = field(default_factory=list)
+
+
 class RBACManager:
     """
     Core class to manage Role-Based Access Control operations.
@@ -19,27 +53,68 @@ class RBACManager:
         self,
         storage: AbstractStorage,
         ssd_constraint: AbstractSSDConstraint = None,
-        dsd_constraint: DSDConstraint = None
+        dsd_constraint: DSDConstraint = None,
+        clock: Callable[[], float] = time.time,
     ):
         """
         Initialize the RBACManager with a storage backend and optional constraints.
+        `clock` returns the current UNIX time and is used for role expiry.
         """
         self.storage = storage
         self.ssd = ssd_constraint or InMemorySSDConstraint()
         self.dsd = dsd_constraint or InMemoryDSDConstraint()
+        self._patterns = PermissionTrie(
+            p.name for p in storage.get_all_permissions() if is_pattern(p.name)
+        )
+        self._revision = 0
+        self._compiled: Optional[CompiledPolicy] = None
+        self._compile_lock = threading.Lock()
+        self._hierarchy: Optional[RoleHierarchy] = None
+        self._hierarchy_version: tuple[int, int] = (-1, -1)
+        self._roles_version = 0
+        self.sessions: dict[str, Session] = {}
+        self._ssd_counts: dict[str, tuple[dict[str, int], dict[str, int]]] = {}
+        self._ssd_closure: Optional[ConstrainedClosure] = None
+        self._dsd_closure: Optional[ConstrainedClosure] = None
+        self._dictionary: Optional[tuple[dict[str, int], PermissionDictionary]] = None
+        self._name_filter: Optional[NameFilter] = None
+        self._name_filter_lock = threading.Lock()
+        self._name_filter_rebuild = threading.Lock()
+        self._clock = clock
+        self._expiry_lock = threading.Lock()
+        self._expiry_heap: list[tuple[float, str, str]] = [
+            (expires, user.username, role_name)
+            for user in storage.get_all_users()
+            for role_name, expires in user.expirations.items()
+        ]
+        heapq.heapify(self._expiry_heap)
         logger.debug("RBACManager initialized with storage: %s", type(storage).__name__)
 
     def add_user(self, username: str) -> User:
         """
         Create and store a new user. Raises ValueError if the user already exists.
         """
-        if self.storage.get_user(username):
-            logger.warning("Attempt to add existing user: %s", username)
-            raise ValueError(f"User '{username}' already exists.")
-        user = User(username)
-        self.storage.save_user(user)
-        logger.info("User created: %s", username)
-        return user
+        return self.add_users([username])[0]
+
+    def add_users(self, usernames: list[str]) -> list[User]:
+        """
+        Create and store many users with one batched lookup and one storage write.
+        Raises ValueError, before anything is written, if any of them already exists.
+        """
+        usernames = list(usernames)
+        duplicate = next(iter(self.storage.get_users(usernames)), None)
+        if duplicate is None and len(set(usernames)) != len(usernames):
+            duplicate = next(name for name in usernames if usernames.count(name) > 1)
+        if duplicate is not None:
+            logger.warning("Attempt to add existing user: %s", duplicate)
+            raise ValueError(f"User '{duplicate}' already exists.")
+        users = [User(username) for username in usernames]
+        self.storage.save_many(users=users)
+        self._filter_names(usernames=usernames)
+        for user in users:
+            self._user_roles_changed(user)
+            logger.info("User created: %s", user.username)
+        return users
 
     def add_role(self, role: Role) -> Role:
         """
@@ -49,106 +124,341 @@ class RBACManager:
             logger.warning("Attempt to add existing role: %s", role.name)
             raise ValueError(f"Role '{role.name}' already exists.")
         self.storage.save_role(role)
+        self._roles_version += 1
+        self._policy_changed()
         logger.info("Role added: %s", role.name)
         return role
 
     def add_permission(self, perm_name: str) -> Permission:
         """
         Add a new permission. Raises ValueError if the permission already exists.
+        Names containing `*` or `**` segments are registered as wildcard patterns.
         """
         if self.storage.get_permission(perm_name):
             logger.warning("Attempt to add existing permission: %s", perm_name)
             raise ValueError(f"Permission '{perm_name}' already exists.")
+        if is_pattern(perm_name):
+            validate_pattern(perm_name)
+            self._patterns.add(perm_name)
         permission = Permission(perm_name)
         self.storage.save_permission(permission)
+        self._filter_names(permission_names=[perm_name])
+        self._policy_changed()
         logger.info("Permission added: %s", perm_name)
         return permission
 
-    def assign_role(self, username: str, role_name: str) -> None:
+    def assign_role(self, username: str, role_name: str, expires_at: Optional[datetime] = None) -> None:
         """
         Assign a role to a user, checking for SSD constraint violations.
+        With `expires_at` (naive datetimes are taken as UTC) the assignment is
+        revoked automatically at that time; without it any previous expiry is cleared.
         """
-        user = self.storage.get_user(username)
-        role = self.storage.get_role(role_name)
+        self.assign_roles([(username, role_name)], expires_at=expires_at)
+
+    def assign_roles(self, assignments: list[tuple[str, str]], expires_at: Optional[datetime] = None) -> None:
+        """
+        Assign many (username, role) pairs with one batched lookup of users and
+        roles and one storage write. Every pair is validated, SSD included, before
+        any is applied, so a failing pair leaves all users unchanged. `expires_at`
+        applies to every pair, as in `assign_role`.
+        """
+        assignments = list(assignments)
+        users = self.storage.get_users({username for username, _ in assignments})
+        roles = self.storage.get_roles({role_name for _, role_name in assignments})
+        expires = None
+        if expires_at is not None:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            expires = expires_at.timestamp()
+            if expires <= self._clock():
+                raise ValueError(f"Expiry {expires_at.isoformat()} is not in the future.")
+
+        planned: dict[str, list[Role]] = {}
+        held: dict[str, tuple[dict[str, int], dict[str, int]]] = {}
+        authorized: dict[str, set[str]] = {}
+        for username, role_name in assignments:
+            user = users.get(username)
+            role = roles.get(role_name)
+            if not user:
+                logger.error("User not found: %s", username)
+                raise ValueError(f"User '{username}' not found.")
+            if not role:
+                logger.error("Role not found: %s", role_name)
+                raise ValueError(f"Role '{role_name}' not found.")
+            added_roles = planned.setdefault(username, [])
+            if user.has_role(role_name) or role in added_roles:
+                continue
+            added_roles.append(role)
+            if not self.ssd:
+                continue
+            if not self.ssd.counts_assignments:
+                self._check_ssd_rule(user, role, authorized)
+                continue
+            if username not in held:
+                refs, counts = self._assigned_counts(user)
+                held[username] = (dict(refs), dict(counts))
+            refs, counts = held[username]
+            closure = self._ssd_closure(role_name)
+            if not self.ssd.can_add([name for name in closure if name not in refs], counts):
+                logger.warning("SSD violation: cannot assign role '%s' to '%s'", role_name, username)
+                raise ValueError(f"SSD violation: Cannot assign role '{role_name}' to '{username}'")
+            for name in closure:
+                refs[name] = refs.get(name, 0) + 1
+                if refs[name] == 1:
+                    self.ssd.track_assignment(name, counts)
+
+        for username, added_roles in planned.items():
+            for role in added_roles:
+                users[username].add_role(role)
+        self._ssd_counts.update(held)
+        for username, role_name in assignments:
+            user = users[username]
+            if expires is None:
+                user.expirations.pop(role_name, None)
+            else:
+                user.expirations[role_name] = expires
+                with self._expiry_lock:
+                    heapq.heappush(self._expiry_heap, (expires, username, role_name))
+        self.storage.save_many(users=[users[username] for username in planned])
+        for username in planned:
+            self._user_roles_changed(users[username])
+        for username, role_name in assignments:
+            logger.info("Assigned role '%s' to user '%s'%s", role_name, username,
+                        f" until {expires_at.isoformat()}" if expires_at else "")
 
+    def revoke_role(self, username: str, role_name: str) -> None:
+        """
+        Remove a role from a user and deactivate it in the user's live sessions.
+        Revoking a role the user does not hold is a no-op.
+        """
+        user = self.storage.get_user(username)
         if not user:
             logger.error("User not found: %s", username)
             raise ValueError(f"User '{username}' not found.")
-        if not role:
-            logger.error("Role not found: %s", role_name)
-            raise ValueError(f"Role '{role_name}' not found.")
+        revoked = user.has_role(role_name)
+        held = self._ssd_counts.get(username)
+        if held is not None and revoked:
+            refs, counts = held
+            for name in self._ssd_closure(role_name):
+                remaining = refs.get(name, 0) - 1
+                if remaining > 0:
+                    refs[name] = remaining
+                else:
+                    refs.pop(name, None)
+                    self.ssd.track_revocation(name, counts)
+        user.remove_role(role_name)
+        self.storage.save_user(user)
+        self._user_roles_changed(user)
+        if revoked:
+            self._access_revoked()
+        for session in self.sessions.values():
+            if session.user.username == username:
+                session.deactivate_role(role_name)
+        logger.info("Revoked role '%s' from user '%s'", role_name, username)
 
-        current_roles = user.get_role_names()
-        if self.ssd and not self.ssd.is_valid_assignment(username, role_name, current_roles):
-            logger.warning("SSD violation: cannot assign role '%s' to '%s'", role_name, username)
-            raise ValueError(f"SSD violation: Cannot assign role '{role_name}' to '{username}'")
+    def expire_assignments(self, now: Optional[float] = None) -> int:
+        """
+        Revoke every role assignment whose expiry is at or before `now` (default:
+        the manager clock) and return how many were revoked. Only due entries are
+        visited; entries superseded by a later assign or revoke are skipped.
+        """
+        now = self._clock() if now is None else now
+        expired = 0
+        with self._expiry_lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                expires, username, role_name = heapq.heappop(heap)
+                user = self.storage.get_user(username)
+                if user is None or user.expirations.get(role_name) != expires:
+                    continue
+                self.revoke_role(username, role_name)
+                logger.info("Role '%s' of user '%s' expired", role_name, username)
+                expired += 1
+        return expired
 
-        user.add_role(role)
-        self.storage.save_user(user)
-        logger.info("Assigned role '%s' to user '%s'", role_name, username)
+    def _check_ssd_rule(self, user: User, role: Role, authorized: dict[str, set[str]]) -> None:
+        """
+        Validates an assignment through `is_valid_assignment`, for SSD engines
+        without counting support: `role` and each ancestor it newly authorizes is
+        checked against the user's authorized roles, which `authorized` tracks
+        across a batch. Raises ValueError on a violation.
+        """
+        hierarchy = self.hierarchy()
+        granted = authorized.get(user.username)
+        if granted is None:
+            granted = authorized[user.username] = {
+                name for assigned in user.roles for name in hierarchy.ancestors(assigned)
+            }
+        for name in hierarchy.ancestors(role):
+            if name in granted:
+                continue
+            if not self.ssd.is_valid_assignment(user.username, name, set(granted)):
+                logger.warning("SSD violation: cannot assign role '%s' to '%s'", role.name, user.username)
+                raise ValueError(f"SSD violation: Cannot assign role '{role.name}' to '{user.username}'")
+            granted.add(name)
+
+    def _assigned_counts(self, user: User) -> tuple[dict[str, int], dict[str, int]]:
+        """
+        Returns (refs, counts) for the user's authorized roles under SSD: how many
+        assigned roles reach each constrained role through the hierarchy, and how
+        many distinct such roles each SSD set holds. Cached per user, rebuilt when
+        SSD sets or parent links change, and kept current by assign_role and revoke_role.
+        """
+        closure = self._ssd_closure
+        if closure is None or not closure.is_current():
+            closure = self._ssd_closure = ConstrainedClosure(self.storage, self.ssd)
+            self._ssd_counts.clear()
+        held = self._ssd_counts.get(user.username)
+        if held is None:
+            refs: dict[str, int] = {}
+            for role_name in user.get_role_names():
+                for name in closure(role_name):
+                    refs[name] = refs.get(name, 0) + 1
+            held = self._ssd_counts[user.username] = (refs, self.ssd.count_assigned(set(refs)))
+        return held
+
+    def _current_dsd_closure(self) -> ConstrainedClosure:
+        """Returns the DSD role closure, rebuilt when DSD sets or parent links change."""
+        closure = self._dsd_closure
+        if closure is None or not closure.is_current():
+            closure = self._dsd_closure = ConstrainedClosure(self.storage, self.dsd)
+        return closure
+
+    def _expire_due(self) -> None:
+        """Runs the expiry sweep only if the earliest expiry has passed."""
+        heap = self._expiry_heap
+        if heap and heap[0][0] <= self._clock():
+            self.expire_assignments()
 
     def grant_permission(self, role_name: str, perm_name: str) -> None:
         """
         Grant a permission to a role. Raises error if role or permission is not found.
         """
-        role = self.storage.get_role(role_name)
-        permission = self.storage.get_permission(perm_name)
-        if not role:
-            logger.error("Role not found: %s", role_name)
-            raise ValueError(f"Role '{role_name}' not found.")
-        if not permission:
-            logger.error("Permission not found: %s", perm_name)
-            raise ValueError(f"Permission '{perm_name}' not found.")
-        role.add_permission(permission)
-        self.storage.save_role(role)
-        logger.info("Granted permission '%s' to role '%s'", perm_name, role_name)
+        self.grant_permissions([(role_name, perm_name)])
+
+    def grant_permissions(self, grants: list[tuple[str, str]]) -> None:
+        """
+        Grant many (role, permission) pairs with one batched lookup and one storage
+        write. Raises ValueError, before anything changes, if a role or permission is not found.
+        """
+        grants = list(grants)
+        roles = self.storage.get_roles({role_name for role_name, _ in grants})
+        permissions = self.storage.get_permissions({perm_name for _, perm_name in grants})
+        for role_name, perm_name in grants:
+            if role_name not in roles:
+                logger.error("Role not found: %s", role_name)
+                raise ValueError(f"Role '{role_name}' not found.")
+            if perm_name not in permissions:
+                logger.error("Permission not found: %s", perm_name)
+                raise ValueError(f"Permission '{perm_name}' not found.")
+        touched: dict[str, Role] = {}
+        for role_name, perm_name in grants:
+            role = touched[role_name] = roles[role_name]
+            role.add_permission(permissions[perm_name])
+        self.storage.save_many(roles=touched.values())
+        self._roles_version += 1
+        self._policy_changed()
+        for role_name, perm_name in grants:
+            logger.info("Granted permission '%s' to role '%s'", perm_name, role_name)
 
     def check_permission(self, username: str, perm_name: str) -> bool:
         """
-        Directly check if a user has a permission (without inheritance).
+        Check if a user has a permission through their roles, including inherited
+        and wildcard grants. The permission must be registered or covered by a
+        registered wildcard pattern.
         """
+        self._expire_due()
+        if self._compiled is not None:
+            decision = self._compiled_lookup(username, perm_name)
+            if decision is not None:
+                return decision
+
+        name_filter = self._name_filter
+        if name_filter is not None:
+            if username not in name_filter.users:
+                self._log_missing("user", username, "User not found during permission check: %s")
+                raise ValueError(f"User {username} not found.")
+            if perm_name not in name_filter.permissions and not self._patterns.matches(perm_name):
+                self._log_missing("permission", perm_name, "Permission not found during check: %s")
+                raise ValueError(f"Permission '{perm_name}' not found.")
+
         user = self.storage.get_user(username)
         permission = self.storage.get_permission(perm_name)
         if not user:
-            logger.error("User not found during permission check: %s", username)
+            self._log_missing("user", username, "User not found during permission check: %s")
             raise ValueError(f"User {username} not found.")
         if not permission:
-            logger.error("Permission not found during check: %s", perm_name)
-            raise ValueError(f"Permission '{perm_name}' not found.")
+            if not self._patterns.matches(perm_name):
+                self._log_missing("permission", perm_name, "Permission not found during check: %s")
+                raise ValueError(f"Permission '{perm_name}' not found.")
+            permission = Permission(perm_name)
         result = user.has_permission(permission)
         logger.debug("Permission check for user '%s' on '%s': %s", username, perm_name, result)
         return result
 
+    def check_permissions(self, checks: list[tuple[str, str]]) -> list[Optional[bool]]:
+        """
+        Check many (username, permission) pairs at once. Pairs naming an unknown
+        user or permission yield None instead of raising. Without a compiled
+        policy, users and permissions are fetched with one batched lookup each.
+        """
+        results: list[Optional[bool]] = []
+        if self._compiled is not None:
+            for username, perm_name in checks:
+                try:
+                    results.append(self.check_permission(username, perm_name))
+                except ValueError:
+                    results.append(None)
+            return results
+
+        self._expire_due()
+        usernames = {username for username, _ in checks}
+        perm_names = {perm_name for _, perm_name in checks}
+        name_filter = self._name_filter
+        if name_filter is not None:
+            usernames = {name for name in usernames if name in name_filter.users}
+            perm_names = {name for name in perm_names if name in name_filter.permissions}
+        users = self.storage.get_users(usernames)
+        permissions = self.storage.get_permissions(perm_names)
+        for username, perm_name in checks:
+            user = users.get(username)
+            permission = permissions.get(perm_name)
+            if permission is None and self._patterns.matches(perm_name):
+                permission = Permission(perm_name)
+            results.append(None if user is None or permission is None else user.has_permission(permission))
+        return results
+
     def user_has_permission(self, username: str, permission_name: str) -> bool:
         """
-        Recursively checks whether a user has a permission through role inheritance.
-        Cycles in role hierarchy are detected and avoided.
+        Checks whether a user has a permission through role inheritance or
+        wildcard grants. Unknown users simply do not have the permission.
         """
         logger.info("Checking permission for user '%s' on '%s'", username, permission_name)
-        user = self.storage.get_user(username)
+        self._expire_due()
+        if self._compiled is not None:
+            decision = self._compiled_lookup(username, permission_name)
+            if decision is not None:
+                return decision
+
+        name_filter = self._name_filter
+        user = None
+        if name_filter is None or username in name_filter.users:
+            user = self.storage.get_user(username)
         if not user:
-            logger.error("User not found during permission check: %s", username)
+            self._log_missing("user", username, "User not found during permission check: %s")
             return False
 
-        def has_permission(role: Role, path_stack: set[Role]) -> bool:
-            if role in path_stack:
-                logger.debug("Detected cycle in role inheritance for role '%s'", role.name)
-                return False
-
-            path_stack.add(role)
-
-            if any(p.name == permission_name for p in role.permissions):
-                logger.debug("Permission found in role '%s'", role.name)
+        for role in user.roles:
+            if role.grants(permission_name):
+                logger.debug("Permission '%s' granted via role '%s'", permission_name, role.name)
                 return True
-
-            return any(has_permission(parent, path_stack.copy()) for parent in role.parents)
-
-        return any(has_permission(role, set()) for role in user.roles)
+        return False
 
     def get_user_permissions(self, username: str) -> set[str]:
         """
         Returns a set of permission names assigned to a user (including inherited).
         """
+        self._expire_due()
         user = self.storage.get_user(username)
         if not user:
             logger.error("User '%s' not found during permission enumeration", username)
@@ -177,6 +487,7 @@ class RBACManager:
         Creates a new session with a subset of the user's roles (active set).
         Validates against DSD constraints.
         """
+        self._expire_due()
         user = self.storage.get_user(username)
         if not user:
             logger.error("User '%s' not found during session creation", username)
@@ -187,9 +498,430 @@ class RBACManager:
             logger.warning("Attempt to activate unassigned roles for user '%s'", username)
             raise ValueError("Trying to activate roles not assigned to the user.")
 
-        if self.dsd and not self.dsd.is_valid_activation(active_role_names):
-            logger.warning("DSD violation for user '%s': roles=%s", username, active_role_names)
-            raise ValueError(f"DSD violation: Conflicting roles activated together.")
+        if self.dsd:
+            closure = self._current_dsd_closure()
+            authorized = {name for role_name in active_role_names for name in closure(role_name)}
+            if not self.dsd.is_valid_activation(authorized | set(active_role_names)):
+                logger.warning("DSD violation for user '%s': roles=%s", username, active_role_names)
+                raise ValueError(f"DSD violation: Conflicting roles activated together.")
 
+        session = Session(
+            user=user, active_roles=set(active_role_names), dsd=self.dsd, session_id=uuid.uuid4().hex,
+            closure=self._current_dsd_closure,
+        )
+        self.sessions[session.session_id] = session
         logger.info("Session created for user '%s' with roles %s", username, active_role_names)
-        return Session(user=user, active_roles=set(active_role_names))
+        return session
+
+    def get_session(self, session_id: str) -> Session:
+        """
+        Return a live session by ID. Raises ValueError if it does not exist.
+        """
+        session = self.sessions.get(session_id)
+        if not session:
+            logger.error("Session not found: %s", session_id)
+            raise ValueError(f"Session '{session_id}' not found.")
+        return session
+
+    def activate_session_role(self, session_id: str, role_name: str) -> Session:
+        """
+        Activate an assigned role in a live session, validated incrementally against DSD.
+        """
+        self._expire_due()
+        session = self.get_session(session_id)
+        if not session.user.has_role(role_name):
+            logger.warning("Attempt to activate unassigned role '%s' in session %s", role_name, session_id)
+            raise ValueError(f"Role '{role_name}' is not assigned to user '{session.user.username}'.")
+        try:
+            session.activate_role(role_name)
+        except ValueError:
+            logger.warning("DSD violation activating '%s' in session %s", role_name, session_id)
+            raise
+        logger.info("Activated role '%s' in session %s", role_name, session_id)
+        return session
+
+    def deactivate_session_role(self, session_id: str, role_name: str) -> Session:
+        """
+        Deactivate a role in a live session. Deactivating an inactive role is a no-op.
+        """
+        session = self.get_session(session_id)
+        session.deactivate_role(role_name)
+        logger.info("Deactivated role '%s' in session %s", role_name, session_id)
+        return session
+
+    def end_session(self, session_id: str) -> None:
+        """
+        Remove a live session. Raises ValueError if it does not exist.
+        """
+        self.get_session(session_id)
+        del self.sessions[session_id]
+        logger.info("Session ended: %s", session_id)
+
+    def explain(self, username: str, perm_name: str, max_misses: int = 5) -> Explanation:
+        """
+        Explain a permission decision for a user using precomputed hierarchy data.
+        Raises ValueError if the user does not exist.
+        """
+        self._expire_due()
+        user = self.storage.get_user(username)
+        if not user:
+            logger.error("User not found during explain: %s", username)
+            raise ValueError(f"User {username} not found.")
+
+        hierarchy = self.hierarchy()
+        best: Optional[tuple[int, str, str, Role]] = None
+        for role in sorted(user.roles, key=lambda r: r.name):
+            for name, distance in hierarchy.ancestors(role).items():
+                if best is not None and distance >= best[0]:
+                    break
+                grant = hierarchy.direct_grant(name, perm_name)
+                if grant is not None:
+                    best = (distance, name, grant, role)
+                    break
+
+        if best is None:
+            hops = hierarchy.hops(role.name for role in user.roles)
+            unreachable = len(hops) + 1
+            misses = sorted(
+                hierarchy.holders(perm_name), key=lambda name: (hops.get(name, unreachable), name)
+            )[:max_misses]
+            logger.debug("Explain deny for '%s' on '%s'; granting roles: %s", username, perm_name, misses)
+            return Explanation(username, perm_name, granted=False, nearest_misses=misses)
+
+        _, holder, grant, role = best
+        path = [username] + hierarchy.path(role, holder)
+        return Explanation(username, perm_name, granted=True, path=path, matched_grant=grant)
+
+    def audit_constraints(self) -> ConstraintAudit:
+        """
+        Report every user whose assigned roles violate an SSD set and every live
+        session whose active roles violate a DSD set, in one bulk pass.
+        """
+        self._expire_due()
+        audit = audit_constraints(
+            self.storage, self.ssd, self.dsd, self.sessions,
+            ssd_closure=ConstrainedClosure(self.storage, self.ssd),
+            dsd_closure=ConstrainedClosure(self.storage, self.dsd),
+        )
+        logger.info(
+            "Constraint audit: %d SSD and %d DSD violations across %d users and %d sessions in %.3fs",
+            len(audit.ssd_violations), len(audit.dsd_violations),
+            audit.users_scanned, audit.sessions_scanned, audit.elapsed_seconds,
+        )
+        return audit
+
+    def lint(self, apply: bool = False) -> LintReport:
+        """
+        Find redundant parent links, grants and assignments using the transitive
+        reduction of the role hierarchy. With `apply=True` they are removed.
+        """
+        self._expire_due()
+        report = lint_policy(self.storage)
+        logger.info(
+            "Policy lint: %d redundant parents, %d grants, %d assignments; traversal cost %d -> %d",
+            len(report.redundant_parents), len(report.redundant_grants),
+            len(report.redundant_assignments), report.traversal_cost_before, report.traversal_cost_after,
+        )
+        if apply:
+            apply_reduction(self.storage, report)
+            self._ssd_counts.clear()
+            self._ssd_closure = self._dsd_closure = None
+            self._roles_version += 1
+            self._policy_changed()
+            logger.info("Applied policy reduction, saving %d traversal steps", report.traversal_saved)
+        return report
+
+    def reconcile(self, document: dict, dry_run: bool = False, prune: bool = False) -> PolicyDiff:
+        """
+        Bring the live policy in line with a declarative `document` (see
+        `rbac.core.reconcile`) by applying only the minimal diff. The changes are
+        validated as a whole, live sessions included, before anything is written,
+        and undone if writing fails. With `dry_run=True` the diff is returned
+        without applying it; with `prune=True` entities missing from managed
+        sections are removed.
+        """
+        diff = diff_policy(self.storage, self.ssd, self.dsd, document, prune=prune)
+        validate_diff(self.storage, self.ssd, self.dsd, diff, self.sessions)
+        if dry_run or not diff.change_count:
+            logger.info("Policy reconcile%s: %d changes", " (dry run)" if dry_run else "", diff.change_count)
+            return diff
+
+        previous_ssd = {
+            name: spec for name, spec in constraint_sets(self.ssd, self.ssd.get_all_sets()).items()
+            if name in diff.ssd_sets or name in diff.removed_ssd_sets
+        }
+        previous_dsd = {
+            name: spec for name, spec in constraint_sets(self.dsd, self.dsd.get_conflict_sets()).items()
+            if name in diff.dsd_sets or name in diff.removed_dsd_sets
+        }
+        try:
+            apply_diff(self.storage, self.ssd, self.dsd, diff)
+        except Exception:
+            logger.exception("Policy reconcile failed; rolling back")
+            apply_diff(self.storage, self.ssd, self.dsd, diff.inverse(previous_ssd, previous_dsd))
+            raise
+        finally:
+            self._patterns = PermissionTrie(
+                p.name for p in self.storage.get_all_permissions() if is_pattern(p.name)
+            )
+            if self._name_filter is not None:
+                self.refresh_name_filter()
+            self._ssd_counts.clear()
+            self._ssd_closure = self._dsd_closure = None
+            self._roles_version += 1
+            self._policy_changed()
+
+        if any([
+            diff.removed_permissions, diff.removed_roles, diff.removed_parents,
+            diff.removed_grants, diff.removed_users, diff.removed_assignments,
+        ]):
+            self._access_revoked()
+        removed_users = set(diff.removed_users)
+        for session_id, session in list(self.sessions.items()):
+            if session.user.username in removed_users:
+                del self.sessions[session_id]
+        for username, role_name in diff.removed_assignments:
+            for session in self.sessions.values():
+                if session.user.username == username:
+                    session.deactivate_role(role_name)
+        diff.applied = True
+        logger.info("Policy reconciled: %d changes applied", diff.change_count)
+        return diff
+
+    def hierarchy(self) -> RoleHierarchy:
+        """Returns precomputed hierarchy data, rebuilding it after policy changes."""
+        hierarchy = self._hierarchy
+        version = (self._roles_version, self._role_generation())
+        if hierarchy is None or self._hierarchy_version != version:
+            hierarchy = RoleHierarchy(self.storage.get_all_roles())
+            self._hierarchy = hierarchy
+            self._hierarchy_version = version
+        return hierarchy
+
+    # --- Compiled policy ---
+
+    def compile(self) -> CompileStats:
+        """
+        Freeze the current policy into a read-optimized decision table.
+        Subsequent checks are answered from it; assignments update it in place and
+        other mutations trigger a rebuild on the next check.
+        """
+        with self._compile_lock:
+            self._compiled = CompiledPolicy.build(self.storage, self._revision)
+        stats = self._compiled.stats
+        logger.info(
+            "Policy compiled in %.3fs: %d users in %d role groups, %d roles, %d permissions, ~%d bytes",
+            stats.compile_seconds, stats.users, stats.role_groups, stats.roles,
+            stats.permissions, stats.memory_bytes,
+        )
+        return stats
+
+    @property
+    def compiled(self) -> Optional[CompiledPolicy]:
+        """The current compiled policy, or None if compilation is not enabled."""
+        return self._compiled
+
+    def permission_matrix(self) -> PermissionMatrix:
+        """
+        Return the effective user-by-permission matrix over registered concrete
+        permissions, reusing the compiled policy when it is current.
+        """
+        self._expire_due()
+        compiled = self._compiled
+        if compiled is None or compiled.version != self._revision or compiled.role_generation != self._role_generation():
+            compiled = CompiledPolicy.build(self.storage, self._revision)
+        return PermissionMatrix(compiled)
+
+    # --- Name filter ---
+
+    def enable_name_filter(
+        self,
+        false_positive_rate: float = 0.01,
+        capacity: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> NameFilterStats:
+        """
+        Build Bloom filters over registered user and permission names (see
+        `rbac.core.namefilter`). Checks naming a user or permission the filters
+        prove unregistered are then rejected before any storage lookup, and each
+        unknown name is logged at error level once rather than on every check.
+        `capacity` sizes each filter (at least twice the current count, 1024 by
+        default) and `max_bytes` caps their combined memory. Users and permissions added
+        through the manager are added to the filters; call
+        `refresh_name_filter()` after writing to storage directly.
+        """
+        self._name_filter = NameFilter(
+            (user.username for user in self.storage.get_all_users()),
+            (permission.name for permission in self.storage.get_all_permissions()),
+            false_positive_rate, capacity, max_bytes,
+        )
+        stats = self._name_filter.stats
+        logger.info(
+            "Name filter built over %d users and %d permissions: %d bytes, false positives ~%.4f/%.4f",
+            stats.users, stats.permissions, stats.memory_bytes,
+            stats.user_false_positive_rate, stats.permission_false_positive_rate,
+        )
+        return stats
+
+    def refresh_name_filter(self) -> None:
+        """Rebuild the name filter from storage, dropping deleted names. Raises ValueError if it is not enabled."""
+        with self._name_filter_rebuild:
+            name_filter = self._name_filter
+            if name_filter is None:
+                raise ValueError("Name filter is not enabled.")
+            with self._name_filter_lock:
+                mark = name_filter.added_count
+            rebuilt = name_filter.rebuilt(
+                (user.username for user in self.storage.get_all_users()),
+                (permission.name for permission in self.storage.get_all_permissions()),
+            )
+            # Names added while storage was being read may be missing from it.
+            with self._name_filter_lock:
+                rebuilt.add_names(*name_filter.added_since(mark))
+                self._name_filter = rebuilt
+        logger.debug("Name filter rebuilt: %s", rebuilt.stats)
+
+    @property
+    def name_filter(self) -> Optional[NameFilter]:
+        """The name filter, or None if it is not enabled."""
+        return self._name_filter
+
+    def _filter_names(self, usernames: Iterable[str] = (), permission_names: Iterable[str] = ()) -> None:
+        """Adds names that were just saved; a full filter is first rebuilt from storage."""
+        name_filter = self._name_filter
+        if name_filter is None:
+            return
+        if name_filter.full:
+            self.refresh_name_filter()
+        with self._name_filter_lock:
+            self._name_filter.add_names(usernames, permission_names)
+
+    def _log_missing(self, kind: str, name: str, message: str) -> None:
+        """Logs an unknown name at error level, or at debug level if the name filter has already seen it rejected."""
+        name_filter = self._name_filter
+        if name_filter is None or name_filter.first_miss(kind, name):
+            logger.error(message, name)
+        else:
+            logger.debug(message, name)
+
+    # --- Capability tokens ---
+
+    def _snapshot(self) -> CompiledPolicy:
+        if self._compiled is not None:
+            return self._current_compiled()
+        return CompiledPolicy.build(self.storage, self._revision)
+
+    def _dictionary_for(self, policy: CompiledPolicy) -> PermissionDictionary:
+        cached = self._dictionary
+        if cached is None or cached[0] is not policy.permission_index:
+            cached = self._dictionary = (policy.permission_index, PermissionDictionary(policy.permission_index))
+        return cached[1]
+
+    def permission_dictionary(self) -> PermissionDictionary:
+        """Returns the dictionary that capability tokens index into: all registered concrete permissions."""
+        return self._dictionary_for(self._snapshot())
+
+    def issue_capability_token(
+        self,
+        key: bytes,
+        username: Optional[str] = None,
+        session_id: Optional[str] = None,
+        ttl: float = 300.0,
+    ) -> str:
+        """
+        Sign a token carrying the effective permissions of `username`, or of the
+        active roles of session `session_id`, for offline checks with
+        `rbac.tokens.CapabilityVerifier`. Permissions reachable only through an
+        unregistered concrete name are not included. `ttl` is shortened so the
+        token expires with the earliest time-bound role it carries; if that is
+        less than a second away, ValueError is raised instead. Issuing is
+        cheapest with a compiled policy; otherwise the policy is compiled for each call.
+        """
+        if (username is None) == (session_id is None):
+            raise ValueError("Provide exactly one of username or session_id.")
+        self._expire_due()
+        policy = self._snapshot()
+        if session_id is not None:
+            session = self.get_session(session_id)
+            username = session.user.username
+            expirations = session.user.expirations
+            mask = 0
+            for role_name in session.active_roles:
+                mask |= policy.role_masks.get(role_name, 0)
+            expiries = [expirations[name] for name in session.active_roles if name in expirations]
+        else:
+            group = policy.user_groups.get(username)
+            user = self.storage.get_user(username)
+            if group is None or user is None:
+                logger.error("User not found during token issue: %s", username)
+                raise ValueError(f"User '{username}' not found.")
+            mask = policy.group_masks[group]
+            expiries = list(user.expirations.values())
+        now = self._clock()
+        if expiries:
+            # The token must not outlive the first time-bound role it carries.
+            ttl = min(ttl, min(expiries) - now)
+            if ttl < 1:
+                raise ValueError("A role carried by the token expires in less than a second.")
+        dictionary = self._dictionary_for(policy)
+        token = issue_token(
+            key, dictionary, mask, username, self.policy_version,
+            ttl=ttl, session_id=session_id, now=now,
+        )
+        logger.info("Issued capability token for '%s'%s valid for %ss", username,
+                    f" (session {session_id})" if session_id else "", ttl)
+        return token
+
+    def memory_report(self, top: int = 10) -> MemoryReport:
+        """
+        Break down the memory held by models, storage, constraint engines, sessions
+        and caches. Start tracemalloc beforehand to also get traced allocation sites.
+        """
+        report = memory_report(self, top=top)
+        logger.info("Memory report: ~%d bytes across %d users, %d roles",
+                    report.total_bytes, report.counts["users"], report.counts["roles"])
+        return report
+
+    @property
+    def policy_version(self) -> int:
+        """
+        Counter raised whenever access is taken away (revocations, expiries and
+        removals by `reconcile`). It is stored with the policy, so verifiers can
+        pass it to `CapabilityVerifier.reject_before` across restarts.
+        """
+        return self.storage.get_policy_version()
+
+    def _access_revoked(self) -> None:
+        self.storage.save_policy_version(self.storage.get_policy_version() + 1)
+
+    def _role_generation(self) -> int:
+        """Changes whenever roles held by the storage change, even when edited outside the manager."""
+        generation = self.storage.role_generation
+        return generation.value if generation is not None else 0
+
+    def _policy_changed(self) -> None:
+        self._revision += 1
+
+    def _user_roles_changed(self, user: User) -> None:
+        """Bumps the revision, patching the compiled table for this user if possible."""
+        self._policy_changed()
+        compiled = self._compiled
+        if compiled is None or compiled.version != self._revision - 1:
+            return
+        if compiled.assign_user(user.username, user.get_role_names()):
+            compiled.version = self._revision
+
+    def _current_compiled(self) -> CompiledPolicy:
+        """Returns the compiled policy, rebuilding it first if it is stale."""
+        compiled = self._compiled
+        if compiled.version != self._revision or compiled.role_generation != self._role_generation():
+            with self._compile_lock:
+                compiled = self._compiled
+                if compiled.version != self._revision or compiled.role_generation != self._role_generation():
+                    logger.debug("Compiled policy is stale; recompiling")
+                    compiled = CompiledPolicy.build(self.storage, self._revision)
+                    self._compiled = compiled
+        return compiled
+
+    def _compiled_lookup(self, username: str, perm_name: str) -> Optional[bool]:
+        return self._current_compiled().lookup(username, perm_name)
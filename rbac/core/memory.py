@@ -0,0 +1,170 @@
+"""
+Memory accounting for a running RBAC manager.
+
+`deep_size` walks containers and object attributes with a shared `seen` set, so
+an object reachable from several places is charged once, to the first category
+that reaches it. Walks stop at entity boundaries (users, roles, permissions,
+sessions, storage and constraint engines) so every category only counts what it
+owns; `Role` matcher caches are charged to caches rather than to the roles.
+"""
+from __future__ import annotations
+
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import Iterable, Optional
+
+from rbac.dsd.base import DSDConstraint
+from rbac.models import Permission, Role, Session, User
+from rbac.ssd.base import AbstractSSDConstraint
+from rbac.storage import AbstractStorage
+
+_BOUNDARIES = (User, Role, Permission, Session, AbstractStorage, AbstractSSDConstraint, DSDConstraint)
+_OPAQUE = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+_ROLE_CACHE_ATTRS = frozenset({"_matcher"})
+
+
+def deep_size(obj: object, seen: set[int], skip_attrs: frozenset[str] = frozenset()) -> int:
+    """
+    Returns the bytes of `obj` and everything it references that is not yet in
+    `seen`, without descending into other entities. `skip_attrs` names
+    attributes of `obj` itself to leave out.
+    """
+    total = 0
+    stack = [(obj, True)]
+    while stack:
+        current, is_root = stack.pop()
+        if id(current) in seen or isinstance(current, _OPAQUE):
+            continue
+        if not is_root and isinstance(current, _BOUNDARIES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        skip = skip_attrs if current is obj else frozenset()
+        if isinstance(current, dict):
+            for key, value in current.items():
+                stack.append((key, False))
+                stack.append((value, False))
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend((item, False) for item in current)
+        elif not isinstance(current, (str, bytes, int, float, bool)) and current is not None:
+            attrs = getattr(current, "__dict__", None)
+            if attrs is not None:
+                seen.add(id(attrs))
+                total += sys.getsizeof(attrs)
+                for name, value in attrs.items():
+                    if name not in skip:
+                        stack.append((value, False))
+            for klass in type(current).__mro__:
+                for name in getattr(klass, "__slots__", ()):
+                    if name not in skip and hasattr(current, name):
+                        stack.append((getattr(current, name), False))
+    return total
+
+
+@dataclass
+class MemoryReport:
+    """
+    Bytes per category, entity counts and the average cost of one entity.
+    `traced_bytes` and `top_allocations` are filled only while tracemalloc is tracing.
+    """
+    categories: dict[str, int] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+    per_entity: dict[str, float] = field(default_factory=dict)
+    traced_bytes: Optional[int] = None
+    top_allocations: list[tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.categories.values())
+
+    def extrapolate(self, users: int = 0, roles: int = 0, permissions: int = 0, sessions: int = 0) -> int:
+        """
+        Projects the footprint of a policy of the given size. Models and sessions
+        scale with their per-entity costs; storage indexes and caches scale with the
+        total number of users, roles and permissions. Assignment and grant
+        densities are assumed to stay the same.
+        """
+        entities = users + roles + permissions
+        measured = sum(self.counts.get(kind, 0) for kind in ("users", "roles", "permissions"))
+        projected = 0.0
+        for name, size in self.categories.items():
+            if name == "models.roles" or name == "caches.role_matchers":
+                continue
+            if name.startswith("storage") or name.startswith("caches."):
+                projected += size * entities / measured if measured else 0.0
+            elif not name.startswith("models.") and name != "sessions":
+                projected += size
+        projected += self.per_entity.get("users", 0.0) * users
+        projected += self.per_entity.get("roles", 0.0) * roles
+        projected += self.per_entity.get("permissions", 0.0) * permissions
+        projected += self.per_entity.get("sessions", 0.0) * sessions
+        return int(projected)
+
+
+def _sum(objects: Iterable[object], seen: set[int], skip_attrs: frozenset[str] = frozenset()) -> int:
+    return sum(deep_size(obj, seen, skip_attrs) for obj in objects)
+
+
+def _top_allocations(limit: int) -> list[tuple[str, int]]:
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, "*rbac*")])
+    return [
+        (f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size)
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def memory_report(manager, top: int = 10) -> MemoryReport:
+    """Measures `manager` (an `RBACManager`) and everything it holds."""
+    traced_bytes, top_allocations = None, []
+    if tracemalloc.is_tracing():
+        # Sample before walking: the `seen` set below is itself traced.
+        traced_bytes = tracemalloc.get_traced_memory()[0]
+        top_allocations = _top_allocations(top)
+    storage = manager.storage
+    users = storage.get_all_users()
+    roles = storage.get_all_roles()
+    permissions = storage.get_all_permissions()
+    sessions = list(manager.sessions.values())
+    seen: set[int] = set()
+    # Entities referenced by users and roles (e.g. `Role.parents`) are charged
+    # to their own category, so count permissions, then roles, then users.
+    categories = {
+        "models.permissions": _sum(permissions, seen),
+        "models.roles": _sum(roles, seen, _ROLE_CACHE_ATTRS),
+        "models.users": _sum(users, seen),
+        "storage": deep_size(storage, seen),
+        "constraints.ssd": deep_size(manager.ssd, seen),
+        "constraints.dsd": deep_size(manager.dsd, seen),
+        "sessions": _sum(sessions, seen),
+        "caches.compiled": deep_size(manager.compiled, seen) if manager.compiled is not None else 0,
+        "caches.hierarchy": deep_size(manager._hierarchy, seen) if manager._hierarchy is not None else 0,
+        "caches.patterns": deep_size(manager._patterns, seen),
+        "caches.ssd_counts": deep_size(manager._ssd_counts, seen),
+        "caches.constraint_closures": _sum(
+            (c for c in (manager._ssd_closure, manager._dsd_closure) if c is not None), seen
+        ),
+        "caches.role_matchers": _sum((r._matcher for r in roles if r._matcher is not None), seen),
+        "caches.name_filter": deep_size(manager.name_filter, seen) if manager.name_filter is not None else 0,
+        "caches.token_dictionary": deep_size(manager._dictionary, seen) if manager._dictionary is not None else 0,
+        "caches.expiry_heap": deep_size(manager._expiry_heap, seen),
+    }
+    counts = {
+        "users": len(users),
+        "roles": len(roles),
+        "permissions": len(permissions),
+        "sessions": len(sessions),
+        "assignments": sum(len(u.roles) for u in users),
+        "grants": sum(len(r.permissions) for r in roles),
+    }
+    per_entity = {
+        "users": categories["models.users"] / counts["users"] if users else 0.0,
+        "roles": (categories["models.roles"] + categories["caches.role_matchers"]) / counts["roles"] if roles else 0.0,
+        "permissions": categories["models.permissions"] / counts["permissions"] if permissions else 0.0,
+        "sessions": categories["sessions"] / counts["sessions"] if sessions else 0.0,
+    }
+    return MemoryReport(
+        categories=categories, counts=counts, per_entity=per_entity,
+        traced_bytes=traced_bytes, top_allocations=top_allocations,
+    )
@@ -0,0 +1,187 @@
+"""
+Negative-lookup filter over registered user and permission names.
+
+Two Bloom filters answer "certainly not registered" for names that were never
+added, so checks naming deleted accounts, typos or probes are rejected without
+a storage lookup. A name the filters report as present may still be unknown
+(a false positive, or a name deleted since it was added); those checks take the
+normal path. Permission names matched by a registered wildcard pattern are not
+in the filter and must be tested against the patterns by the caller.
+
+Each filter is sized for `capacity` names, or twice the names it starts with
+if that is more, at the requested false-positive rate. `max_bytes` caps their
+combined size, trading a higher false-positive rate for memory. Once more
+names than the capacity have been added the filter reports itself `full` and
+should be rebuilt from storage. Names must be saved before they are added, and
+a rebuild must re-add the names added while it read storage (`added_since`),
+so a registered name is never reported absent.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+_MIN_BITS = 64
+_LN2 = math.log(2)
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings. The `hash_count` bit positions of a name are
+    derived from one BLAKE2b digest by double hashing.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01, max_bytes: Optional[int] = None):
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        capacity = max(capacity, 1)
+        bit_count = math.ceil(-capacity * math.log(false_positive_rate) / _LN2 ** 2)
+        if max_bytes is not None:
+            bit_count = min(bit_count, max_bytes * 8)
+        self.bit_count = max(bit_count, _MIN_BITS)
+        self.hash_count = max(1, round(self.bit_count / capacity * _LN2))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.bit_count + 7) // 8)
+
+    def _positions(self, name: str) -> Iterable[int]:
+        digest = hashlib.blake2b(name.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bit_count = self.bit_count
+        return ((h1 + i * h2) % bit_count for i in range(self.hash_count))
+
+    def add(self, name: str) -> None:
+        bits = self._bits
+        for position in self._positions(name):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, name: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] >> (position & 7) & 1 for position in self._positions(name))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Expected false-positive rate for the names added so far."""
+        return (1 - math.exp(-self.hash_count * self.count / self.bit_count)) ** self.hash_count
+
+
+@dataclass
+class NameFilterStats:
+    """Figures reported after building a name filter."""
+    users: int
+    permissions: int
+    memory_bytes: int
+    user_false_positive_rate: float
+    permission_false_positive_rate: float
+
+
+class NameFilter:
+    """
+    Bloom filters over user and permission names, plus a bounded memory of
+    rejected names so that each unknown name is logged at error level once.
+    """
+
+    def __init__(
+        self,
+        usernames: Iterable[str],
+        permission_names: Iterable[str],
+        false_positive_rate: float = 0.01,
+        capacity: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        remembered_misses: int = 1024,
+    ):
+        usernames = list(usernames)
+        permission_names = list(permission_names)
+        self.false_positive_rate = false_positive_rate
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.remembered_misses = remembered_misses
+        # Leave room to double before the next rebuild.
+        user_capacity = max(capacity or 1024, 2 * len(usernames))
+        permission_capacity = max(capacity or 1024, 2 * len(permission_names))
+        user_bytes = permission_bytes = None
+        if max_bytes is not None:
+            user_bytes = max_bytes * user_capacity // (user_capacity + permission_capacity)
+            permission_bytes = max_bytes - user_bytes
+        self.users = BloomFilter(user_capacity, false_positive_rate, user_bytes)
+        self.permissions = BloomFilter(permission_capacity, false_positive_rate, permission_bytes)
+        for name in usernames:
+            self.users.add(name)
+        for name in permission_names:
+            self.permissions.add(name)
+        self.rejected = 0
+        self._misses: OrderedDict[tuple[str, str], None] = OrderedDict()
+        self._added: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def add_names(self, usernames: Iterable[str] = (), permission_names: Iterable[str] = ()) -> None:
+        """Adds names registered since the filter was built. Not thread-safe; callers serialize adds."""
+        for name in usernames:
+            self.users.add(name)
+            self._added.append(("user", name))
+        for name in permission_names:
+            self.permissions.add(name)
+            self._added.append(("permission", name))
+
+    @property
+    def added_count(self) -> int:
+        """How many names `add_names` has added; a mark for `added_since`."""
+        return len(self._added)
+
+    def added_since(self, mark: int) -> tuple[list[str], list[str]]:
+        """The user and permission names added after `added_count` was `mark`."""
+        added = self._added[mark:]
+        return [name for kind, name in added if kind == "user"], [name for kind, name in added if kind == "permission"]
+
+    def rebuilt(self, usernames: Iterable[str], permission_names: Iterable[str]) -> NameFilter:
+        """Returns a new filter over the given names with the same settings, rejection count and logged misses."""
+        name_filter = NameFilter(
+            usernames, permission_names, self.false_positive_rate,
+            self.capacity, self.max_bytes, self.remembered_misses,
+        )
+        with self._lock:
+            name_filter.rejected = self.rejected
+            name_filter._misses = OrderedDict(self._misses)
+        return name_filter
+
+    @property
+    def full(self) -> bool:
+        """Whether more names were added than either filter was sized for."""
+        return self.users.count > self.users.capacity or self.permissions.count > self.permissions.capacity
+
+    def first_miss(self, kind: str, name: str) -> bool:
+        """
+        Counts a rejected name and returns whether it is the first rejection of
+        that (kind, name) among the most recent `remembered_misses`.
+        """
+        key = (kind, name)
+        with self._lock:
+            self.rejected += 1
+            misses = self._misses
+            if key in misses:
+                misses.move_to_end(key)
+                return False
+            misses[key] = None
+            if len(misses) > self.remembered_misses:
+                misses.popitem(last=False)
+            return True
+
+    @property
+    def stats(self) -> NameFilterStats:
+        return NameFilterStats(
+            users=self.users.count,
+            permissions=self.permissions.count,
+            memory_bytes=self.users.memory_bytes + self.permissions.memory_bytes,
+            user_false_positive_rate=self.users.false_positive_rate,
+            permission_false_positive_rate=self.permissions.false_positive_rate,
+        )
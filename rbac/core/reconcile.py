@@ -0,0 +1,459 @@
+"""
+Declarative policy reconciliation.
+
+A policy document describes the desired state:
+
+    {
+        "permissions": ["doc:read", "doc:*"],
+        "roles": {"editor": {"permissions": ["doc:read"], "parents": ["viewer"]}, "viewer": {}},
+        "users": {"alice": ["editor"]},
+        "ssd": {"duties": {"roles": ["payer", "approver"], "max_roles": 1}},
+        "dsd": {"live": {"roles": ["payer", "approver"]}}
+    }
+
+Only the sections present are managed. Entities listed in a managed section are
+made to match it exactly; entities missing from it are removed only when
+pruning, and are then also detached from users and roles outside the document.
+
+`diff_policy` computes the minimal set of changes, `validate_diff` checks the
+final state around those changes only (references, cycles, SSD for the users
+whose authorized roles or sets change, and DSD for the live sessions affected
+likewise), and `apply_diff` writes them.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from rbac.matching import is_pattern, validate_pattern
+from rbac.models import Permission, Role, Session, User
+from rbac.storage import AbstractStorage
+
+Edge = tuple[str, str]
+
+
+@dataclass
+class PolicyDiff:
+    """Changes that turn the live policy into the desired one."""
+    added_permissions: list[str] = field(default_factory=list)
+    removed_permissions: list[str] = field(default_factory=list)
+    added_roles: list[str] = field(default_factory=list)
+    removed_roles: list[str] = field(default_factory=list)
+    added_parents: list[Edge] = field(default_factory=list)
+    removed_parents: list[Edge] = field(default_factory=list)
+    added_grants: list[Edge] = field(default_factory=list)
+    removed_grants: list[Edge] = field(default_factory=list)
+    added_users: list[str] = field(default_factory=list)
+    removed_users: list[str] = field(default_factory=list)
+    added_assignments: list[Edge] = field(default_factory=list)
+    removed_assignments: list[Edge] = field(default_factory=list)
+    ssd_sets: dict[str, dict] = field(default_factory=dict)
+    removed_ssd_sets: list[str] = field(default_factory=list)
+    dsd_sets: dict[str, dict] = field(default_factory=dict)
+    removed_dsd_sets: list[str] = field(default_factory=list)
+    applied: bool = False
+
+    @property
+    def change_count(self) -> int:
+        return sum(
+            len(value) for name, value in vars(self).items() if name != "applied"
+        )
+
+    def inverse(self, previous_ssd: dict[str, dict], previous_dsd: dict[str, dict]) -> PolicyDiff:
+        """
+        Returns the diff that undoes this one. `previous_ssd` / `previous_dsd` hold
+        the definitions, before applying, of every set this diff changes or removes.
+        """
+        return PolicyDiff(
+            added_permissions=self.removed_permissions,
+            removed_permissions=self.added_permissions,
+            added_roles=self.removed_roles,
+            removed_roles=self.added_roles,
+            added_parents=self.removed_parents,
+            removed_parents=self.added_parents,
+            added_grants=self.removed_grants,
+            removed_grants=self.added_grants,
+            added_users=self.removed_users,
+            removed_users=self.added_users,
+            added_assignments=self.removed_assignments,
+            removed_assignments=self.added_assignments,
+            ssd_sets=previous_ssd,
+            removed_ssd_sets=sorted(set(self.ssd_sets) - set(previous_ssd)),
+            dsd_sets=previous_dsd,
+            removed_dsd_sets=sorted(set(self.dsd_sets) - set(previous_dsd)),
+        )
+
+
+def _names(value: Any, where: str) -> set[str]:
+    if value is None:
+        return set()
+    if isinstance(value, str) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"{where} must be a list of names")
+    return set(value)
+
+
+def normalize_document(document: dict) -> dict:
+    """Validates the shape of a policy document and converts lists to sets."""
+    unknown = set(document) - {"permissions", "roles", "users", "ssd", "dsd"}
+    if unknown:
+        raise ValueError(f"Unknown policy sections: {sorted(unknown)}")
+    normalized: dict[str, Any] = {}
+    if document.get("permissions") is not None:
+        normalized["permissions"] = _names(document["permissions"], "permissions")
+    if document.get("roles") is not None:
+        normalized["roles"] = {
+            name: (
+                _names((spec or {}).get("permissions"), f"roles.{name}.permissions"),
+                _names((spec or {}).get("parents"), f"roles.{name}.parents"),
+            )
+            for name, spec in document["roles"].items()
+        }
+    if document.get("users") is not None:
+        normalized["users"] = {
+            name: _names(roles, f"users.{name}") for name, roles in document["users"].items()
+        }
+    for section in ("ssd", "dsd"):
+        if document.get(section) is not None:
+            normalized[section] = {
+                name: {
+                    "roles": sorted(_names(spec.get("roles"), f"{section}.{name}.roles")),
+                    "max_roles": int(spec.get("max_roles", 1)),
+                }
+                for name, spec in document[section].items()
+            }
+    return normalized
+
+
+def constraint_sets(engine, sets: dict) -> dict[str, dict]:
+    """Returns an engine's sets as {name: {"roles": [...], "max_roles": n}}."""
+    limits = engine.get_limits()
+    return {
+        name: {"roles": sorted(roles), "max_roles": limits.get(name, 1)}
+        for name, roles in sets.items()
+    }
+
+
+def diff_policy(storage: AbstractStorage, ssd, dsd, document: dict, prune: bool = False) -> PolicyDiff:
+    """Computes the minimal changes from the live state to `document`."""
+    doc = normalize_document(document)
+    diff = PolicyDiff()
+    live_permissions = {p.name for p in storage.get_all_permissions()}
+    live_roles = {role.name: role for role in storage.get_all_roles()}
+    live_users = {user.username: user for user in storage.get_all_users()}
+
+    if "permissions" in doc:
+        wanted = doc["permissions"]
+        diff.added_permissions = sorted(wanted - live_permissions)
+        if prune:
+            diff.removed_permissions = sorted(live_permissions - wanted)
+
+    managed_roles = doc.get("roles", {})
+    if "roles" in doc:
+        diff.added_roles = sorted(set(managed_roles) - set(live_roles))
+        if prune:
+            diff.removed_roles = sorted(set(live_roles) - set(managed_roles))
+        for name in sorted(managed_roles):
+            permissions, parents = managed_roles[name]
+            role = live_roles.get(name)
+            have_permissions = {p.name for p in role.permissions} if role else set()
+            have_parents = {r.name for r in role.parents} if role else set()
+            diff.added_grants += [(name, p) for p in sorted(permissions - have_permissions)]
+            diff.removed_grants += [(name, p) for p in sorted(have_permissions - permissions)]
+            diff.added_parents += [(name, r) for r in sorted(parents - have_parents)]
+            diff.removed_parents += [(name, r) for r in sorted(have_parents - parents)]
+
+    managed_users = doc.get("users", {})
+    if "users" in doc:
+        diff.added_users = sorted(set(managed_users) - set(live_users))
+        if prune:
+            diff.removed_users = sorted(set(live_users) - set(managed_users))
+        for name in sorted(managed_users):
+            user = live_users.get(name)
+            have = user.get_role_names() if user else set()
+            diff.added_assignments += [(name, r) for r in sorted(managed_users[name] - have)]
+            diff.removed_assignments += [(name, r) for r in sorted(have - managed_users[name])]
+
+    # Detach pruned entities wherever they are still attached outside the document.
+    removed_roles = set(diff.removed_roles)
+    removed_permissions = set(diff.removed_permissions)
+    for name in sorted(set(live_roles) - set(managed_roles)):
+        role = live_roles[name]
+        for p in sorted(r.name for r in role.parents):
+            if name in removed_roles or p in removed_roles:
+                diff.removed_parents.append((name, p))
+        for p in sorted(p.name for p in role.permissions):
+            if name in removed_roles or p in removed_permissions:
+                diff.removed_grants.append((name, p))
+    removed_users = set(diff.removed_users)
+    for name in sorted(set(live_users) - set(managed_users)):
+        for r in sorted(live_users[name].get_role_names()):
+            if name in removed_users or r in removed_roles:
+                diff.removed_assignments.append((name, r))
+
+    for section, engine, live_sets in (
+        ("ssd", ssd, constraint_sets(ssd, ssd.get_all_sets())),
+        ("dsd", dsd, constraint_sets(dsd, dsd.get_conflict_sets())),
+    ):
+        if section not in doc:
+            continue
+        changed = {name: spec for name, spec in sorted(doc[section].items()) if live_sets.get(name) != spec}
+        removed = sorted(set(live_sets) - set(doc[section])) if prune else []
+        setattr(diff, f"{section}_sets", changed)
+        setattr(diff, f"removed_{section}_sets", removed)
+    return diff
+
+
+def _closure(role: str, parents: dict[str, set[str]], memo: dict[str, set[str]]) -> set[str]:
+    closure = memo.get(role)
+    if closure is None:
+        closure = {role}
+        stack = [role]
+        while stack:
+            for parent in parents.get(stack.pop(), ()):
+                if parent not in closure:
+                    closure.add(parent)
+                    stack.append(parent)
+        memo[role] = closure
+    return closure
+
+
+def validate_diff(storage: AbstractStorage, ssd, dsd, diff: PolicyDiff,
+                  sessions: Optional[dict[str, Session]] = None) -> None:
+    """
+    Checks the state that applying `diff` would produce, looking only at what it
+    changes, including DSD for the live `sessions` (by session id). Raises ValueError
+    listing the problems found.
+    """
+    errors: list[str] = []
+    removed_roles = set(diff.removed_roles)
+    removed_permissions = set(diff.removed_permissions)
+
+    permissions = {p.name for p in storage.get_all_permissions()}
+    permissions = (permissions | set(diff.added_permissions)) - removed_permissions
+    for name in diff.added_permissions:
+        if is_pattern(name):
+            try:
+                validate_pattern(name)
+            except ValueError as e:
+                errors.append(str(e))
+
+    parents = {role.name: {r.name for r in role.parents} for role in storage.get_all_roles()}
+    for name in diff.added_roles:
+        parents.setdefault(name, set())
+    for role, parent in diff.removed_parents:
+        parents[role].discard(parent)
+    for role, parent in diff.added_parents:
+        parents[role].add(parent)
+    for name in removed_roles:
+        parents.pop(name, None)
+
+    for role, permission in diff.added_grants:
+        if permission not in permissions:
+            errors.append(f"Role '{role}' grants unknown permission '{permission}'")
+    if removed_permissions:
+        granted = {}
+        for role in storage.get_all_roles():
+            granted[role.name] = {p.name for p in role.permissions}
+        for role, permission in diff.removed_grants:
+            granted[role].discard(permission)
+        for role, names in granted.items():
+            if role not in removed_roles and names & removed_permissions:
+                errors.append(f"Role '{role}' still grants removed permissions {sorted(names & removed_permissions)}")
+
+    for role, parent in diff.added_parents:
+        if parent not in parents:
+            errors.append(f"Role '{role}' inherits from unknown role '{parent}'")
+        elif role in _closure(parent, parents, {}):
+            errors.append(f"Adding '{parent}' as parent of '{role}' would create a cycle")
+    if removed_roles:
+        for role, names in parents.items():
+            if names & removed_roles:
+                errors.append(f"Role '{role}' still inherits from removed roles {sorted(names & removed_roles)}")
+
+    assignments = {user.username: user.get_role_names() for user in storage.get_all_users()}
+    for name in diff.added_users:
+        assignments.setdefault(name, set())
+    for user, role in diff.removed_assignments:
+        assignments[user].discard(role)
+    for user, role in diff.added_assignments:
+        if role not in parents:
+            errors.append(f"User '{user}' is assigned unknown role '{role}'")
+        assignments[user].add(role)
+    for name in diff.removed_users:
+        assignments.pop(name, None)
+    if removed_roles:
+        for user, roles in assignments.items():
+            if roles & removed_roles:
+                errors.append(f"User '{user}' still holds removed roles {sorted(roles & removed_roles)}")
+
+    for section, changed in (("ssd", diff.ssd_sets), ("dsd", diff.dsd_sets)):
+        for name, spec in changed.items():
+            if spec["max_roles"] < 1:
+                errors.append(f"{section.upper()} set '{name}' must allow at least one role")
+
+    if errors:
+        raise ValueError("Policy rejected: " + "; ".join(errors[:20]))
+    _check_ssd(ssd, diff, parents, assignments)
+    if sessions:
+        _check_dsd(dsd, diff, parents, assignments, sessions)
+
+
+def _check_ssd(ssd, diff: PolicyDiff, parents: dict[str, set[str]], assignments: dict[str, set[str]]) -> None:
+    """Checks SSD for users whose authorized roles, or the sets covering them, change."""
+    sets = constraint_sets(ssd, ssd.get_all_sets())
+    for name in diff.removed_ssd_sets:
+        sets.pop(name, None)
+    sets.update(diff.ssd_sets)
+    if not sets:
+        return
+
+    affected_roles = _affected_roles(diff, diff.ssd_sets, parents)
+    affected_users = {user for user, _ in diff.added_assignments}
+    affected_users.update(user for user, roles in assignments.items() if roles & affected_roles)
+    errors = [
+        f"SSD violation: user '{user}' would hold {count} roles of set '{name}'"
+        for user, name, count in _over_limit(sets, parents, {user: assignments.get(user, ()) for user in affected_users})
+    ]
+    if errors:
+        raise ValueError("Policy rejected: " + "; ".join(errors[:20]))
+
+
+def _check_dsd(dsd, diff: PolicyDiff, parents: dict[str, set[str]], assignments: dict[str, set[str]],
+               sessions: dict[str, Session]) -> None:
+    """
+    Checks DSD for live sessions whose active roles, or the sets covering them,
+    change. Roles the diff unassigns are left out, as reconciling deactivates them.
+    """
+    sets = constraint_sets(dsd, dsd.get_conflict_sets())
+    for name in diff.removed_dsd_sets:
+        sets.pop(name, None)
+    sets.update(diff.dsd_sets)
+    if not sets:
+        return
+
+    affected_roles = _affected_roles(diff, diff.dsd_sets, parents)
+    active = {}
+    for session_id, session in sessions.items():
+        roles = session.active_roles & assignments.get(session.user.username, set())
+        if roles & affected_roles:
+            active[session_id] = roles
+    errors = [
+        f"DSD violation: session '{session_id}' would have {count} active roles of set '{name}'"
+        for session_id, name, count in _over_limit(sets, parents, active)
+    ]
+    if errors:
+        raise ValueError("Policy rejected: " + "; ".join(errors[:20]))
+
+
+def _affected_roles(diff: PolicyDiff, changed_sets: dict[str, dict], parents: dict[str, set[str]]) -> set[str]:
+    """Roles whose closure gains a parent, or reaches a role of a changed set."""
+    children: dict[str, set[str]] = {}
+    for role, names in parents.items():
+        for parent in names:
+            children.setdefault(parent, set()).add(role)
+    seeds = {role for role, _ in diff.added_parents}
+    for spec in changed_sets.values():
+        seeds.update(spec["roles"])
+    affected = set()
+    for seed in seeds:
+        affected |= _closure(seed, children, {})
+    return affected
+
+
+def _over_limit(sets: dict[str, dict], parents: dict[str, set[str]],
+                holders: dict[str, Iterable[str]]) -> list[tuple[str, str, int]]:
+    """Returns (holder, set, count) for every set a holder's roles, with their ancestors, exceed."""
+    sets_by_role: dict[str, list[str]] = {}
+    for name, spec in sets.items():
+        for role in spec["roles"]:
+            sets_by_role.setdefault(role, []).append(name)
+    memo: dict[str, set[str]] = {}
+    found = []
+    for holder in sorted(holders):
+        authorized = set()
+        for role in holders[holder]:
+            authorized |= _closure(role, parents, memo)
+        counts: dict[str, int] = {}
+        for role in authorized:
+            for name in sets_by_role.get(role, ()):
+                counts[name] = counts.get(name, 0) + 1
+        for name, count in sorted(counts.items()):
+            if count > sets[name]["max_roles"]:
+                found.append((holder, name, count))
+    return found
+
+
+def apply_diff(storage: AbstractStorage, ssd, dsd, diff: PolicyDiff) -> None:
+    """
+    Writes `diff` to storage and the constraint engines. Entities are fetched with
+    batched lookups and saved in one unit of work; deletions follow the constraint
+    changes. Every step is idempotent, so a partially applied diff can be undone by
+    applying its inverse.
+    """
+    permissions = storage.get_permissions(
+        set(diff.added_permissions) | {permission for _, permission in diff.added_grants}
+    )
+    roles = storage.get_roles(
+        set(diff.added_roles)
+        | {name for name, _ in diff.removed_grants + diff.removed_parents + diff.added_grants}
+        | {name for link in diff.added_parents for name in link}
+        | {role_name for _, role_name in diff.added_assignments}
+    )
+    users = storage.get_users(
+        set(diff.added_users) | {name for name, _ in diff.removed_assignments + diff.added_assignments}
+    )
+
+    with storage.unit_of_work() as work:
+        for name in diff.added_permissions:
+            if name not in permissions:
+                permissions[name] = Permission(name)
+                work.save_permission(permissions[name])
+        for name in diff.added_roles:
+            if name not in roles:
+                roles[name] = Role(name)
+                work.save_role(roles[name])
+
+        for name, permission in diff.removed_grants:
+            if name in roles:
+                roles[name].remove_permission(permission)
+                work.save_role(roles[name])
+        for name, parent in diff.removed_parents:
+            if name in roles:
+                roles[name].remove_parent(parent)
+                work.save_role(roles[name])
+        for name, permission in diff.added_grants:
+            roles[name].add_permission(permissions[permission])
+            work.save_role(roles[name])
+        for name, parent in diff.added_parents:
+            roles[name].add_parent(roles[parent])
+            work.save_role(roles[name])
+
+        for name in diff.added_users:
+            if name not in users:
+                users[name] = User(name)
+                work.save_user(users[name])
+        for name, role_name in diff.removed_assignments:
+            if name in users:
+                users[name].remove_role(role_name)
+                work.save_user(users[name])
+        for name, role_name in diff.added_assignments:
+            users[name].add_role(roles[role_name])
+            work.save_user(users[name])
+
+    existing = ssd.get_all_sets()
+    for name in diff.removed_ssd_sets:
+        if name in existing:
+            ssd.remove_set(name)
+    for name, spec in diff.ssd_sets.items():
+        ssd.add_set(name, set(spec["roles"]), spec["max_roles"])
+    for name in diff.removed_dsd_sets:
+        dsd.remove_set(name)
+    for name, spec in diff.dsd_sets.items():
+        dsd.add_set(name, set(spec["roles"]), spec["max_roles"])
+
+    for name in diff.removed_users:
+        storage.delete_user(name)
+    for name in diff.removed_roles:
+        storage.delete_role(name)
+    for name in diff.removed_permissions:
+        storage.delete_permission(name)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Set, Dict
+from typing import Dict, Iterable, List, Optional, Set
 
 class DSDConstraint(ABC):
     """
@@ -7,6 +7,10 @@ class DSDConstraint(ABC):
     These constraints prevent activating conflicting roles together in a single session.
     """
 
+    #: Changes whenever conflict sets change, so sessions know when to recount.
+    #: None means the implementation does not track changes and counts are always rebuilt.
+    version: Optional[int] = None
+
     @abstractmethod
     def is_valid_assignment(self, username: str, role: str, current_roles: Set[str]) -> bool:
         """
@@ -23,9 +27,10 @@ class DSDConstraint(ABC):
         raise NotImplementedError("is_valid_activation() must be implemented")
 
     @abstractmethod
-    def add_set(self, name: str, roles: Set[str]) -> None:
+    def add_set(self, name: str, roles: Set[str], max_roles: int = 1) -> None:
         """
-        Add a named DSD constraint set. Roles in this set should not be active together in a session.
+        Add a named DSD constraint set. No more than `max_roles` roles from this
+        set may be active together in a session.
         """
         raise NotImplementedError("add_set() must be implemented")
 
@@ -42,3 +47,68 @@ class DSDConstraint(ABC):
         Retrieve all defined DSD sets and their roles.
         """
         raise NotImplementedError("get_conflict_sets() must be implemented")
+
+    def get_limits(self) -> Dict[str, int]:
+        """
+        Return the maximum number of roles that may be active together from each DSD set.
+        """
+        return {name: 1 for name in self.get_conflict_sets()}
+
+    def sets_for_role(self, role: str) -> List[str]:
+        """
+        Return the names of the DSD sets that contain `role`.
+        Implementations should override this with an index.
+        """
+        return [name for name, roles in self.get_conflict_sets().items() if role in roles]
+
+    def count_active(self, active_roles: Set[str]) -> Dict[str, int]:
+        """
+        Count, per DSD set, how many of `active_roles` it contains.
+        """
+        counts: Dict[str, int] = {}
+        for role in active_roles:
+            for name in self.sets_for_role(role):
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def can_activate(self, role: str, counts: Dict[str, int]) -> bool:
+        """
+        Check whether activating `role` keeps every DSD set within its limit,
+        given the per-set `counts` of a session's currently active roles.
+        """
+        return self.can_add([role], counts)
+
+    def limit(self, name: str) -> int:
+        """
+        Return the maximum number of roles from DSD set `name` that may be active together.
+        """
+        return self.get_limits().get(name, 1)
+
+    def can_add(self, roles: Iterable[str], counts: Dict[str, int]) -> bool:
+        """
+        Check whether activating all of `roles` (none of them counted in `counts`
+        yet) keeps every DSD set within its limit.
+        """
+        added: Dict[str, int] = {}
+        for role in roles:
+            for name in self.sets_for_role(role):
+                added[name] = added.get(name, 0) + 1
+        return all(counts.get(name, 0) + extra <= self.limit(name) for name, extra in added.items())
+
+    def track_activation(self, role: str, counts: Dict[str, int]) -> None:
+        """
+        Update per-set `counts` after `role` was activated.
+        """
+        for name in self.sets_for_role(role):
+            counts[name] = counts.get(name, 0) + 1
+
+    def track_deactivation(self, role: str, counts: Dict[str, int]) -> None:
+        """
+        Update per-set `counts` after `role` was deactivated.
+        """
+        for name in self.sets_for_role(role):
+            remaining = counts.get(name, 0) - 1
+            if remaining > 0:
+                counts[name] = remaining
+            else:
+                counts.pop(name, None)
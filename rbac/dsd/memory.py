@@ -1,4 +1,4 @@
-from typing import Dict, Set
+from typing import Dict, List, Set
 from .base import DSDConstraint
 import logging
 
@@ -7,7 +7,8 @@ logger = logging.getLogger(__name__)
 class InMemoryDSDConstraint(DSDConstraint):
     """
     In-memory implementation of Dynamic Separation of Duty (DSD) constraints.
-    Prevents simultaneous activation of conflicting roles in a session.
+    Prevents a session from activating more than a set's `max_roles` (1 by
+    default) of its roles at the same time.
     """
 
     def __init__(self, conflict_sets: Dict[str, Set[str]] = None):
@@ -15,45 +16,96 @@ class InMemoryDSDConstraint(DSDConstraint):
         Initialize the constraint manager with optional predefined conflict sets.
         """
         self.conflict_sets: Dict[str, Set[str]] = conflict_sets.copy() if conflict_sets else {}
+        self.limits: Dict[str, int] = {name: 1 for name in self.conflict_sets}
+        self.version = 0
+        self._sets_by_role: Dict[str, Set[str]] = {}
+        for name, roles in self.conflict_sets.items():
+            self._index_set(name, roles)
+
+    def _index_set(self, name: str, roles: Set[str]) -> None:
+        for role in roles:
+            self._sets_by_role.setdefault(role, set()).add(name)
+
+    def _unindex_set(self, name: str) -> None:
+        for role in self.conflict_sets.get(name, ()):
+            names = self._sets_by_role.get(role)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._sets_by_role[role]
+
+    def sets_for_role(self, role: str) -> List[str]:
+        """
+        Return the names of the DSD sets containing `role` from the role index.
+        """
+        return list(self._sets_by_role.get(role, ()))
+
+    def get_limits(self) -> Dict[str, int]:
+        """
+        Return the maximum number of roles that may be active together from each DSD set.
+        """
+        return dict(self.limits)
+
+    def limit(self, name: str) -> int:
+        """
+        Return the limit of DSD set `name` from the limits table.
+        """
+        return self.limits.get(name, 1)
+
+    def can_activate(self, role: str, counts: Dict[str, int]) -> bool:
+        """
+        Check whether activating `role` keeps every DSD set touching it within its limit.
+        """
+        return all(counts.get(name, 0) < self.limits[name] for name in self._sets_by_role.get(role, ()))
 
     def is_valid_assignment(self, username: str, role: str, current_roles: Set[str]) -> bool:
         """
         Optional: Prevent assignment of roles that could cause DSD violations in sessions.
         """
-        for rule_name, conflicting_roles in self.conflict_sets.items():
-            if role in conflicting_roles:
-                overlap = conflicting_roles.intersection(current_roles | {role})
-                if len(overlap) > 1:
-                    logger.warning(
-                        f"DSD violation during assignment: rule '{rule_name}' with roles {conflicting_roles} — attempted: {role} to {username}"
-                    )
-                    return False
+        proposed = current_roles | {role}
+        for rule_name in self._sets_by_role.get(role, ()):
+            conflicting_roles = self.conflict_sets[rule_name]
+            if len(conflicting_roles.intersection(proposed)) > self.limits[rule_name]:
+                logger.warning(
+                    f"DSD violation during assignment: rule '{rule_name}' with roles {conflicting_roles} — attempted: {role} to {username}"
+                )
+                return False
         return True
 
     def is_valid_activation(self, active_roles: Set[str]) -> bool:
         """
         Check if active roles in a session violate any DSD constraints.
         """
-        for rule_name, conflicting_roles in self.conflict_sets.items():
-            if len(conflicting_roles.intersection(active_roles)) > 1:
+        for rule_name, count in self.count_active(set(active_roles)).items():
+            if count > self.limits[rule_name]:
                 logger.warning(
-                    f"DSD violation during activation: rule '{rule_name}' with roles {conflicting_roles} — attempted active roles: {active_roles}"
+                    f"DSD violation during activation: rule '{rule_name}' with roles {self.conflict_sets[rule_name]} — attempted active roles: {active_roles}"
                 )
                 return False
         return True
 
-    def add_set(self, name: str, roles: Set[str]) -> None:
+    def add_set(self, name: str, roles: Set[str], max_roles: int = 1) -> None:
         """
-        Add a new DSD constraint set with a name.
+        Add a new DSD constraint set with a name and the number of its roles
+        that may be active together.
         """
-        self.conflict_sets[name] = roles.copy()
-        logger.info(f"DSD set '{name}' added with roles: {roles}")
+        if max_roles < 1:
+            raise ValueError(f"DSD set '{name}' must allow at least one role, got max_roles={max_roles}")
+        self._unindex_set(name)
+        self.conflict_sets[name] = set(roles)
+        self.limits[name] = max_roles
+        self._index_set(name, self.conflict_sets[name])
+        self.version += 1
+        logger.info(f"DSD set '{name}' added with roles: {roles} (max {max_roles} active)")
 
     def remove_set(self, name: str) -> None:
         """
         Remove a DSD constraint set by name.
         """
+        self._unindex_set(name)
+        self.limits.pop(name, None)
         if self.conflict_sets.pop(name, None) is not None:
+            self.version += 1
             logger.info(f"DSD set '{name}' removed.")
         else:
             logger.debug(f"DSD set '{name}' not found. No action taken.")
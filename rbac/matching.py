@@ -0,0 +1,127 @@
+"""
+Hierarchical permission names and wildcard matching.
+
+Permission names are split into segments on ``:`` (e.g. ``article:123:edit``).
+A granted permission may use wildcards:
+
+- ``*`` matches exactly one segment (``article:*:edit``).
+- ``**`` as the final segment matches one or more remaining segments (``billing:**``).
+
+Grants are compiled into a segment trie so a single check walks the trie once per
+segment of the checked name, independent of how many patterns are stored.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+SEPARATOR = ":"
+WILDCARD = "*"
+GLOBSTAR = "**"
+
+
+def is_pattern(name: str) -> bool:
+    """Returns True if the permission name contains a wildcard segment."""
+    return any(segment in (WILDCARD, GLOBSTAR) for segment in name.split(SEPARATOR))
+
+
+def validate_pattern(name: str) -> None:
+    """Raises ValueError if the permission name is not a well-formed pattern."""
+    segments = name.split(SEPARATOR)
+    for index, segment in enumerate(segments):
+        if segment == GLOBSTAR and index != len(segments) - 1:
+            raise ValueError(f"'{GLOBSTAR}' is only allowed as the last segment: '{name}'")
+
+
+def subsumes(general: str, specific: str) -> bool:
+    """
+    Returns True if every name matched by `specific` is also matched by `general`.
+    Both may be patterns: ``*`` covers any segment but ``**``, and a final ``**``
+    covers one or more segments of any kind.
+    """
+    if not is_pattern(general):
+        return general == specific
+    general_segments = general.split(SEPARATOR)
+    specific_segments = specific.split(SEPARATOR)
+    if general_segments[-1] == GLOBSTAR:
+        general_segments.pop()
+        if len(specific_segments) <= len(general_segments):
+            return False
+        specific_segments = specific_segments[:len(general_segments)]
+    elif len(specific_segments) != len(general_segments):
+        return False
+    return all(
+        g == s or (g == WILDCARD and s != GLOBSTAR)
+        for g, s in zip(general_segments, specific_segments)
+    )
+
+
+class _Node:
+    __slots__ = ("children", "terminal", "globstar")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.terminal = False
+        self.globstar = False
+
+
+class PermissionTrie:
+    """
+    Compiled matcher over a set of permission names and wildcard patterns.
+    Plain names are matched by set lookup; patterns are stored in a segment trie.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._exact: set[str] = set()
+        self._root = _Node()
+        self._pattern_count = 0
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str) -> None:
+        """Adds a permission name or pattern to the matcher."""
+        if not is_pattern(name):
+            self._exact.add(name)
+            return
+        validate_pattern(name)
+        node = self._root
+        for segment in name.split(SEPARATOR):
+            if segment == GLOBSTAR:
+                node.globstar = True
+                break
+            node = node.children.setdefault(segment, _Node())
+        else:
+            node.terminal = True
+        self._pattern_count += 1
+
+    def matches(self, name: str) -> bool:
+        """Returns True if `name` equals a stored name or matches a stored pattern."""
+        if name in self._exact:
+            return True
+        if not self._pattern_count:
+            return False
+
+        nodes = [self._root]
+        for segment in name.split(SEPARATOR):
+            next_nodes = []
+            for node in nodes:
+                if node.globstar:
+                    return True
+                child = node.children.get(segment)
+                if child is not None:
+                    next_nodes.append(child)
+                star = node.children.get(WILDCARD)
+                if star is not None and star is not child:
+                    next_nodes.append(star)
+            if not next_nodes:
+                return False
+            nodes = next_nodes
+        return any(node.terminal for node in nodes)
+
+    def __contains__(self, name: str) -> bool:
+        return self.matches(name)
+
+    def __len__(self) -> int:
+        return len(self._exact) + self._pattern_count
+
+    def __repr__(self) -> str:
+        return f"PermissionTrie(names={len(self._exact)}, patterns={self._pattern_count})"
@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+import weakref
+from typing import Callable, Iterable, Optional
+
+from rbac.matching import PermissionTrie
+
 
 class Permission:
     """Represents a permission in the RBAC system."""
@@ -17,6 +22,19 @@ class Permission:
         return f"Permission({self.name!r})"
 
 
+class RoleGeneration:
+    """
+    Counters shared by a group of roles, normally those of one storage: `value`
+    is bumped on every grant or hierarchy change to any of them, `parents` only
+    when parent links change. Caches built over the group compare against them.
+    """
+    __slots__ = ("value", "parents")
+
+    def __init__(self):
+        self.value = 0
+        self.parents = 0
+
+
 class Role:
     """Represents a role that can hold permissions and inherit from parent roles."""
 
@@ -24,16 +42,67 @@ class Role:
         self.name = name
         self.permissions: set[Permission] = set()
         self.parents: set[Role] = set()
+        self.generation: Optional[RoleGeneration] = None
+        # Bumped when this role or any ancestor changes; the cached matcher compares against it.
+        self._version = 0
+        self._children: weakref.WeakValueDictionary[int, Role] = weakref.WeakValueDictionary()
+        self._matcher: PermissionTrie | None = None
+        self._matcher_version = -1
+
+    def _changed(self, parents: bool = False) -> None:
+        """Invalidates data cached on this role and its descendants, and on their generations."""
+        generations = {}
+        stack = [self]
+        visited = set()
+        while stack:
+            role = stack.pop()
+            if id(role) in visited:
+                continue
+            visited.add(id(role))
+            role._version += 1
+            if role.generation is not None:
+                generations[id(role.generation)] = role.generation
+            stack.extend(role._children.values())
+        for generation in generations.values():
+            generation.value += 1
+            if parents:
+                generation.parents += 1
+
+    def _replace(self, permissions: Iterable[Permission], parents: Iterable[Role]) -> None:
+        """Replaces the direct grants and parent links, e.g. when loading a stored role."""
+        for parent in self.parents:
+            parent._children.pop(id(self), None)
+        self.permissions = set(permissions)
+        self.parents = set(parents)
+        for parent in self.parents:
+            parent._children[id(self)] = self
+        self._changed(parents=True)
 
     def add_permission(self, permission: Permission) -> None:
         """Adds a permission to the role."""
         self.permissions.add(permission)
+        self._changed()
+
+    def remove_permission(self, permission_name: str) -> None:
+        """Removes a directly granted permission by name, if present."""
+        self.permissions = {p for p in self.permissions if p.name != permission_name}
+        self._changed()
 
     def add_parent(self, parent_role: Role) -> None:
         """Adds a parent role if it doesn't create a circular inheritance."""
         if self._creates_cycle(parent_role):
             raise ValueError(f"Adding {parent_role.name} as parent would create a cycle")
         self.parents.add(parent_role)
+        parent_role._children[id(self)] = self
+        self._changed(parents=True)
+
+    def remove_parent(self, parent_name: str) -> None:
+        """Removes a parent role by name, if present."""
+        for parent in self.parents:
+            if parent.name == parent_name:
+                parent._children.pop(id(self), None)
+        self.parents = {r for r in self.parents if r.name != parent_name}
+        self._changed(parents=True)
 
     def _creates_cycle(self, parent_role: Role) -> bool:
         """Detects cycle in the inheritance graph if this parent is added."""
@@ -61,6 +130,17 @@ class Role:
             perms |= parent.get_all_permissions(visited)
         return perms
 
+    def get_matcher(self) -> PermissionTrie:
+        """Returns the compiled matcher over this role's effective grants."""
+        if self._matcher_version != self._version:
+            self._matcher = PermissionTrie(p.name for p in self.get_all_permissions())
+            self._matcher_version = self._version
+        return self._matcher
+
+    def grants(self, permission_name: str) -> bool:
+        """Checks if the role grants the permission, directly, by inheritance or by wildcard."""
+        return self.get_matcher().matches(permission_name)
+
     def __repr__(self) -> str:
         return f"Role({self.name!r})"
 
@@ -77,11 +157,21 @@ class User:
     def __init__(self, username: str):
         self.username = username
         self.roles: set[Role] = set()
+        self.expirations: dict[str, float] = {}
 
     def add_role(self, role: Role) -> None:
         """Assigns a role to the user."""
         self.roles.add(role)
 
+    def remove_role(self, role_name: str) -> None:
+        """Removes an assigned role by name, if present, along with its expiry."""
+        self.roles = {role for role in self.roles if role.name != role_name}
+        self.expirations.pop(role_name, None)
+
+    def has_role(self, role_name: str) -> bool:
+        """Checks if the role is directly assigned to the user."""
+        return Role(role_name) in self.roles
+
     def get_role_names(self) -> set[str]:
         """Returns the names of all roles assigned to the user."""
         return {role.name for role in self.roles}
@@ -95,7 +185,7 @@ class User:
 
     def has_permission(self, permission: Permission) -> bool:
         """Checks if the user has the given permission."""
-        return permission in self.get_all_permissions()
+        return any(role.grants(permission.name) for role in self.roles)
 
     def __repr__(self) -> str:
         return f"User({self.username}, roles={[r.name for r in self.roles]})"
@@ -105,16 +195,76 @@ class Session:
     """
     Represents a user session that optionally activates a subset of roles.
     Useful for enforcing DSD (Dynamic Separation of Duty) constraints.
+
+    When a DSD engine is attached, activations are validated against it using
+    per-session counters of active roles in each DSD set, so each activation
+    only looks at the sets containing that role.
+
+    `closure`, if given, returns the current mapping from a role name to the
+    constrained roles it stands for (itself and inherited roles). Active roles
+    are then counted through it, each distinct inherited role once.
     """
 
-    def __init__(self, user: User, active_roles: set[str]):
+    def __init__(self, user: User, active_roles: set[str], dsd=None, session_id: Optional[str] = None,
+                 closure: Optional[Callable[[], Callable[[str], Iterable[str]]]] = None):
         self.user = user
         self.active_roles: set[str] = active_roles or set()
+        self.session_id = session_id
+        self.dsd = dsd
+        self.closure = closure
+        self._dsd_refs: dict[str, int] = {}
+        self._dsd_counts: dict[str, int] = {}
+        self._dsd_key: Optional[tuple] = None
+
+    def _expand(self) -> Callable[[str], Iterable[str]]:
+        """
+        Returns the role expansion in effect, recounting the per-DSD-set counts of
+        active roles if the sets or the closure changed.
+        """
+        closure = self.closure() if self.closure is not None else None
+        key = (self.dsd.version, closure)
+        if key[0] is None or key != self._dsd_key:
+            refs: dict[str, int] = {}
+            for role in self.active_roles:
+                for name in closure(role) if closure is not None else (role,):
+                    refs[name] = refs.get(name, 0) + 1
+            self._dsd_refs = refs
+            self._dsd_counts = self.dsd.count_active(set(refs))
+            self._dsd_key = key
+        return closure if closure is not None else lambda role: (role,)
 
     def activate_role(self, role: str) -> None:
-        """Activates a role if it's assigned to the user."""
-        if role in self.user.get_role_names():
-            self.active_roles.add(role)
+        """
+        Activates a role if it's assigned to the user.
+        Raises ValueError if the activation would violate a DSD constraint.
+        """
+        if role in self.active_roles or not self.user.has_role(role):
+            return
+        if self.dsd is not None:
+            expanded = self._expand()(role)
+            refs = self._dsd_refs
+            if not self.dsd.can_add([name for name in expanded if name not in refs], self._dsd_counts):
+                raise ValueError(f"DSD violation: Cannot activate role '{role}' in this session.")
+            for name in expanded:
+                refs[name] = refs.get(name, 0) + 1
+                if refs[name] == 1:
+                    self.dsd.track_activation(name, self._dsd_counts)
+        self.active_roles.add(role)
+
+    def deactivate_role(self, role: str) -> None:
+        """Deactivates a role if it's active."""
+        if role not in self.active_roles:
+            return
+        if self.dsd is not None:
+            refs = self._dsd_refs
+            for name in self._expand()(role):
+                remaining = refs.get(name, 0) - 1
+                if remaining > 0:
+                    refs[name] = remaining
+                else:
+                    refs.pop(name, None)
+                    self.dsd.track_deactivation(name, self._dsd_counts)
+        self.active_roles.discard(role)
 
     def __repr__(self) -> str:
         return f"Session(user={self.user.username!r})"
@@ -16,6 +16,9 @@ class DSDConflictSetRequest(BaseModel):
         example={"Editor", "Publisher"},
         min_length=2
     )
+    max_roles: int = Field(
+        1, ge=1, description="Maximum number of roles from the set active together in a session", example=1,
+    )
 
 
 class DSDConflictSetUpdateRequest(BaseModel):
@@ -28,6 +31,9 @@ class DSDConflictSetUpdateRequest(BaseModel):
         example={"Editor", "Reviewer"},
         min_length=2
     )
+    max_roles: int = Field(
+        1, ge=1, description="Maximum number of roles from the set active together in a session", example=1,
+    )
 
 
 class DSDConflictSetsResponse(BaseModel):
@@ -42,3 +48,8 @@ class DSDConflictSetsResponse(BaseModel):
             "audit_conflict": {"Auditor", "FinanceAdmin"}
         }
     )
+    limits: dict[str, int] = Field(
+        default_factory=dict,
+        description="Maximum number of roles active together from each set",
+        example={"editorial_conflict": 1, "audit_conflict": 1}
+    )
@@ -0,0 +1,28 @@
+"""Schemas for background jobs."""
+from datetime import datetime
+from typing import Any, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class JobRequest(BaseModel):
+    """
+    Request schema for starting a background job on a snapshot of the policy.
+    """
+    kind: Literal["audit", "lint", "permission_report", "policy_diff"] = Field(
+        ..., description="Operation to run", example="audit"
+    )
+    params: dict[str, Any] = Field(
+        default_factory=dict,
+        description='Operation parameters; policy_diff takes {"document": {...}, "prune": false}',
+    )
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    progress: float = Field(..., ge=0, le=1, description="Fraction of the work done")
+    policy_version: int = Field(..., description="Policy version the job's snapshot was taken at")
+    submitted_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
@@ -19,3 +19,22 @@ class PermissionListResponse(BaseModel):
 
 class PermissionResponse(BaseModel):
     name: str
+
+class ExplainResponse(BaseModel):
+    """
+    Response schema explaining why a permission check passes or fails.
+    """
+    username: str = Field(..., description="User the check was evaluated for", example="alice")
+    permission: str = Field(..., description="Permission that was checked", example="article:12:edit")
+    granted: bool = Field(..., description="Outcome of the check")
+    path: list[str] = Field(
+        default_factory=list,
+        description="Shortest grant path: user, then roles up to the one holding the grant",
+        example=["alice", "senior_editor", "editor"],
+    )
+    matched_grant: str | None = Field(None, description="Grant that matched", example="article:*:edit")
+    nearest_misses: list[str] = Field(
+        default_factory=list,
+        description="On a deny, roles that grant the permission directly, nearest to the user's roles first",
+        example=["editor"],
+    )
@@ -0,0 +1,84 @@
+"""Schemas related to whole-policy operations."""
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class CompileStatsResponse(BaseModel):
+    """
+    Response schema describing a freshly compiled policy.
+    """
+    compile_seconds: float = Field(..., description="Wall time spent compiling", example=0.012)
+    memory_bytes: int = Field(..., description="Approximate size of the decision table", example=48213)
+    users: int = Field(..., description="Number of users in the table", example=1200)
+    role_groups: int = Field(..., description="Distinct role sets shared by users", example=14)
+    roles: int = Field(..., description="Number of compiled roles", example=30)
+    permissions: int = Field(..., description="Number of indexed concrete permissions", example=250)
+
+
+class LintReportResponse(BaseModel):
+    """
+    Response schema for a policy lint run.
+    """
+    redundant_parents: list[tuple[str, str]] = Field(
+        default_factory=list, description="(role, parent) links implied by another parent",
+        example=[["admin", "viewer"]],
+    )
+    redundant_grants: list[tuple[str, str]] = Field(
+        default_factory=list, description="(role, permission) grants already inherited",
+        example=[["admin", "read"]],
+    )
+    redundant_assignments: list[tuple[str, str]] = Field(
+        default_factory=list, description="(user, role) assignments implied by another assigned role",
+        example=[["alice", "viewer"]],
+    )
+    traversal_cost_before: int = Field(..., description="Hierarchy traversal steps for all users before reduction")
+    traversal_cost_after: int = Field(..., description="Hierarchy traversal steps after reduction")
+    traversal_saved: int = Field(..., description="Traversal steps removed by the reduction")
+    applied: bool = Field(..., description="Whether the reduction was applied")
+
+
+class RoleSpec(BaseModel):
+    permissions: list[str] = Field(default_factory=list, description="Permissions granted directly")
+    parents: list[str] = Field(default_factory=list, description="Roles this role inherits from")
+
+
+class ConstraintSetSpec(BaseModel):
+    roles: list[str] = Field(..., description="Roles in the set", example=["payer", "approver"])
+    max_roles: int = Field(1, ge=1, description="Maximum number of roles from the set", example=1)
+
+
+class PolicyDocument(BaseModel):
+    """
+    Desired policy state. Omitted sections are left untouched.
+    """
+    permissions: Optional[list[str]] = Field(None, example=["doc:read", "doc:write"])
+    roles: Optional[dict[str, RoleSpec]] = Field(
+        None, example={"editor": {"permissions": ["doc:write"], "parents": ["viewer"]}},
+    )
+    users: Optional[dict[str, list[str]]] = Field(None, example={"alice": ["editor"]})
+    ssd: Optional[dict[str, ConstraintSetSpec]] = None
+    dsd: Optional[dict[str, ConstraintSetSpec]] = None
+
+
+class PolicyDiffResponse(BaseModel):
+    """
+    Response schema listing the changes a reconcile applied, or would apply on a dry run.
+    """
+    added_permissions: list[str]
+    removed_permissions: list[str]
+    added_roles: list[str]
+    removed_roles: list[str]
+    added_parents: list[tuple[str, str]] = Field(..., description="(role, parent) links")
+    removed_parents: list[tuple[str, str]]
+    added_grants: list[tuple[str, str]] = Field(..., description="(role, permission) grants")
+    removed_grants: list[tuple[str, str]]
+    added_users: list[str]
+    removed_users: list[str]
+    added_assignments: list[tuple[str, str]] = Field(..., description="(user, role) assignments")
+    removed_assignments: list[tuple[str, str]]
+    ssd_sets: dict[str, ConstraintSetSpec] = Field(..., description="SSD sets added or changed")
+    removed_ssd_sets: list[str]
+    dsd_sets: dict[str, ConstraintSetSpec] = Field(..., description="DSD sets added or changed")
+    removed_dsd_sets: list[str]
+    change_count: int = Field(..., description="Total number of changes")
+    applied: bool = Field(..., description="False for a dry run or an empty diff")
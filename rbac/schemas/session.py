@@ -23,5 +23,6 @@ class SessionResponse(BaseModel):
     """
     Response schema after a session is successfully created.
     """
+    session_id: str = Field(..., description="Identifier of the live session", example="3f2b9c0e1d8a4e7b")
     username: str = Field(..., description="Username associated with the session", example="alice")
     active_roles: Set[str] = Field(..., description="Active roles in the session", example={"Editor", "Auditor"})
@@ -17,6 +17,9 @@ class SSDCreateRequest(BaseModel):
         example=["Admin", "Auditor"],
         min_length=2
     )
+    max_roles: int = Field(
+        1, ge=1, description="Maximum number of roles from the set a user may hold", example=1,
+    )
 
 class SSDListResponse(BaseModel):
     """
@@ -27,4 +30,24 @@ class SSDListResponse(BaseModel):
         description="Dictionary of SSD conflict set names and their roles",
         example={"admin_exclusive": ["Admin", "Auditor"]}
     )
+    limits: dict[str, int] = Field(
+        default_factory=dict,
+        description="Maximum number of roles a user may hold from each set",
+        example={"admin_exclusive": 1}
+    )
+
 
+class ConstraintViolationResponse(BaseModel):
+    set_name: str = Field(..., description="Violated constraint set", example="admin_exclusive")
+    subject: str = Field(..., description="Username (SSD) or session ID (DSD)", example="alice")
+    roles: List[str] = Field(..., description="Roles from the set held by the subject", example=["Admin", "Auditor"])
+
+class ConstraintAuditResponse(BaseModel):
+    """
+    Response model for a bulk SSD/DSD compliance audit.
+    """
+    ssd_violations: List[ConstraintViolationResponse] = Field(default_factory=list)
+    dsd_violations: List[ConstraintViolationResponse] = Field(default_factory=list)
+    users_scanned: int = Field(..., description="Users checked against SSD sets")
+    sessions_scanned: int = Field(..., description="Live sessions checked against DSD sets")
+    elapsed_seconds: float = Field(..., description="Time spent on the audit")
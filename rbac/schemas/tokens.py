@@ -0,0 +1,29 @@
+"""Schemas for capability tokens."""
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class TokenRequest(BaseModel):
+    """
+    Request schema for a capability token. Give either a username or a session ID.
+    """
+    username: Optional[str] = Field(None, description="User whose effective permissions are embedded", example="alice")
+    session_id: Optional[str] = Field(None, description="Session whose active roles are embedded")
+    ttl_seconds: int = Field(300, ge=1, le=86_400, description="Token lifetime in seconds", example=300)
+
+
+class TokenResponse(BaseModel):
+    token: str = Field(..., description="Base64url token to present to downstream services")
+    expires_at: datetime = Field(..., description="When the token stops being accepted")
+    policy_version: int = Field(..., description="Policy version the token was issued at", example=42)
+    dictionary_version: int = Field(..., description="Version of the permission dictionary the bitmap indexes")
+
+
+class PermissionDictionaryResponse(BaseModel):
+    """
+    The permission dictionary verifiers need to decode token bitmaps.
+    """
+    version: int = Field(..., description="Content-derived dictionary version")
+    policy_version: int = Field(..., description="Current policy version; raise verifiers' minimum to reject older tokens")
+    permissions: list[str] = Field(..., description="Permission names in bit order", example=["doc:read", "doc:write"])
@@ -1,6 +1,7 @@
 """Schemas related to User operations."""
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 class UserResponse(BaseModel):
     username: str
@@ -16,6 +17,9 @@ class UserCreate(BaseModel):
 class GetUserRolesResponse(BaseModel):
     username: str
     roles: list[str]
+    expirations: dict[str, datetime] = Field(
+        default_factory=dict, description="Expiry time of each temporary assignment",
+    )
 
 class RemoveUserRoleResponse(BaseModel):
     username: str
@@ -27,4 +31,19 @@ class AssignRole(BaseModel):
     """
     username: str = Field(..., description="Username to assign the role to", example="alice")
     role: str = Field(..., description="Role to assign to the user", example="Editor")
+    expires_at: Optional[datetime] = Field(
+        None, description="When the assignment is revoked automatically; permanent if omitted",
+        example="2026-01-01T08:00:00Z",
+    )
 
+class BulkAssignRoles(BaseModel):
+    """
+    Request schema for assigning many roles at once. Either every assignment is applied or none is.
+    """
+    assignments: list[RoleAssignment] = Field(
+        ..., description="(username, role_name) pairs to assign",
+        example=[{"username": "alice", "role_name": "Editor"}, {"username": "bob", "role_name": "Viewer"}],
+    )
+    expires_at: Optional[datetime] = Field(
+        None, description="When every assignment in the batch is revoked automatically; permanent if omitted",
+    )
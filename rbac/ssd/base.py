@@ -1,11 +1,20 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, Optional
 
 class AbstractSSDConstraint(ABC):
+    #: Changes whenever sets or limits change, so cached per-user counts know when to recount.
+    #: None means the implementation does not track changes and counts are always rebuilt.
+    version: Optional[int] = None
+    #: True when `can_add` and the counting hooks below enforce the engine's whole rule,
+    #: so assignments are checked against cached per-user counts. Engines that only
+    #: implement `is_valid_assignment` leave it False and are asked through it instead.
+    counts_assignments: bool = False
+
     @abstractmethod
-    def add_set(self, name: str, roles: set[str]) -> None:
+    def add_set(self, name: str, roles: set[str], max_roles: int = 1) -> None:
         """
         Add a Static Separation of Duty (SSD) constraint set with a unique name.
-        Users cannot be assigned more than one role from this set.
+        Users cannot be assigned more than `max_roles` roles from this set.
         """
         raise NotImplementedError
 
@@ -30,3 +39,68 @@ class AbstractSSDConstraint(ABC):
         would violate any SSD constraint.
         """
         raise NotImplementedError
+
+    def get_limits(self) -> dict[str, int]:
+        """
+        Return the maximum number of roles a user may hold from each SSD set.
+        """
+        return {name: 1 for name in self.get_all_sets()}
+
+    def sets_for_role(self, role: str) -> list[str]:
+        """
+        Return the names of the SSD sets that contain `role`.
+        Implementations should override this with an index.
+        """
+        return [name for name, roles in self.get_all_sets().items() if role in roles]
+
+    def count_assigned(self, roles: set[str]) -> dict[str, int]:
+        """
+        Count, per SSD set, how many of a user's `roles` it contains.
+        """
+        counts: dict[str, int] = {}
+        for role in roles:
+            for name in self.sets_for_role(role):
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def can_assign(self, role: str, counts: dict[str, int]) -> bool:
+        """
+        Check whether assigning `role` keeps every SSD set within its limit,
+        given the per-set `counts` of the user's current roles.
+        """
+        return self.can_add([role], counts)
+
+    def limit(self, name: str) -> int:
+        """
+        Return the maximum number of roles a user may hold from SSD set `name`.
+        """
+        return self.get_limits().get(name, 1)
+
+    def can_add(self, roles: Iterable[str], counts: dict[str, int]) -> bool:
+        """
+        Check whether adding all of `roles` (none of them counted in `counts` yet)
+        keeps every SSD set within its limit.
+        """
+        added: dict[str, int] = {}
+        for role in roles:
+            for name in self.sets_for_role(role):
+                added[name] = added.get(name, 0) + 1
+        return all(counts.get(name, 0) + extra <= self.limit(name) for name, extra in added.items())
+
+    def track_assignment(self, role: str, counts: dict[str, int]) -> None:
+        """
+        Update per-set `counts` after `role` was assigned.
+        """
+        for name in self.sets_for_role(role):
+            counts[name] = counts.get(name, 0) + 1
+
+    def track_revocation(self, role: str, counts: dict[str, int]) -> None:
+        """
+        Update per-set `counts` after `role` was revoked.
+        """
+        for name in self.sets_for_role(role):
+            remaining = counts.get(name, 0) - 1
+            if remaining > 0:
+                counts[name] = remaining
+            else:
+                counts.pop(name, None)
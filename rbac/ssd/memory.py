@@ -1,27 +1,57 @@
-from typing import Optional, Set, Dict
+from typing import Optional, Set, Dict, List
 from .base import AbstractSSDConstraint
 
 class InMemorySSDConstraint(AbstractSSDConstraint):
     """
     In-memory implementation of Static Separation of Duty (SSD) constraints.
-    Stores conflict role sets and prevents assignment of conflicting roles to a user.
+    Stores conflict role sets with a maximum number of roles a user may hold from
+    each (1 by default), and an index from role to the sets containing it.
     """
 
+    counts_assignments = True
+
     def __init__(self, conflict_sets: Optional[Dict[str, Set[str]]] = None):
         self.conflict_sets: Dict[str, Set[str]] = conflict_sets or {}
+        self.limits: Dict[str, int] = {name: 1 for name in self.conflict_sets}
+        self.version = 0
+        self._sets_by_role: Dict[str, Set[str]] = {}
+        for name, roles in self.conflict_sets.items():
+            self._index_set(name, roles)
+
+    def _index_set(self, name: str, roles: Set[str]) -> None:
+        for role in roles:
+            self._sets_by_role.setdefault(role, set()).add(name)
 
-    def add_set(self, name: str, roles: Set[str]) -> None:
+    def _unindex_set(self, name: str) -> None:
+        for role in self.conflict_sets.get(name, ()):
+            names = self._sets_by_role.get(role)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._sets_by_role[role]
+
+    def add_set(self, name: str, roles: Set[str], max_roles: int = 1) -> None:
         """
-        Add or update a named SSD set. Users may not be assigned more than one role from this set.
+        Add or update a named SSD set. Users may not be assigned more than
+        `max_roles` roles from this set.
         """
+        if max_roles < 1:
+            raise ValueError(f"SSD set '{name}' must allow at least one role, got max_roles={max_roles}")
+        self._unindex_set(name)
         self.conflict_sets[name] = roles
+        self.limits[name] = max_roles
+        self._index_set(name, roles)
+        self.version += 1
 
     def remove_set(self, name: str) -> None:
         """
         Remove a named SSD set.
         """
         if name in self.conflict_sets:
+            self._unindex_set(name)
             del self.conflict_sets[name]
+            self.limits.pop(name, None)
+            self.version += 1
         else:
             raise ValueError(f"SSD set '{name}' not found")
 
@@ -31,18 +61,40 @@ class InMemorySSDConstraint(AbstractSSDConstraint):
         """
         return {name: list(roles) for name, roles in self.conflict_sets.items()}
 
+    def get_limits(self) -> dict[str, int]:
+        """
+        Return the maximum number of roles a user may hold from each SSD set.
+        """
+        return dict(self.limits)
+
+    def sets_for_role(self, role: str) -> List[str]:
+        """
+        Return the names of the SSD sets containing `role` from the role index.
+        """
+        return list(self._sets_by_role.get(role, ()))
+
+    def limit(self, name: str) -> int:
+        """
+        Return the limit of SSD set `name` from the limits table.
+        """
+        return self.limits.get(name, 1)
+
+    def can_assign(self, role: str, counts: dict[str, int]) -> bool:
+        """
+        Check whether assigning `role` keeps every SSD set touching it within its limit.
+        """
+        return all(counts.get(name, 0) < self.limits[name] for name in self._sets_by_role.get(role, ()))
+
     def is_valid_assignment(self, username: str, new_role: str, current_roles: set[str]) -> bool:
         """
         Check if adding `new_role` to `username` with `current_roles` violates any SSD set.
         """
-        proposed_roles = set(current_roles) | {new_role}
-        return not self.is_conflicting(proposed_roles)
+        if new_role in current_roles:
+            return not self.is_conflicting(set(current_roles))
+        return self.can_assign(new_role, self.count_assigned(set(current_roles)))
 
     def is_conflicting(self, roles: set[str]) -> bool:
         """
-        Check if any SSD set has more than one role in `roles`.
+        Check if any SSD set has more than its limit of roles in `roles`.
         """
-        for role_set in self.conflict_sets.values():
-            if len(role_set & roles) > 1:
-                return True
-        return False
+        return any(count > self.limits[name] for name, count in self.count_assigned(roles).items())
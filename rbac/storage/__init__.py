@@ -1,7 +1,8 @@
-from .base import AbstractStorage
+from .base import AbstractStorage, UnitOfWork
 from .memory import InMemoryStorage
+from .journal import JournaledStorage
 
-__all__ = ["AbstractStorage", "InMemoryStorage"]
+__all__ = ["AbstractStorage", "UnitOfWork", "InMemoryStorage", "JournaledStorage"]
 
 def get_storage():
     return InMemoryStorage()
@@ -1,10 +1,51 @@
 from abc import ABC, abstractmethod
-from typing import Optional
-from rbac.models import Role, User, Permission
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+from rbac.models import Permission, Role, RoleGeneration, User
+from rbac.storage.index import NameIndex
+
+
+class UnitOfWork:
+    """
+    Collects entity saves and writes them with a single `save_many` call when
+    the `unit_of_work()` block exits without an exception. Saving the same
+    entity twice writes it once.
+    """
+
+    def __init__(self, storage: "AbstractStorage"):
+        self.storage = storage
+        self.users: dict[str, User] = {}
+        self.roles: dict[str, Role] = {}
+        self.permissions: dict[str, Permission] = {}
+
+    def save_user(self, user: User) -> None:
+        self.users[user.username] = user
+
+    def save_role(self, role: Role) -> None:
+        self.roles[role.name] = role
+
+    def save_permission(self, permission: Permission) -> None:
+        self.permissions[permission.name] = permission
+
+    def commit(self) -> None:
+        """Writes the collected entities and starts a fresh batch."""
+        if self.users or self.roles or self.permissions:
+            self.storage.save_many(
+                users=list(self.users.values()),
+                roles=list(self.roles.values()),
+                permissions=list(self.permissions.values()),
+            )
+        self.users, self.roles, self.permissions = {}, {}, {}
+
 
 class AbstractStorage(ABC):
     """Abstract base class defining storage interface for RBAC entities."""
 
+    #: Counters bumped when the roles this backend holds change. Backends that
+    #: hand out the same `Role` objects on every call set it on each stored role;
+    #: it stays None for backends that load fresh objects.
+    role_generation: Optional[RoleGeneration] = None
+
     @abstractmethod
     def save_user(self, user: User) -> None:
         """Persist or update a user in storage."""
@@ -49,3 +90,113 @@ class AbstractStorage(ABC):
     def get_all_permissions(self) -> list[Permission]:
         """Return a list of all permissions."""
         raise NotImplementedError("get_all_permissions must be implemented by subclass")
+
+    def delete_user(self, username: str) -> None:
+        """Remove a user. Backends that support deletion override this."""
+        raise NotImplementedError(f"{type(self).__name__} does not support deleting users")
+
+    def delete_role(self, name: str) -> None:
+        """Remove a role. Callers detach it from users and child roles first."""
+        raise NotImplementedError(f"{type(self).__name__} does not support deleting roles")
+
+    def delete_permission(self, name: str) -> None:
+        """Remove a permission. Callers revoke it from roles first."""
+        raise NotImplementedError(f"{type(self).__name__} does not support deleting permissions")
+
+    # --- Policy version ---
+    # The default keeps the version on the storage object; backends shared
+    # between processes should store it with the policy.
+
+    _policy_version = 0
+
+    def get_policy_version(self) -> int:
+        """Return the policy version: a counter raised whenever access is revoked."""
+        return self._policy_version
+
+    def save_policy_version(self, version: int) -> None:
+        """Persist a new policy version."""
+        self._policy_version = version
+
+    # --- Name search ---
+    # The defaults scan and sort the full listing; backends with an ordered
+    # index over names should answer these from it.
+
+    def find_users(
+        self, prefix: str = "", start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None,
+    ) -> list[User]:
+        """Users whose names start with `prefix` and fall in [`start`, `end`), sorted by name, at most `limit`."""
+        users = {user.username: user for user in self.get_all_users()}
+        return [users[name] for name in NameIndex(users).query(prefix, start, end, limit)]
+
+    def find_roles(
+        self, prefix: str = "", start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None,
+    ) -> list[Role]:
+        """Roles whose names start with `prefix` and fall in [`start`, `end`), sorted by name, at most `limit`."""
+        roles = {role.name: role for role in self.get_all_roles()}
+        return [roles[name] for name in NameIndex(roles).query(prefix, start, end, limit)]
+
+    def find_permissions(
+        self, prefix: str = "", start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None,
+    ) -> list[Permission]:
+        """Permissions whose names start with `prefix` and fall in [`start`, `end`), sorted by name, at most `limit`."""
+        permissions = {permission.name: permission for permission in self.get_all_permissions()}
+        return [permissions[name] for name in NameIndex(permissions).query(prefix, start, end, limit)]
+
+    # --- Batched access ---
+    # The defaults below loop over the single-entity methods; backends with a
+    # per-call round trip should override them with one query or request each.
+
+    def get_users(self, usernames: Iterable[str]) -> dict[str, User]:
+        """Retrieve many users at once, keyed by username. Unknown names are omitted."""
+        found = {}
+        for username in usernames:
+            user = self.get_user(username)
+            if user is not None:
+                found[username] = user
+        return found
+
+    def get_roles(self, names: Iterable[str]) -> dict[str, Role]:
+        """Retrieve many roles at once, keyed by name. Unknown names are omitted."""
+        found = {}
+        for name in names:
+            role = self.get_role(name)
+            if role is not None:
+                found[name] = role
+        return found
+
+    def get_permissions(self, names: Iterable[str]) -> dict[str, Permission]:
+        """Retrieve many permissions at once, keyed by name. Unknown names are omitted."""
+        found = {}
+        for name in names:
+            permission = self.get_permission(name)
+            if permission is not None:
+                found[name] = permission
+        return found
+
+    def save_many(
+        self,
+        users: Iterable[User] = (),
+        roles: Iterable[Role] = (),
+        permissions: Iterable[Permission] = (),
+    ) -> None:
+        """
+        Persist many entities in one write. Permissions are written before roles
+        and roles before users, so references always resolve.
+        """
+        for permission in permissions:
+            self.save_permission(permission)
+        for role in roles:
+            self.save_role(role)
+        for user in users:
+            self.save_user(user)
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator[UnitOfWork]:
+        """
+        Groups saves into one `save_many` at the end of the block. If the block
+        raises nothing is written; in-memory entities already mutated by the
+        caller are not rolled back.
+        """
+        work = UnitOfWork(self)
+        yield work
+        work.commit()
@@ -0,0 +1,70 @@
+"""Ordered name index with prefix and range queries."""
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Iterable, Optional
+
+# Batches larger than this are merged with one sort instead of repeated inserts.
+_MERGE_THRESHOLD = 32
+
+
+class NameIndex:
+    """
+    Sorted list of unique names. Lookups bisect to the first candidate and walk
+    forward, so a query costs O(log n + k) for k results; inserts and removals
+    shift the list, which is a memmove even for large catalogs.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names = sorted(set(names))
+
+    def add(self, name: str) -> None:
+        names = self._names
+        i = bisect_left(names, name)
+        if i == len(names) or names[i] != name:
+            names.insert(i, name)
+
+    def add_many(self, names: Iterable[str]) -> None:
+        names = list(names)
+        if len(names) > _MERGE_THRESHOLD:
+            self._names = sorted(set(self._names).union(names))
+        else:
+            for name in names:
+                self.add(name)
+
+    def discard(self, name: str) -> None:
+        names = self._names
+        i = bisect_left(names, name)
+        if i < len(names) and names[i] == name:
+            del names[i]
+
+    def query(
+        self,
+        prefix: str = "",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[str]:
+        """
+        Returns names starting with `prefix` and in [`start`, `end`), in order,
+        at most `limit` of them.
+        """
+        names = self._names
+        i = bisect_left(names, prefix if start is None or start < prefix else start)
+        stop = len(names) if end is None else bisect_left(names, end, lo=i)
+        if limit is not None:
+            stop = min(stop, i + max(limit, 0))
+        if not prefix:
+            return names[i:stop]
+        found = []
+        while i < stop and names[i].startswith(prefix):
+            found.append(names[i])
+            i += 1
+        return found
+
+    def __contains__(self, name: str) -> bool:
+        i = bisect_left(self._names, name)
+        return i < len(self._names) and self._names[i] == name
+
+    def __len__(self) -> int:
+        return len(self._names)
@@ -0,0 +1,518 @@
+"""
+Append-only journal for `InMemoryStorage` and the in-memory SSD/DSD engines.
+
+Each mutation is encoded as a compact binary record:
+
+    <u32 payload length> <u32 crc32 of payload> <payload>
+
+where the payload starts with a one-byte opcode followed by length-prefixed
+UTF-8 strings and string lists. User records may end with a map of role name to
+expiry timestamp (little-endian f64), and SSD/DSD set records with a u32
+`max_roles`; older records without these fields have no expiries and a limit of 1.
+The policy version (see `AbstractStorage.get_policy_version`) is a u32 record of
+its own. Records are full upserts of one entity, so replaying a record twice is
+harmless.
+
+Concurrent writers are batched: each writer enqueues its record and waits; the
+first waiter without a flush in progress becomes the leader, writes every
+pending record and issues a single fsync for the whole batch (group commit).
+`save_many` enqueues all of its records as one entry, so a bulk write costs one
+commit; a crash part-way through it may keep only a prefix of those records.
+
+Compaction writes the whole state as a checkpoint file (same record format),
+atomically replaces the previous checkpoint and truncates the journal. Startup
+replays the checkpoint and then the journal, stopping at the first torn record.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+import zlib
+from functools import partial
+from typing import Callable, Iterable, Iterator
+
+from rbac.dsd.memory import InMemoryDSDConstraint
+from rbac.models import Permission, Role, User
+from rbac.ssd.memory import InMemorySSDConstraint
+from rbac.storage.base import AbstractStorage
+from rbac.storage.memory import InMemoryStorage
+
+logger = logging.getLogger(__name__)
+
+OP_USER = 1
+OP_ROLE = 2
+OP_PERMISSION = 3
+OP_SSD_SET = 4
+OP_SSD_REMOVE = 5
+OP_DSD_SET = 6
+OP_DSD_REMOVE = 7
+OP_USER_DELETE = 8
+OP_ROLE_DELETE = 9
+OP_PERMISSION_DELETE = 10
+OP_POLICY_VERSION = 11
+
+_HEADER = struct.Struct("<II")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+
+CHECKPOINT_FILE = "checkpoint.bin"
+JOURNAL_FILE = "journal.bin"
+
+
+def encode_record(op: int, *fields) -> bytes:
+    """Encodes an opcode and its str / int / list[str] / dict[str, float] fields as one framed record."""
+    parts = [bytes([op])]
+    for value in fields:
+        if isinstance(value, str):
+            parts.append(_encode_str(value))
+        elif isinstance(value, int):
+            parts.append(_U32.pack(value))
+        elif isinstance(value, dict):
+            parts.append(_U32.pack(len(value)))
+            for key in sorted(value):
+                parts.append(_encode_str(key))
+                parts.append(_F64.pack(value[key]))
+        else:
+            parts.append(_U32.pack(len(value)))
+            parts.extend(_encode_str(item) for item in value)
+    payload = b"".join(parts)
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _encode_str(value: str) -> bytes:
+    data = value.encode("utf-8")
+    if len(data) > 0xFFFF:
+        raise ValueError(f"Name too long to journal: {value[:32]!r}...")
+    return _U16.pack(len(data)) + data
+
+
+class _Reader:
+    def __init__(self, payload: bytes):
+        self.payload = payload
+        self.offset = 1
+
+    def str(self) -> str:
+        (size,) = _U16.unpack_from(self.payload, self.offset)
+        start = self.offset + _U16.size
+        self.offset = start + size
+        return self.payload[start:self.offset].decode("utf-8")
+
+    def list(self) -> list[str]:
+        (count,) = _U32.unpack_from(self.payload, self.offset)
+        self.offset += _U32.size
+        return [self.str() for _ in range(count)]
+
+    def u32(self) -> int:
+        (value,) = _U32.unpack_from(self.payload, self.offset)
+        self.offset += _U32.size
+        return value
+
+    def floats(self) -> dict[str, float]:
+        (count,) = _U32.unpack_from(self.payload, self.offset)
+        self.offset += _U32.size
+        values = {}
+        for _ in range(count):
+            key = self.str()
+            (values[key],) = _F64.unpack_from(self.payload, self.offset)
+            self.offset += _F64.size
+        return values
+
+    def done(self) -> bool:
+        return self.offset >= len(self.payload)
+
+
+def _user_record(user: User, expiry_offset: float = 0.0) -> bytes:
+    roles = sorted(r.name for r in user.roles)
+    if user.expirations:
+        expirations = {name: expires + expiry_offset for name, expires in user.expirations.items()}
+        return encode_record(OP_USER, user.username, roles, expirations)
+    return encode_record(OP_USER, user.username, roles)
+
+
+def _role_record(role: Role) -> bytes:
+    return encode_record(
+        OP_ROLE, role.name,
+        sorted(p.name for p in role.permissions), sorted(r.name for r in role.parents),
+    )
+
+
+def read_records(data: bytes) -> Iterator[tuple[int, bytes]]:
+    """
+    Yields (end offset, payload) for every intact record in `data`, stopping at
+    the first truncated or corrupt one.
+    """
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        size, crc = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        payload = data[start:start + size]
+        if len(payload) < size or zlib.crc32(payload) != crc:
+            return
+        offset = start + size
+        yield offset, payload
+
+
+def _role(storage: InMemoryStorage, name: str) -> Role:
+    role = storage.roles.get(name)
+    if role is None:
+        role = Role(name)
+        storage.roles[name] = role
+    return role
+
+
+def _permission(storage: InMemoryStorage, name: str) -> Permission:
+    permission = storage.permissions.get(name)
+    if permission is None:
+        permission = Permission(name)
+        storage.permissions[name] = permission
+    return permission
+
+
+def _apply_record(
+    storage: InMemoryStorage, ssd: InMemorySSDConstraint, dsd: InMemoryDSDConstraint, payload: bytes,
+    expiry_offset: float = 0.0,
+) -> None:
+    """
+    Applies one record to the dicts of `storage` and the engines, bypassing any
+    journaling. `expiry_offset` is added to assignment expiry times.
+    """
+    op = payload[0]
+    reader = _Reader(payload)
+    if op == OP_USER:
+        name = reader.str()
+        user = storage.users.get(name) or User(name)
+        user.roles = {_role(storage, r) for r in reader.list()}
+        expirations = {} if reader.done() else reader.floats()
+        user.expirations = {role: expires + expiry_offset for role, expires in expirations.items()}
+        storage.users[name] = user
+    elif op == OP_ROLE:
+        role = _role(storage, reader.str())
+        permissions = [_permission(storage, p) for p in reader.list()]
+        role._replace(permissions, [_role(storage, r) for r in reader.list()])
+    elif op == OP_PERMISSION:
+        _permission(storage, reader.str())
+    elif op == OP_SSD_SET:
+        name, roles = reader.str(), set(reader.list())
+        InMemorySSDConstraint.add_set(ssd, name, roles, 1 if reader.done() else reader.u32())
+    elif op == OP_SSD_REMOVE:
+        name = reader.str()
+        if name in ssd.conflict_sets:
+            InMemorySSDConstraint.remove_set(ssd, name)
+    elif op == OP_DSD_SET:
+        name, roles = reader.str(), set(reader.list())
+        InMemoryDSDConstraint.add_set(dsd, name, roles, 1 if reader.done() else reader.u32())
+    elif op == OP_DSD_REMOVE:
+        InMemoryDSDConstraint.remove_set(dsd, reader.str())
+    elif op == OP_USER_DELETE:
+        storage.users.pop(reader.str(), None)
+    elif op == OP_ROLE_DELETE:
+        storage.roles.pop(reader.str(), None)
+    elif op == OP_PERMISSION_DELETE:
+        storage.permissions.pop(reader.str(), None)
+    elif op == OP_POLICY_VERSION:
+        InMemoryStorage.save_policy_version(storage, reader.u32())
+    else:
+        raise ValueError(f"Unknown journal opcode {op}")
+
+
+def encode_state(storage: AbstractStorage, ssd=None, dsd=None, expiry_offset: float = 0.0) -> bytes:
+    """
+    Encodes the full state of any storage backend, and optionally its SSD/DSD
+    engines, as records. `expiry_offset` is added to assignment expiry times,
+    e.g. minus the current time to store them relative to now.
+    """
+    records = [encode_record(OP_PERMISSION, name) for name in sorted(p.name for p in storage.get_all_permissions())]
+    records.extend(_role_record(role) for role in storage.get_all_roles())
+    records.extend(_user_record(user, expiry_offset) for user in storage.get_all_users())
+    if storage.get_policy_version():
+        records.append(encode_record(OP_POLICY_VERSION, storage.get_policy_version()))
+    if ssd is not None:
+        limits = ssd.get_limits()
+        for name, roles in ssd.get_all_sets().items():
+            records.append(encode_record(OP_SSD_SET, name, sorted(roles), limits.get(name, 1)))
+    if dsd is not None:
+        limits = dsd.get_limits()
+        for name, roles in dsd.get_conflict_sets().items():
+            records.append(encode_record(OP_DSD_SET, name, sorted(roles), limits.get(name, 1)))
+    return b"".join(records)
+
+
+def load_state(
+    data: bytes, expiry_offset: float = 0.0
+) -> tuple[InMemoryStorage, InMemorySSDConstraint, InMemoryDSDConstraint]:
+    """Rebuilds in-memory storage and engines from `encode_state` output, adding `expiry_offset` to expiry times."""
+    storage, ssd, dsd = InMemoryStorage(), InMemorySSDConstraint(), InMemoryDSDConstraint()
+    for _, payload in read_records(data):
+        _apply_record(storage, ssd, dsd, payload, expiry_offset)
+    storage.reindex()
+    return storage, ssd, dsd
+
+
+class Journal:
+    """Append-only record file with group commit."""
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self.records_since_checkpoint = 0
+        self.commits = 0
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._pending: list[bytes] = []
+        self._enqueued = 0
+        self._durable = 0
+        self._flushing = False
+
+    def enqueue(self, record: bytes, count: int = 1) -> int:
+        """Queues a record, or `count` concatenated records, and returns its sequence number."""
+        with self._lock:
+            self._pending.append(record)
+            self._enqueued += 1
+            self.records_since_checkpoint += count
+            return self._enqueued
+
+    def wait_durable(self, seq: int) -> None:
+        """Blocks until record `seq` is on disk, leading a group commit if no flush is running."""
+        with self._lock:
+            while self._durable < seq:
+                if self._flushing:
+                    self._flushed.wait()
+                    continue
+                batch, self._pending = self._pending, []
+                upto = self._enqueued
+                self._flushing = True
+                self._lock.release()
+                try:
+                    self._write(b"".join(batch))
+                except BaseException:
+                    self._lock.acquire()
+                    self._pending[:0] = batch
+                    self._flushing = False
+                    self._flushed.notify_all()
+                    raise
+                self._lock.acquire()
+                self._flushing = False
+                self._durable = upto
+                self.commits += 1
+                self._flushed.notify_all()
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self, checkpoint_path: str, checkpoint: bytes) -> None:
+        """
+        Atomically replaces the checkpoint with `checkpoint`, which must already
+        contain the effect of every enqueued record, then empties the journal.
+        """
+        with self._lock:
+            while self._flushing:
+                self._flushed.wait()
+            tmp_path = checkpoint_path + ".tmp"
+            with open(tmp_path, "wb") as tmp:
+                tmp.write(checkpoint)
+                tmp.flush()
+                if self.fsync:
+                    os.fsync(tmp.fileno())
+            os.replace(tmp_path, checkpoint_path)
+            self._sync_directory()
+            self._file.truncate(0)
+            self._file.seek(0)
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._pending = []
+            self._durable = self._enqueued
+            self.records_since_checkpoint = 0
+            self._flushed.notify_all()
+
+    def _sync_directory(self) -> None:
+        if not self.fsync or not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(os.path.dirname(self.path) or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JournaledStorage(InMemoryStorage):
+    """
+    `InMemoryStorage` whose mutations, and those of its `ssd` and `dsd` engines,
+    are journaled to `directory`. Pass `storage.ssd` and `storage.dsd` to
+    `RBACManager` so constraint changes are journaled too.
+
+    A mutation is applied in memory and enqueued under one lock, then the caller
+    waits for its group commit; it returns only once the record is durable.
+    """
+
+    def __init__(self, directory: str, checkpoint_every: int = 10_000, fsync: bool = True):
+        super().__init__()
+        self.directory = directory
+        self.checkpoint_every = checkpoint_every
+        self.ssd = JournaledSSDConstraint(self)
+        self.dsd = JournaledDSDConstraint(self)
+        self._state_lock = threading.RLock()
+        self._compacting = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._checkpoint_path = os.path.join(directory, CHECKPOINT_FILE)
+        journal_path = os.path.join(directory, JOURNAL_FILE)
+        self._replay(self._checkpoint_path)
+        valid = self._replay(journal_path)
+        self.reindex()
+        if os.path.exists(journal_path) and os.path.getsize(journal_path) > valid:
+            logger.warning("Truncating torn journal tail at offset %d", valid)
+            with open(journal_path, "r+b") as f:
+                f.truncate(valid)
+        self.journal = Journal(journal_path, fsync=fsync)
+
+    # --- Replay ---
+
+    def _replay(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as f:
+            data = f.read()
+        valid = 0
+        count = 0
+        for valid, payload in read_records(data):
+            self._apply(payload)
+            count += 1
+        logger.info("Replayed %d records from %s", count, path)
+        return valid
+
+    def _apply(self, payload: bytes) -> None:
+        _apply_record(self, self.ssd, self.dsd, payload)
+
+    # --- Logging ---
+
+    def _log(self, apply: Callable[[], None], record: Callable[[], bytes], count: int = 1) -> None:
+        with self._state_lock:
+            apply()
+            seq = self.journal.enqueue(record(), count)
+        self.journal.wait_durable(seq)
+        if self.checkpoint_every and self.journal.records_since_checkpoint >= self.checkpoint_every:
+            self.compact()
+
+    def save_user(self, user: User) -> None:
+        """Save or update a user and journal it."""
+        self._log(
+            partial(super().save_user, user),
+            lambda: _user_record(user),
+        )
+
+    def save_role(self, role: Role) -> None:
+        """Save or update a role and journal it."""
+        self._log(partial(super().save_role, role), lambda: _role_record(role))
+
+    def save_permission(self, permission: Permission) -> None:
+        """Save or update a permission and journal it."""
+        self._log(
+            partial(super().save_permission, permission),
+            lambda: encode_record(OP_PERMISSION, permission.name),
+        )
+
+    def save_many(
+        self,
+        users: Iterable[User] = (),
+        roles: Iterable[Role] = (),
+        permissions: Iterable[Permission] = (),
+    ) -> None:
+        """Save many entities and journal them together, waiting for a single group commit."""
+        users, roles, permissions = list(users), list(roles), list(permissions)
+        count = len(users) + len(roles) + len(permissions)
+        if not count:
+            return
+
+        def records() -> bytes:
+            return b"".join(
+                [encode_record(OP_PERMISSION, p.name) for p in permissions]
+                + [_role_record(r) for r in roles]
+                + [_user_record(u) for u in users]
+            )
+
+        self._log(partial(super().save_many, users, roles, permissions), records, count)
+
+    def delete_user(self, username: str) -> None:
+        """Remove a user and journal it."""
+        self._log(partial(super().delete_user, username), lambda: encode_record(OP_USER_DELETE, username))
+
+    def delete_role(self, name: str) -> None:
+        """Remove a role and journal it."""
+        self._log(partial(super().delete_role, name), lambda: encode_record(OP_ROLE_DELETE, name))
+
+    def delete_permission(self, name: str) -> None:
+        """Remove a permission and journal it."""
+        self._log(partial(super().delete_permission, name), lambda: encode_record(OP_PERMISSION_DELETE, name))
+
+    def save_policy_version(self, version: int) -> None:
+        """Save the policy version and journal it."""
+        self._log(
+            partial(super().save_policy_version, version),
+            lambda: encode_record(OP_POLICY_VERSION, version),
+        )
+
+    # --- Compaction ---
+
+    def snapshot(self) -> bytes:
+        """Encodes the full current state as a sequence of records."""
+        with self._state_lock:
+            return encode_state(self, self.ssd, self.dsd)
+
+    def compact(self) -> None:
+        """Writes a checkpoint of the current state and truncates the journal."""
+        if not self._compacting.acquire(blocking=False):
+            return
+        try:
+            with self._state_lock:
+                self.journal.rotate(self._checkpoint_path, self.snapshot())
+            logger.info("Journal compacted into %s", self._checkpoint_path)
+        finally:
+            self._compacting.release()
+
+    def close(self) -> None:
+        """Closes the journal file."""
+        self.journal.close()
+
+
+class JournaledSSDConstraint(InMemorySSDConstraint):
+    """SSD engine whose set changes are journaled through a `JournaledStorage`."""
+
+    def __init__(self, storage: JournaledStorage):
+        super().__init__()
+        self._storage = storage
+
+    def add_set(self, name: str, roles: set[str], max_roles: int = 1) -> None:
+        self._storage._log(
+            partial(super().add_set, name, set(roles), max_roles),
+            lambda: encode_record(OP_SSD_SET, name, sorted(roles), max_roles),
+        )
+
+    def remove_set(self, name: str) -> None:
+        self._storage._log(partial(super().remove_set, name), lambda: encode_record(OP_SSD_REMOVE, name))
+
+
+class JournaledDSDConstraint(InMemoryDSDConstraint):
+    """DSD engine whose set changes are journaled through a `JournaledStorage`."""
+
+    def __init__(self, storage: JournaledStorage):
+        super().__init__()
+        self._storage = storage
+
+    def add_set(self, name: str, roles: set[str], max_roles: int = 1) -> None:
+        self._storage._log(
+            partial(super().add_set, name, set(roles), max_roles),
+            lambda: encode_record(OP_DSD_SET, name, sorted(roles), max_roles),
+        )
+
+    def remove_set(self, name: str) -> None:
+        self._storage._log(partial(super().remove_set, name), lambda: encode_record(OP_DSD_REMOVE, name))
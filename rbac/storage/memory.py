@@ -1,21 +1,51 @@
-from typing import Optional
+from typing import Iterable, Optional
 from rbac.storage.base import AbstractStorage
-from rbac.models import User, Role, Permission
+from rbac.storage.index import NameIndex
+from rbac.models import User, Role, Permission, RoleGeneration
+
+def _store(entities: dict, index: NameIndex, found: dict) -> None:
+    index.add_many(name for name in found if name not in entities)
+    entities.update(found)
+
 
 class InMemoryStorage(AbstractStorage):
     """
     In-memory implementation of the RBAC storage backend.
     Useful for testing and small-scale use cases.
+    Sorted name indexes, kept current by the save and delete methods, answer
+    prefix and range searches; call `reindex()` after editing the dicts directly.
     """
 
     def __init__(self):
         self.users: dict[str, User] = {}
         self.roles: dict[str, Role] = {}
         self.permissions: dict[str, Permission] = {}
+        self.role_generation = RoleGeneration()
+        self.reindex()
+
+    def reindex(self) -> None:
+        """Rebuilds the name indexes from the entity dicts."""
+        self.user_index = NameIndex(self.users)
+        self.role_index = NameIndex(self.roles)
+        self.permission_index = NameIndex(self.permissions)
+        for role in self.roles.values():
+            role.generation = self.role_generation
+        self._roles_replaced()
+
+    def _adopt(self, role: Role) -> None:
+        """Ties a role being stored to this storage's generation."""
+        if role.generation is not self.role_generation or self.roles.get(role.name) is not role:
+            role.generation = self.role_generation
+            self._roles_replaced()
+
+    def _roles_replaced(self) -> None:
+        self.role_generation.value += 1
+        self.role_generation.parents += 1
 
     def save_user(self, user: User) -> None:
         """Save or update a user in memory."""
         self.users[user.username] = user
+        self.user_index.add(user.username)
 
     def get_user(self, username: str) -> Optional[User]:
         """Retrieve a user by username."""
@@ -27,7 +57,9 @@ class InMemoryStorage(AbstractStorage):
 
     def save_role(self, role: Role) -> None:
         """Save or update a role in memory."""
+        self._adopt(role)
         self.roles[role.name] = role
+        self.role_index.add(role.name)
 
     def get_role(self, name: str) -> Optional[Role]:
         """Retrieve a role by name."""
@@ -40,6 +72,7 @@ class InMemoryStorage(AbstractStorage):
     def save_permission(self, permission: Permission) -> None:
         """Save or update a permission in memory."""
         self.permissions[permission.name] = permission
+        self.permission_index.add(permission.name)
 
     def get_permission(self, name: str) -> Optional[Permission]:
         """Retrieve a permission by name."""
@@ -49,6 +82,72 @@ class InMemoryStorage(AbstractStorage):
         """Return a list of all permissions."""
         return list(self.permissions.values())
 
+    def get_users(self, usernames: Iterable[str]) -> dict[str, User]:
+        """Retrieve many users by username."""
+        users = self.users
+        return {name: users[name] for name in usernames if name in users}
+
+    def get_roles(self, names: Iterable[str]) -> dict[str, Role]:
+        """Retrieve many roles by name."""
+        roles = self.roles
+        return {name: roles[name] for name in names if name in roles}
+
+    def get_permissions(self, names: Iterable[str]) -> dict[str, Permission]:
+        """Retrieve many permissions by name."""
+        permissions = self.permissions
+        return {name: permissions[name] for name in names if name in permissions}
+
+    def save_many(
+        self,
+        users: Iterable[User] = (),
+        roles: Iterable[Role] = (),
+        permissions: Iterable[Permission] = (),
+    ) -> None:
+        """Save many entities in memory."""
+        _store(self.permissions, self.permission_index, {p.name: p for p in permissions})
+        roles = {r.name: r for r in roles}
+        for role in roles.values():
+            self._adopt(role)
+        _store(self.roles, self.role_index, roles)
+        _store(self.users, self.user_index, {u.username: u for u in users})
+
+    def find_users(
+        self, prefix: str = "", start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None,
+    ) -> list[User]:
+        """Search users by name through the sorted index."""
+        users = self.users
+        return [users[name] for name in self.user_index.query(prefix, start, end, limit)]
+
+    def find_roles(
+        self, prefix: str = "", start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None,
+    ) -> list[Role]:
+        """Search roles by name through the sorted index."""
+        roles = self.roles
+        return [roles[name] for name in self.role_index.query(prefix, start, end, limit)]
+
+    def find_permissions(
+        self, prefix: str = "", start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None,
+    ) -> list[Permission]:
+        """Search permissions by name through the sorted index."""
+        permissions = self.permissions
+        return [permissions[name] for name in self.permission_index.query(prefix, start, end, limit)]
+
+    def delete_user(self, username: str) -> None:
+        """Remove a user from memory, if present."""
+        self.users.pop(username, None)
+        self.user_index.discard(username)
+
+    def delete_role(self, name: str) -> None:
+        """Remove a role from memory, if present."""
+        if self.roles.pop(name, None) is not None:
+            self._roles_replaced()
+        self.role_index.discard(name)
+
+    def delete_permission(self, name: str) -> None:
+        """Remove a permission from memory, if present."""
+        self.permissions.pop(name, None)
+        self.permission_index.discard(name)
+
     def __repr__(self):
         return (
             f"<InMemoryStorage users={len(self.users)}, "
@@ -0,0 +1,22 @@
+"""
+Reusable conformance and performance suites for storage backends and
+SSD/DSD engines. The suites require pytest and are imported on first use; the
+standard workload functions and `python -m rbac.testing.performance` do not.
+"""
+import importlib
+
+from .performance import STORAGE_TARGETS, Target, check_targets, compare_to_baseline, run_storage_workload
+
+_SUITES = {"StorageConformance", "SSDConformance", "DSDConformance", "StoragePerformance"}
+
+__all__ = [
+    "StorageConformance", "SSDConformance", "DSDConformance",
+    "StoragePerformance", "Target", "STORAGE_TARGETS",
+    "run_storage_workload", "check_targets", "compare_to_baseline",
+]
+
+
+def __getattr__(name: str):
+    if name in _SUITES:
+        return getattr(importlib.import_module(".conformance", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,274 @@
+"""
+Conformance tests for storage backends and SSD/DSD engines.
+
+Subclass a suite in your own test module and provide the fixture it needs:
+
+    from rbac.testing import StorageConformance
+
+    class TestMyStorage(StorageConformance):
+        @pytest.fixture
+        def storage(self, tmp_path):
+            return MyStorage(tmp_path)
+
+        def reopen(self, storage):
+            storage.close()
+            return MyStorage(storage.path)   # only for persistent backends
+
+pytest collects the inherited test methods against your backend. Optional
+capabilities (deletion) are skipped when the backend raises NotImplementedError.
+`StoragePerformance` runs the standard workload from `rbac.testing.performance`
+against the same fixture and enforces its latency and throughput targets.
+"""
+import pytest
+
+from rbac.models import Permission, Role, User
+from rbac.testing.performance import STORAGE_TARGETS, Target, check_targets, run_storage_workload
+
+
+class StorageConformance:
+    """Expected semantics of an `AbstractStorage` implementation."""
+
+    @pytest.fixture
+    def storage(self):
+        raise NotImplementedError("Provide a `storage` fixture returning the backend under test")
+
+    def reopen(self, storage):
+        """Returns the backend as seen after a restart. In-process backends return it unchanged."""
+        return storage
+
+    def test_missing_entities_are_none(self, storage):
+        """Lookups of unknown names return None, not raise."""
+        assert storage.get_user("nobody") is None
+        assert storage.get_role("nothing") is None
+        assert storage.get_permission("none") is None
+
+    def test_round_trip_and_listing(self, storage):
+        """Saved entities are returned by name and listed once each."""
+        storage.save_permission(Permission("doc:read"))
+        storage.save_role(Role("viewer"))
+        storage.save_user(User("alice"))
+        assert storage.get_permission("doc:read").name == "doc:read"
+        assert storage.get_role("viewer").name == "viewer"
+        assert storage.get_user("alice").username == "alice"
+        assert [p.name for p in storage.get_all_permissions()] == ["doc:read"]
+        assert [r.name for r in storage.get_all_roles()] == ["viewer"]
+        assert [u.username for u in storage.get_all_users()] == ["alice"]
+
+    def test_save_is_an_upsert(self, storage):
+        """Saving an existing name replaces it instead of adding a duplicate."""
+        read = Permission("doc:read")
+        storage.save_permission(read)
+        role = Role("viewer")
+        storage.save_role(role)
+        role.add_permission(read)
+        storage.save_role(role)
+        assert len(storage.get_all_roles()) == 1
+        assert {p.name for p in storage.get_role("viewer").permissions} == {"doc:read"}
+
+    def test_relationships_survive_reopen(self, storage):
+        """Grants, parents, assignments and expiries are preserved, including across a restart."""
+        read = Permission("doc:read")
+        storage.save_permission(read)
+        viewer = Role("viewer")
+        viewer.add_permission(read)
+        storage.save_role(viewer)
+        editor = Role("editor")
+        editor.add_parent(viewer)
+        storage.save_role(editor)
+        user = User("alice")
+        user.add_role(editor)
+        user.expirations["editor"] = 4_102_444_800.0
+        storage.save_user(user)
+
+        storage = self.reopen(storage)
+        editor = storage.get_role("editor")
+        assert {r.name for r in editor.parents} == {"viewer"}
+        assert {p.name for p in editor.get_all_permissions()} == {"doc:read"}
+        alice = storage.get_user("alice")
+        assert alice.get_role_names() == {"editor"}
+        assert alice.expirations == {"editor": 4_102_444_800.0}
+        assert alice.has_permission(Permission("doc:read"))
+
+    def test_batched_lookups_and_save_many(self, storage):
+        """Batched lookups omit unknown names; save_many persists references across a restart."""
+        read = Permission("doc:read")
+        viewer = Role("viewer")
+        viewer.add_permission(read)
+        users = [User(f"user{i}") for i in range(3)]
+        for user in users:
+            user.add_role(viewer)
+        storage.save_many(users=users, roles=[viewer], permissions=[read])
+
+        storage = self.reopen(storage)
+        found = storage.get_users(["user0", "user2", "nobody"])
+        assert sorted(found) == ["user0", "user2"]
+        assert found["user2"].get_role_names() == {"viewer"}
+        assert list(storage.get_roles(["viewer", "nothing"])) == ["viewer"]
+        assert list(storage.get_permissions(["doc:read"])) == ["doc:read"]
+        assert storage.get_users([]) == {}
+
+    def test_prefix_and_range_search(self, storage):
+        """Searches return matching names in order, honour limits and track saves and deletes."""
+        for name in ("billing_admin", "billing_viewer", "billing", "audit", "billingz", "c"):
+            storage.save_role(Role(name))
+        storage.save_many(roles=[Role("billing_clerk"), Role("audit")])
+        names = lambda roles: [role.name for role in roles]
+        assert names(storage.find_roles("billing_")) == ["billing_admin", "billing_clerk", "billing_viewer"]
+        assert names(storage.find_roles("billing_", limit=2)) == ["billing_admin", "billing_clerk"]
+        assert names(storage.find_roles(start="b", end="billing_b")) == ["billing", "billing_admin"]
+        assert names(storage.find_roles("billing", start="billing_d")) == ["billing_viewer", "billingz"]
+        assert storage.find_roles("zzz") == []
+        assert names(storage.find_roles()) == sorted(
+            ["audit", "billing", "billing_admin", "billing_clerk", "billing_viewer", "billingz", "c"]
+        )
+        storage.save_user(User("alice"))
+        storage.save_permission(Permission("doc:read"))
+        assert [u.username for u in storage.find_users("al")] == ["alice"]
+        assert names(storage.find_permissions("doc:")) == ["doc:read"]
+        try:
+            storage.delete_role("billing_clerk")
+        except NotImplementedError:
+            return
+        storage = self.reopen(storage)
+        assert names(storage.find_roles("billing_")) == ["billing_admin", "billing_viewer"]
+
+    def test_unit_of_work(self, storage):
+        """A unit of work writes on a clean exit and writes nothing if the block raises."""
+        with storage.unit_of_work() as work:
+            work.save_permission(Permission("doc:read"))
+            work.save_user(User("alice"))
+        with pytest.raises(RuntimeError):
+            with storage.unit_of_work() as work:
+                work.save_user(User("bob"))
+                raise RuntimeError("abort")
+        storage = self.reopen(storage)
+        assert storage.get_user("alice") is not None
+        assert storage.get_permission("doc:read") is not None
+        assert storage.get_user("bob") is None
+
+    def test_delete(self, storage):
+        """Deleted entities disappear; deleting unknown names is a no-op."""
+        storage.save_permission(Permission("doc:read"))
+        storage.save_role(Role("viewer"))
+        storage.save_user(User("alice"))
+        try:
+            storage.delete_user("alice")
+        except NotImplementedError:
+            pytest.skip("backend does not support deletion")
+        storage.delete_role("viewer")
+        storage.delete_permission("doc:read")
+        storage.delete_user("alice")
+        storage = self.reopen(storage)
+        assert storage.get_user("alice") is None
+        assert storage.get_role("viewer") is None
+        assert storage.get_permission("doc:read") is None
+
+
+class SSDConformance:
+    """Expected semantics of an `AbstractSSDConstraint` implementation."""
+
+    @pytest.fixture
+    def ssd(self):
+        raise NotImplementedError("Provide an `ssd` fixture returning the engine under test")
+
+    def test_sets_round_trip(self, ssd):
+        """Sets are listed with their roles and limits; removal of unknown sets raises."""
+        ssd.add_set("duties", {"payer", "approver"})
+        ssd.add_set("trio", {"a", "b", "c"}, max_roles=2)
+        assert {name: set(roles) for name, roles in ssd.get_all_sets().items()} == {
+            "duties": {"payer", "approver"}, "trio": {"a", "b", "c"},
+        }
+        assert ssd.get_limits() == {"duties": 1, "trio": 2}
+        ssd.remove_set("duties")
+        assert set(ssd.get_all_sets()) == {"trio"}
+        with pytest.raises(ValueError):
+            ssd.remove_set("duties")
+
+    def test_assignment_validation(self, ssd):
+        """At most max_roles roles of a set may be held; other roles are unaffected."""
+        ssd.add_set("duties", {"payer", "approver"})
+        ssd.add_set("trio", {"a", "b", "c"}, max_roles=2)
+        assert ssd.is_valid_assignment("u", "payer", set())
+        assert not ssd.is_valid_assignment("u", "approver", {"payer"})
+        assert ssd.is_valid_assignment("u", "auditor", {"payer"})
+        assert ssd.is_valid_assignment("u", "b", {"a"})
+        assert not ssd.is_valid_assignment("u", "c", {"a", "b"})
+
+    def test_counters_agree_with_validation(self, ssd):
+        """Incremental counters give the same answers as full validation."""
+        ssd.add_set("trio", {"a", "b", "c"}, max_roles=2)
+        assert set(ssd.sets_for_role("a")) == {"trio"}
+        counts = ssd.count_assigned({"a"})
+        assert ssd.can_assign("b", counts)
+        ssd.track_assignment("b", counts)
+        assert not ssd.can_assign("c", counts)
+        ssd.track_revocation("a", counts)
+        assert ssd.can_assign("c", counts)
+
+    def test_version_changes_on_mutation(self, ssd):
+        """Engines that track a version bump it whenever sets change."""
+        before = ssd.version
+        ssd.add_set("duties", {"payer", "approver"})
+        if before is not None:
+            assert ssd.version != before
+
+
+class DSDConformance:
+    """Expected semantics of a `DSDConstraint` implementation."""
+
+    @pytest.fixture
+    def dsd(self):
+        raise NotImplementedError("Provide a `dsd` fixture returning the engine under test")
+
+    def test_sets_round_trip(self, dsd):
+        """Sets are listed with their roles and limits; removal of unknown sets is a no-op."""
+        dsd.add_set("live", {"payer", "approver"})
+        dsd.add_set("desk", {"a", "b", "c"}, max_roles=2)
+        assert dsd.get_conflict_sets() == {"live": {"payer", "approver"}, "desk": {"a", "b", "c"}}
+        assert dsd.get_limits() == {"live": 1, "desk": 2}
+        dsd.remove_set("live")
+        dsd.remove_set("live")
+        assert set(dsd.get_conflict_sets()) == {"desk"}
+
+    def test_activation_validation(self, dsd):
+        """At most max_roles roles of a set may be active together."""
+        dsd.add_set("live", {"payer", "approver"})
+        dsd.add_set("desk", {"a", "b", "c"}, max_roles=2)
+        assert dsd.is_valid_activation({"payer", "auditor"})
+        assert not dsd.is_valid_activation({"payer", "approver"})
+        assert dsd.is_valid_activation({"a", "b"})
+        assert not dsd.is_valid_activation({"a", "b", "c"})
+
+    def test_counters_agree_with_validation(self, dsd):
+        """Incremental counters give the same answers as full validation."""
+        dsd.add_set("desk", {"a", "b", "c"}, max_roles=2)
+        counts = dsd.count_active({"a"})
+        assert dsd.can_activate("b", counts)
+        dsd.track_activation("b", counts)
+        assert not dsd.can_activate("c", counts)
+        dsd.track_deactivation("a", counts)
+        assert dsd.can_activate("c", counts)
+
+    def test_version_changes_on_mutation(self, dsd):
+        """Engines that track a version bump it whenever sets change."""
+        before = dsd.version
+        dsd.add_set("live", {"payer", "approver"})
+        if before is not None:
+            assert dsd.version != before
+
+
+class StoragePerformance:
+    """Runs the standard workload against a `storage` fixture and enforces `targets`."""
+
+    targets: dict[str, Target] = STORAGE_TARGETS
+    workload: dict = {}
+
+    @pytest.fixture
+    def storage(self):
+        raise NotImplementedError("Provide a `storage` fixture returning the backend under test")
+
+    def test_meets_targets(self, storage):
+        """Every storage method meets its p99 latency and throughput target."""
+        results = run_storage_workload(storage, **self.workload)
+        failures = check_targets(results, self.targets)
+        assert not failures, "\n".join(failures)
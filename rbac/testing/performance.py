@@ -0,0 +1,175 @@
+"""
+Standard storage workload with per-method latency and throughput targets.
+
+    python -m rbac.testing.performance --backend rbac.storage:InMemoryStorage --output run.json
+    python -m rbac.testing.performance --backend mypkg.rbac:make_storage --baseline run.json
+
+`--backend` names a zero-argument factory as `module:attribute`. The run fails
+(exit status 1) when a method misses its target or, with `--baseline`, when
+its p99 latency or throughput regressed by more than the tolerance.
+
+In a test suite, subclass `rbac.testing.StoragePerformance` and provide a
+`storage` fixture. Override `targets` for backends with other expectations
+(e.g. a network database). This module itself does not need pytest.
+"""
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from rbac.bench.stats import summarize
+from rbac.models import Permission, Role, User
+from rbac.storage import AbstractStorage
+
+
+@dataclass(frozen=True)
+class Target:
+    """Upper bound on p99 latency and lower bound on single-caller throughput."""
+    p99_ms: float
+    min_ops_per_second: float
+
+
+#: Defaults for in-process backends, with headroom for slow CI machines.
+STORAGE_TARGETS: dict[str, Target] = {
+    "save_permission": Target(p99_ms=5.0, min_ops_per_second=1_000),
+    "save_role": Target(p99_ms=5.0, min_ops_per_second=1_000),
+    "save_user": Target(p99_ms=5.0, min_ops_per_second=1_000),
+    "get_permission": Target(p99_ms=1.0, min_ops_per_second=10_000),
+    "get_role": Target(p99_ms=1.0, min_ops_per_second=10_000),
+    "get_user": Target(p99_ms=1.0, min_ops_per_second=10_000),
+    "get_all_users": Target(p99_ms=50.0, min_ops_per_second=20),
+    "get_all_roles": Target(p99_ms=50.0, min_ops_per_second=20),
+    "get_all_permissions": Target(p99_ms=50.0, min_ops_per_second=20),
+}
+
+
+class _Timer:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+
+    def call(self, method: str, fn: Callable, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        self.latencies.setdefault(method, []).append(time.perf_counter() - started)
+        return result
+
+
+def run_storage_workload(
+    storage: AbstractStorage,
+    users: int = 1_000,
+    roles: int = 50,
+    permissions: int = 200,
+    reads: int = 5_000,
+    scans: int = 10,
+    seed: int = 0,
+) -> dict[str, dict]:
+    """
+    Populates `storage` with a synthetic policy, then performs random point reads
+    and full scans. Returns per-method summaries (count, throughput, p50/p95/p99/max ms).
+    """
+    rng = random.Random(seed)
+    timer = _Timer()
+    permission_objects = [Permission(f"perm{i}") for i in range(permissions)]
+    for permission in permission_objects:
+        timer.call("save_permission", storage.save_permission, permission)
+    role_objects = []
+    for i in range(roles):
+        role = Role(f"role{i}")
+        for permission in rng.sample(permission_objects, min(10, permissions)):
+            role.add_permission(permission)
+        if role_objects:
+            role.add_parent(rng.choice(role_objects))
+        timer.call("save_role", storage.save_role, role)
+        role_objects.append(role)
+    for i in range(users):
+        user = User(f"user{i}")
+        for role in rng.sample(role_objects, min(2, roles)):
+            user.add_role(role)
+        timer.call("save_user", storage.save_user, user)
+
+    for _ in range(reads):
+        timer.call("get_user", storage.get_user, f"user{rng.randrange(users)}")
+        timer.call("get_role", storage.get_role, f"role{rng.randrange(roles)}")
+        timer.call("get_permission", storage.get_permission, f"perm{rng.randrange(permissions)}")
+    for _ in range(scans):
+        timer.call("get_all_users", storage.get_all_users)
+        timer.call("get_all_roles", storage.get_all_roles)
+        timer.call("get_all_permissions", storage.get_all_permissions)
+
+    return {
+        method: summarize(values, sum(values))
+        for method, values in sorted(timer.latencies.items())
+    }
+
+
+def check_targets(results: dict[str, dict], targets: dict[str, Target] = STORAGE_TARGETS) -> list[str]:
+    """Returns a message for every method that misses its target."""
+    failures = []
+    for method, target in targets.items():
+        result = results.get(method)
+        if result is None:
+            continue
+        if result["p99_ms"] > target.p99_ms:
+            failures.append(f"{method}: p99 {result['p99_ms']:.3f}ms > target {target.p99_ms}ms")
+        if result["throughput_per_second"] < target.min_ops_per_second:
+            failures.append(
+                f"{method}: {result['throughput_per_second']:.0f} ops/s < target {target.min_ops_per_second:.0f} ops/s"
+            )
+    return failures
+
+
+def compare_to_baseline(results: dict[str, dict], baseline: dict[str, dict], tolerance: float = 0.5) -> list[str]:
+    """
+    Returns a message for every method whose p99 latency grew, or throughput
+    shrank, by more than `tolerance` (0.5 = 50%) relative to `baseline`.
+    """
+    regressions = []
+    for method, before in baseline.items():
+        after = results.get(method)
+        if after is None:
+            continue
+        if after["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{method}: p99 {before['p99_ms']:.3f}ms -> {after['p99_ms']:.3f}ms")
+        if after["throughput_per_second"] * (1 + tolerance) < before["throughput_per_second"]:
+            regressions.append(
+                f"{method}: {before['throughput_per_second']:.0f} -> {after['throughput_per_second']:.0f} ops/s"
+            )
+    return regressions
+
+
+def _load_factory(spec: str) -> Callable[[], AbstractStorage]:
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="rbac.storage:InMemoryStorage", help="module:factory")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--reads", type=int, default=5_000)
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = run_storage_workload(_load_factory(args.backend)(), users=args.users, reads=args.reads)
+    failures = check_targets(results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare_to_baseline(results, json.load(f)["methods"], args.tolerance)
+    report = {"backend": args.backend, "methods": results, "failures": failures}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
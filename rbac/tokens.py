@@ -0,0 +1,244 @@
+"""
+Signed capability tokens for offline permission checks.
+
+A token carries the effective permissions of a user, or of one session, as a
+bitmap over a `PermissionDictionary`: the sorted list of registered concrete
+permissions, identified by a 64-bit version derived from its contents. Layout
+before base64url encoding (integers little-endian):
+
+    <u8 format> <u8 kind> <u64 dictionary version> <u64 policy version>
+    <u32 issued at> <u32 expires at>
+    <u16 len><username utf-8> <u16 len><session id utf-8, empty for user tokens>
+    <u16 len><permission bitmap> <32-byte HMAC-SHA256 of everything before it>
+
+Services fetch the dictionary once (`GET /tokens/dictionary`) and check tokens
+locally with `CapabilityVerifier`. Tokens are rejected when they were issued
+against another dictionary, or before the verifier's `min_policy_version`;
+raise it after revocations that must take effect before tokens expire.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import hmac
+import struct
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+FORMAT = 1
+KIND_USER = 0
+KIND_SESSION = 1
+
+_HEAD = struct.Struct("<BBQQII")
+_LEN = struct.Struct("<H")
+_MAC_SIZE = hashlib.sha256().digest_size
+
+
+class PermissionDictionary:
+    """Bit positions of concrete permissions, shared by the issuer and verifiers."""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = sorted(names)
+        self.index = {name: bit for bit, name in enumerate(self.names)}
+        digest = hashlib.sha256("\n".join(self.names).encode("utf-8")).digest()
+        self.version = int.from_bytes(digest[:8], "little")
+
+    def encode(self, permissions: Iterable[str]) -> int:
+        """Returns the bitmap of `permissions`; names outside the dictionary are ignored."""
+        mask = 0
+        for name in permissions:
+            bit = self.index.get(name)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def decode(self, mask: int) -> list[str]:
+        """Returns the permission names set in `mask`."""
+        return [name for bit, name in enumerate(self.names) if mask >> bit & 1]
+
+    def to_dict(self) -> dict:
+        return {"version": self.version, "permissions": list(self.names)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> PermissionDictionary:
+        """Rebuilds a dictionary served by the API. Raises ValueError if the version does not match."""
+        dictionary = cls(data["permissions"])
+        if dictionary.version != data["version"]:
+            raise ValueError("Permission dictionary version does not match its contents")
+        return dictionary
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+@dataclass(frozen=True)
+class Capability:
+    """The verified contents of a token."""
+    username: str
+    session_id: Optional[str]
+    policy_version: int
+    dictionary_version: int
+    issued_at: int
+    expires_at: int
+    mask: int
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(token: str) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Malformed token: {e}") from e
+
+
+def _string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    if len(data) > 0xFFFF:
+        raise ValueError(f"Name too long to encode: {value[:32]!r}...")
+    return _LEN.pack(len(data)) + data
+
+
+def issue_token(
+    key: bytes,
+    dictionary: PermissionDictionary,
+    mask: int,
+    username: str,
+    policy_version: int,
+    ttl: float = 300.0,
+    session_id: Optional[str] = None,
+    now: Optional[float] = None,
+) -> str:
+    """
+    Signs a token granting the permissions in `mask` for `ttl` seconds, rounded
+    down to whole seconds. Raises ValueError if `ttl` is under a second.
+    """
+    if ttl < 1:
+        raise ValueError("Token lifetime must be at least one second.")
+    issued = int(time.time() if now is None else now)
+    bitmap = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    if len(bitmap) > 0xFFFF:
+        raise ValueError("Permission bitmap too large for a token")
+    body = b"".join([
+        _HEAD.pack(
+            FORMAT, KIND_USER if session_id is None else KIND_SESSION,
+            dictionary.version, policy_version, issued, issued + int(ttl),
+        ),
+        _string(username),
+        _string(session_id or ""),
+        _LEN.pack(len(bitmap)),
+        bitmap,
+    ])
+    return _b64encode(body + hmac.new(key, body, hashlib.sha256).digest())
+
+
+def _parse(data: bytes) -> Capability:
+    try:
+        fmt, kind, dictionary_version, policy_version, issued, expires = _HEAD.unpack_from(data, 0)
+        offset = _HEAD.size
+        fields = []
+        for _ in range(3):
+            (size,) = _LEN.unpack_from(data, offset)
+            offset += _LEN.size
+            if offset + size > len(data):
+                raise ValueError("Truncated token")
+            fields.append(data[offset:offset + size])
+            offset += size
+        username, session_id = fields[0].decode("utf-8"), fields[1].decode("utf-8")
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed token: {e}") from e
+    if fmt != FORMAT:
+        raise ValueError(f"Unsupported token format {fmt}")
+    if offset != len(data):
+        raise ValueError("Trailing bytes in token")
+    return Capability(
+        username=username,
+        session_id=session_id if kind == KIND_SESSION else None,
+        policy_version=policy_version,
+        dictionary_version=dictionary_version,
+        issued_at=issued,
+        expires_at=expires,
+        mask=int.from_bytes(fields[2], "little"),
+    )
+
+
+def peek(token: str) -> Capability:
+    """Decodes a token without checking its signature, dictionary or expiry. Never use it to authorize."""
+    data = _b64decode(token)
+    if len(data) <= _MAC_SIZE:
+        raise ValueError("Truncated token")
+    return _parse(data[:-_MAC_SIZE])
+
+
+class CapabilityVerifier:
+    """
+    Checks tokens against a shared key and dictionary without calling the RBAC
+    API. Verified tokens are kept in a bounded LRU cache, so repeated checks of
+    the same token cost a dict lookup, an expiry comparison and a bit test.
+    """
+
+    def __init__(
+        self,
+        key: bytes,
+        dictionary: PermissionDictionary,
+        min_policy_version: int = 0,
+        clock: Callable[[], float] = time.time,
+        cache_size: int = 4096,
+    ):
+        self.key = key
+        self.dictionary = dictionary
+        self.min_policy_version = min_policy_version
+        self.clock = clock
+        self.cache_size = cache_size
+        self._verified: OrderedDict[str, Capability] = OrderedDict()
+
+    def reject_before(self, policy_version: int) -> None:
+        """Rejects tokens issued before `policy_version` from now on."""
+        if policy_version > self.min_policy_version:
+            self.min_policy_version = policy_version
+            self._verified.clear()
+
+    def verify(self, token: str) -> Capability:
+        """Returns the token's capability. Raises ValueError if it is forged, stale, expired or malformed."""
+        capability = self._verified.get(token)
+        if capability is None:
+            data = _b64decode(token)
+            body, mac = data[:-_MAC_SIZE], data[-_MAC_SIZE:]
+            if len(data) <= _MAC_SIZE or not hmac.compare_digest(
+                mac, hmac.new(self.key, body, hashlib.sha256).digest()
+            ):
+                raise ValueError("Invalid token signature")
+            capability = _parse(body)
+            if capability.dictionary_version != self.dictionary.version:
+                raise ValueError("Token was issued against a different permission dictionary")
+            if capability.policy_version < self.min_policy_version:
+                raise ValueError(
+                    f"Token policy version {capability.policy_version} is older than {self.min_policy_version}"
+                )
+            self._verified[token] = capability
+            if len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        else:
+            self._verified.move_to_end(token)
+        if capability.expires_at <= self.clock():
+            self._verified.pop(token, None)
+            raise ValueError("Token has expired")
+        return capability
+
+    def allows(self, token: str, permission: str) -> bool:
+        """
+        Whether the token grants `permission`. Permissions missing from the
+        dictionary are denied. Raises ValueError if the token is not valid.
+        """
+        mask = self.verify(token).mask
+        bit = self.dictionary.index.get(permission)
+        return bit is not None and bool(mask >> bit & 1)
+
+    def permissions(self, token: str) -> list[str]:
+        """Returns every permission the token grants."""
+        return self.dictionary.decode(self.verify(token).mask)
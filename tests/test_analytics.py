@@ -0,0 +1,50 @@
+from rbac.models import Role
+from rbac.core.manager import RBACManager
+from rbac.storage.memory import InMemoryStorage
+
+
+def build_manager():
+    manager = RBACManager(storage=InMemoryStorage())
+    viewer = Role("viewer")
+    editor = Role("editor")
+    editor.add_parent(viewer)
+    manager.add_role(viewer)
+    manager.add_role(editor)
+    for perm in ["read", "write", "doc:*:share", "doc:1:share"]:
+        manager.add_permission(perm)
+    manager.grant_permission("viewer", "read")
+    manager.grant_permission("editor", "write")
+    manager.grant_permission("editor", "doc:*:share")
+    for name, role in [("alice", "editor"), ("bob", "viewer"), ("carol", "editor")]:
+        manager.add_user(name)
+        manager.assign_role(name, role)
+    manager.add_user("dave")
+    return manager
+
+
+def test_matrix_matches_per_user_enumeration():
+    """Bulk rows agree with checks, including inherited and wildcard grants."""
+    matrix = build_manager().permission_matrix()
+    assert set(matrix.permissions_of("alice")) == {"read", "write", "doc:1:share"}
+    assert matrix.permissions_of("bob") == ["read"]
+    assert matrix.permissions_of("dave") == []
+    assert matrix.user_counts() == {"doc:1:share": 2, "read": 3, "write": 2}
+
+
+def test_csv_export_streams_in_chunks():
+    """CSV output has a header and one line per (user, permission) pair."""
+    matrix = build_manager().permission_matrix()
+    chunks = list(matrix.iter_csv(chunk_rows=2))
+    assert len(chunks) > 1
+    lines = "".join(chunks).splitlines()
+    assert lines[0] == "username,permission"
+    assert "bob,read" in lines
+    assert len(lines) == 1 + 3 + 1 + 3
+
+
+def test_columnar_export_chunks():
+    """Columnar chunks hold aligned username and permission columns."""
+    matrix = build_manager().permission_matrix()
+    chunks = list(matrix.iter_columns(chunk_rows=4))
+    assert [len(c["username"]) for c in chunks] == [4, 3]
+    assert all(len(c["username"]) == len(c["permission"]) for c in chunks)
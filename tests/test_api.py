@@ -1,11 +1,12 @@
+import threading
 import pytest
 from httpx import AsyncClient
-from rbac.api.main import router
-from fastapi import FastAPI
+from rbac.api import create_app
+from rbac.core import RBACManager
+from rbac.storage import InMemoryStorage
 
 # Create test app instance
-app = FastAPI()
-app.include_router(router)
+app = create_app(RBACManager(InMemoryStorage()), prefix="")
 
 @pytest.mark.asyncio
 async def test_full_rbac_flow():
@@ -36,12 +37,89 @@ async def test_full_rbac_flow():
         assert resp.status_code == 200
         assert resp.json()["status"] == "success"
 
+        # Bulk endpoints apply all pairs or none
+        resp = await ac.post("/assign-roles", json={"assignments": [{"username": "alice", "role_name": "nope"}]})
+        assert resp.status_code == 400
+        resp = await ac.post("/grant-permissions", json={"grants": [{"role": "teacher", "permission": "edit_marks"}]})
+        assert resp.json() == {"status": "success", "granted": 1}
+
         # Check permission: should be True
         resp = await ac.post("/check-permission", json={"username": "alice", "permission": "edit_marks"})
         assert resp.status_code == 200
         assert resp.json()["has_permission"] is True
 
+        # Prefix search on the list endpoints
+        resp = await ac.get("/roles", params={"prefix": "tea"})
+        assert resp.json() == {"roles": ["teacher"]}
+        resp = await ac.get("/users", params={"prefix": "zz"})
+        assert resp.json() == []
+
         # Negative test: unassigned user
         resp = await ac.post("/check-permission", json={"username": "bob", "permission": "edit_marks"})
         assert resp.status_code == 404  # "bob" doesn't exist
         assert resp.json()["detail"] == "User bob not found."
+
+
+@pytest.mark.asyncio
+async def test_fast_decision_routes():
+    from rbac.codec import BATCH_CONTENT_TYPE, decode_results, encode_checks
+
+    manager = RBACManager(InMemoryStorage())
+    manager.add_user("alice")
+    manager.add_permission("read")
+    fast_app = create_app(manager)
+
+    async with AsyncClient(app=fast_app, base_url="http://test") as ac:
+        resp = await ac.post("/rbac/fast/check-permission", json={"username": "alice", "permission": "read"})
+        assert resp.status_code == 200
+        assert resp.json() == {"has_permission": False}
+
+        resp = await ac.post("/rbac/fast/check-permission", json={"username": "bob", "permission": "read"})
+        assert resp.status_code == 404
+
+        for body in ({"username": ["alice"], "permission": "read"}, {"username": "alice", "permission": {}}):
+            resp = await ac.post("/rbac/fast/check-permission", json=body)
+            assert resp.status_code == 422
+        manager.compile()
+        resp = await ac.post("/rbac/fast/check-permission", json={"username": ["alice"], "permission": "read"})
+        assert resp.status_code == 422
+
+        resp = await ac.post("/rbac/fast/check-batch", json={"checks": [["alice", "read"], ["bob", "read"]]})
+        assert resp.json() == {"results": [False, None]}
+        for checks in ([[["alice"], "read"]], [["alice", 1]], [["alice", "read", "x"]]):
+            resp = await ac.post("/rbac/fast/check-batch", json={"checks": checks})
+            assert resp.status_code == 422
+
+        loop_thread = threading.get_ident()
+        callers = []
+        check_permissions = manager.check_permissions
+        manager.check_permissions = lambda checks: callers.append(threading.get_ident()) or check_permissions(checks)
+        await ac.post("/rbac/fast/check-batch", json={"checks": [["alice", "read"]]})
+        assert callers and loop_thread not in callers
+
+        resp = await ac.post(
+            "/rbac/fast/check-batch",
+            content=encode_checks([("alice", "read")]),
+            headers={"content-type": BATCH_CONTENT_TYPE},
+        )
+        assert decode_results(resp.content) == [False]
+
+
+@pytest.mark.asyncio
+async def test_capability_token_routes():
+    from rbac.tokens import CapabilityVerifier, PermissionDictionary
+
+    manager = RBACManager(InMemoryStorage())
+    manager.add_user("alice")
+    manager.add_permission("read")
+    token_app = create_app(manager, token_key=b"secret")
+
+    async with AsyncClient(app=token_app, base_url="http://test") as ac:
+        resp = await ac.post("/rbac/tokens", json={"username": "alice"})
+        assert resp.status_code == 200
+        token = resp.json()["token"]
+        dictionary = PermissionDictionary.from_dict((await ac.get("/rbac/tokens/dictionary")).json())
+        assert not CapabilityVerifier(b"secret", dictionary).allows(token, "read")
+
+        resp = await ac.post("/rbac/tokens", json={"username": "bob"})
+        assert resp.status_code == 404
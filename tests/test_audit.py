@@ -0,0 +1,75 @@
+from rbac.models import Role
+from rbac.core.audit import find_violations
+from rbac.core.manager import RBACManager
+from rbac.storage.memory import InMemoryStorage
+from rbac.ssd.memory import InMemorySSDConstraint
+from rbac.dsd.memory import InMemoryDSDConstraint
+
+
+def test_find_violations_groups_identical_role_sets():
+    """Subjects sharing a role set are each reported once per violated set."""
+    violations, scanned = find_violations(
+        [("a", {"x", "y"}), ("b", {"y", "x", "z"}), ("c", {"x"}), ("d", set())],
+        {"xy": {"x", "y"}, "yz": {"y", "z"}},
+    )
+    assert scanned == 4
+    found = {(v.set_name, v.subject, tuple(sorted(v.roles))) for v in violations}
+    assert found == {
+        ("xy", "a", ("x", "y")),
+        ("xy", "b", ("x", "y")),
+        ("yz", "b", ("y", "z")),
+    }
+
+
+def test_find_violations_respects_limits():
+    """A set with a higher limit only flags subjects above it."""
+    violations, _ = find_violations(
+        [("a", {"x", "y"}), ("b", {"x", "y", "z"})],
+        {"trio": {"x", "y", "z"}},
+        limits={"trio": 2},
+    )
+    assert [v.subject for v in violations] == ["b"]
+
+
+def test_manager_audit_reports_preexisting_ssd_and_dsd_violations():
+    """Sets added after the fact are audited against existing users and sessions."""
+    ssd = InMemorySSDConstraint()
+    dsd = InMemoryDSDConstraint()
+    manager = RBACManager(storage=InMemoryStorage(), ssd_constraint=ssd, dsd_constraint=dsd)
+    for role in ["payer", "approver", "auditor"]:
+        manager.add_role(Role(role))
+    manager.add_user("hank")
+    manager.add_user("ivy")
+    manager.assign_role("hank", "payer")
+    manager.assign_role("hank", "approver")
+    manager.assign_role("ivy", "auditor")
+    session = manager.create_session("hank", {"payer", "approver"})
+
+    ssd.add_set("payments", {"payer", "approver"})
+    dsd.add_set("payments_live", {"payer", "approver"})
+    audit = manager.audit_constraints()
+
+    assert [(v.set_name, v.subject) for v in audit.ssd_violations] == [("payments", "hank")]
+    assert [(v.set_name, v.subject) for v in audit.dsd_violations] == [("payments_live", session.session_id)]
+    assert audit.users_scanned == 2
+    assert audit.sessions_scanned == 1
+
+
+def test_audit_counts_inherited_roles():
+    """A user holding a role and a junior of a conflicting role is reported."""
+    ssd = InMemorySSDConstraint()
+    manager = RBACManager(storage=InMemoryStorage(), ssd_constraint=ssd)
+    approver = Role("approver")
+    lead = Role("lead")
+    lead.add_parent(approver)
+    for role in [approver, lead, Role("payer")]:
+        manager.add_role(role)
+    manager.add_user("nina")
+    manager.assign_role("nina", "payer")
+    manager.assign_role("nina", "lead")
+
+    ssd.add_set("payments", {"payer", "approver"})
+    audit = manager.audit_constraints()
+    assert [(v.set_name, v.subject, sorted(v.roles)) for v in audit.ssd_violations] == [
+        ("payments", "nina", ["approver", "payer"])
+    ]
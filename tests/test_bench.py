@@ -0,0 +1,114 @@
+import pytest
+from rbac.bench.stats import percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    """Percentiles use the nearest-rank definition."""
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 0.50) == 0.050
+    assert percentile(values, 0.99) == 0.099
+    assert percentile([], 0.5) == 0.0
+
+
+def test_summarize_reports_throughput_and_percentiles():
+    """Summaries are plain JSON-friendly numbers in milliseconds."""
+    summary = summarize([0.002, 0.001, 0.004, 0.003], elapsed=2.0, errors=1)
+    assert summary["count"] == 4
+    assert summary["errors"] == 1
+    assert summary["throughput_per_second"] == 2.0
+    assert summary["p50_ms"] == pytest.approx(2.0)
+    assert summary["max_ms"] == pytest.approx(4.0)
+
+
+def test_in_process_load_test_report():
+    """A short in-process run reports every route in the mix."""
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    import asyncio
+    from rbac.bench.loadtest import parse_mix, run
+    from rbac.bench.policy import PolicyShape
+
+    shape = PolicyShape(users=10, roles=4, permissions=20)
+    report = asyncio.run(run(shape, parse_mix("check=1,assign=1,session=1"), clients=4, requests=60))
+    assert {"check", "assign", "session_create", "session_end"} <= set(report["routes"])
+    assert report["total"]["errors"] == 0
+
+
+def test_trace_record_and_replay(tmp_path):
+    """A recorded trace replays against a fresh manager with the same decisions."""
+    import time
+    from datetime import datetime, timezone
+    from rbac.bench.policy import PolicyShape, build_policy
+    from rbac.bench.replay import replay
+    from rbac.bench.trace import TraceRecorder, read_trace
+    from rbac.core import RBACManager
+    from rbac.models import Role
+    from rbac.storage.journal import load_state
+
+    manager = build_policy(PolicyShape(users=5, roles=3, permissions=10))
+    manager.add_role(Role("oncall"))
+    manager.assign_role("user0", "oncall", expires_at=datetime.fromtimestamp(time.time() + 3600, tz=timezone.utc))
+    path = tmp_path / "traffic.rbt"
+    with TraceRecorder(manager, str(path)) as recorder:
+        for i in range(20):
+            manager.check_permission(f"user{i % 5}", f"perm{i % 10}")
+        with pytest.raises(ValueError):
+            manager.check_permission("ghost", "perm0")
+        manager.check_permissions([("user1", "perm1"), ("ghost", "perm1")])
+        manager.add_user("newbie")
+        manager.add_role(Role("auditor"))
+        manager.grant_permission("auditor", "perm3")
+        manager.assign_role("newbie", "auditor")
+        session = manager.create_session("newbie", {"auditor"})
+        manager.deactivate_session_role(session.session_id, "auditor")
+        manager.activate_session_role(session.session_id, "auditor")
+        manager.end_session(session.session_id)
+        manager.lint()
+        manager.lint(apply=True)
+        manager.reconcile({"users": {"carol": ["auditor"]}})
+        manager.check_permission("carol", "perm3")
+    assert recorder.writer is None
+    assert "check_permission" not in vars(manager)
+
+    snapshot, events = read_trace(path.read_bytes())
+    assert [event.label for event in events[-12:]] == [
+        "check_batch", "add_users", "add_role", "grant_permissions", "assign_roles", "create_session",
+        "deactivate_session_role", "activate_session_role", "end_session", "lint", "reconcile", "check",
+    ]
+    assert events[-12].results == [1 if manager.check_permission("user1", "perm1") else 0, 2]
+    assert events[-1].outcome == 1
+    for compile_first in (False, True):
+        storage, ssd, dsd = load_state(snapshot, expiry_offset=time.time())
+        assert storage.get_user("user0").expirations["oncall"] > time.time() + 3500
+        target = RBACManager(storage, ssd_constraint=ssd, dsd_constraint=dsd)
+        if compile_first:
+            target.compile()
+            target.enable_name_filter()
+        report = replay(events, target)
+        assert report["events"] == 33
+        assert report["decisions"]["mismatches"] == 0
+        assert report["decisions"]["errors"] == 2
+        assert report["operations"]["check"]["count"] == 22
+        assert report["total"]["errors"] == 1
+        assert target.storage.get_user("carol") is not None
+        if compile_first:
+            assert report["cache"]["compiled_hits"] >= 20
+            assert report["cache"]["recompiles"] >= 1
+            assert report["cache"]["name_filter_rejections"] >= 1
+
+
+def test_batch_checks_are_recorded_the_same_on_any_engine(tmp_path):
+    """check_permissions is one batch event whether or not the policy is compiled."""
+    from rbac.bench.policy import PolicyShape, build_policy
+    from rbac.bench.trace import TraceRecorder, read_trace
+
+    labels = []
+    for compiled in (False, True):
+        manager = build_policy(PolicyShape(users=3, roles=2, permissions=4))
+        if compiled:
+            manager.compile()
+        path = tmp_path / f"batch-{compiled}.rbt"
+        with TraceRecorder(manager, str(path)):
+            manager.check_permissions([("user0", "perm0"), ("user1", "perm1")])
+        labels.append([event.label for event in read_trace(path.read_bytes())[1]])
+    assert labels == [["check_batch"], ["check_batch"]]
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import httpx
+import pytest
+from rbac.client import AsyncRBACClient, RBACClient
+from rbac.codec import BATCH_CONTENT_TYPE, decode_checks, dumps, encode_results
+from rbac.core.manager import RBACManager
+from rbac.models import Role
+from rbac.storage.memory import InMemoryStorage
+
+
+class StandInServer:
+    """Answers the client's routes from an in-process manager and records every batch."""
+
+    def __init__(self):
+        self.manager = RBACManager(InMemoryStorage())
+        self.manager.add_role(Role("reader"))
+        self.manager.add_permission("doc:read")
+        self.manager.grant_permission("reader", "doc:read")
+        for i in range(20):
+            self.manager.add_user(f"user{i}")
+        self.manager.assign_role("user0", "reader")
+        self.batches: list[list[tuple[str, str]]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/rbac/fast/check-batch":
+            checks = decode_checks(request.content)
+            with self._lock:
+                self.batches.append(checks)
+            body = encode_results(self.manager.check_permissions(checks))
+            return httpx.Response(200, content=body, headers={"content-type": BATCH_CONTENT_TYPE})
+        if request.url.path == "/rbac/assign-role":
+            payload = httpx.Response(200, content=request.content).json()
+            try:
+                self.manager.assign_role(payload["username"], payload["role"])
+            except ValueError as e:
+                return httpx.Response(400, content=dumps({"detail": str(e)}))
+            return httpx.Response(200, json={"status": "success"})
+        if request.method == "DELETE" and request.url.path.startswith("/rbac/users/"):
+            _, _, _, username, _, role = request.url.path.split("/")
+            self.manager.revoke_role(username, role)
+            return httpx.Response(200, json={"status": "success"})
+        return httpx.Response(404, json={"detail": "Not Found"})
+
+
+def test_concurrent_checks_share_batches_and_cache():
+    """Threads checking at once are sent together; repeats are answered locally."""
+    server = StandInServer()
+    client = RBACClient(transport=httpx.MockTransport(server), batch_window=0.05)
+    results = {}
+
+    def worker(i):
+        results[i] = client.check(f"user{i}", "doc:read")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results[0] is True and results[1] is False
+    assert len(server.batches) < 20
+    assert sum(len(batch) for batch in server.batches) == 20
+    assert client.check("user0", "doc:read") is True
+    assert client.check_many([("user1", "doc:read"), ("ghost", "doc:read")]) == [False, None]
+    assert len(server.batches) <= 20
+    assert client.cache.hits == 2
+    client.close()
+
+
+def test_assign_through_client_invalidates_cached_decisions():
+    """A role change made through the client is visible on the next check."""
+    server = StandInServer()
+    with RBACClient(transport=httpx.MockTransport(server), batch_window=0) as client:
+        assert client.check("user1", "doc:read") is False
+        client.assign_role("user1", "reader")
+        assert client.check("user1", "doc:read") is True
+        with pytest.raises(ValueError, match="not found"):
+            client.assign_role("user1", "missing")
+
+
+def test_revoke_during_an_inflight_batch_is_not_cached_over():
+    """An answer from a batch sent before a revoke is returned but not cached."""
+    server = StandInServer()
+    answered, release = threading.Event(), threading.Event()
+
+    def slow(request):
+        response = server(request)
+        if request.url.path == "/rbac/fast/check-batch" and not answered.is_set():
+            answered.set()
+            release.wait(5)
+        return response
+
+    with RBACClient(transport=httpx.MockTransport(slow), batch_window=0) as client:
+        results = []
+        worker = threading.Thread(target=lambda: results.append(client.check("user0", "doc:read")))
+        worker.start()
+        assert answered.wait(5)
+        client.revoke_role("user0", "reader")
+        release.set()
+        worker.join()
+        assert results == [True]
+        assert client.check("user0", "doc:read") is False
+
+
+def test_async_checks_are_coalesced_and_batched():
+    """Identical concurrent checks cause one lookup; distinct ones share one request."""
+    server = StandInServer()
+
+    async def scenario():
+        async with AsyncRBACClient(transport=httpx.MockTransport(server)) as client:
+            same = await asyncio.gather(*(client.check("user0", "doc:read") for _ in range(50)))
+            mixed = await client.check_many([(f"user{i}", "doc:read") for i in range(5)] + [("x", "y")])
+            return same, mixed, client.stats
+
+    same, mixed, stats = asyncio.run(scenario())
+    assert same == [True] * 50
+    assert mixed == [True, False, False, False, False, None]
+    assert server.batches[0] == [("user0", "doc:read")]
+    assert len(server.batches) == 2
+    assert stats.coalesced == 49
+
+
+def test_async_client_against_the_app():
+    """The client speaks the real API's routes and formats."""
+    pytest.importorskip("fastapi")
+    from rbac.api import create_app
+
+    server = StandInServer()
+    app = create_app(server.manager)
+
+    async def scenario():
+        async with AsyncRBACClient(transport=httpx.ASGITransport(app=app)) as client:
+            before = await client.check("user2", "doc:read")
+            await client.assign_role("user2", "reader")
+            return before, await client.check("user2", "doc:read"), await client.user_permissions("user2")
+
+    assert asyncio.run(scenario()) == (False, True, {"doc:read"})
@@ -0,0 +1,35 @@
+import pytest
+from rbac.codec import decode_checks, decode_results, encode_checks, encode_results, dumps, loads
+from rbac.bench.policy import PolicyShape, build_policy, sample_checks
+
+
+def test_batch_round_trip():
+    """Checks and results survive encoding, including non-ASCII names."""
+    checks = [("alice", "article:1:edit"), ("zoë", "read")]
+    assert decode_checks(encode_checks(checks)) == checks
+    assert decode_results(encode_results([True, False, None])) == [True, False, None]
+
+
+def test_malformed_batch_is_rejected():
+    """Truncated or padded payloads raise ValueError."""
+    data = encode_checks([("alice", "read")])
+    with pytest.raises(ValueError):
+        decode_checks(data[:-1])
+    with pytest.raises(ValueError):
+        decode_checks(data + b"\x00")
+
+
+def test_json_helpers_are_compact():
+    """JSON output has no whitespace, whichever encoder is available."""
+    assert dumps({"has_permission": True}) == b'{"has_permission":true}'
+    assert loads(b'{"a": [1]}') == {"a": [1]}
+
+
+def test_check_permissions_reports_unknown_names_as_none():
+    """Batch checks agree with single checks and do not raise."""
+    shape = PolicyShape(users=20, roles=5, permissions=30, seed=3)
+    manager = build_policy(shape)
+    checks = sample_checks(shape, 50) + [("ghost", "perm0"), ("user0", "missing")]
+    results = manager.check_permissions(checks)
+    assert results[:50] == [manager.check_permission(u, p) for u, p in checks[:50]]
+    assert results[50:] == [None, None]
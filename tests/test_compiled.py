@@ -0,0 +1,111 @@
+from rbac.models import Role, Permission
+from rbac.core.manager import RBACManager
+from rbac.storage.memory import InMemoryStorage
+
+
+def build_manager():
+    manager = RBACManager(storage=InMemoryStorage())
+    viewer = Role("viewer")
+    editor = Role("editor")
+    editor.add_parent(viewer)
+    manager.add_role(viewer)
+    manager.add_role(editor)
+    for perm in ["read", "write", "doc:*:share"]:
+        manager.add_permission(perm)
+    manager.grant_permission("viewer", "read")
+    manager.grant_permission("editor", "write")
+    manager.grant_permission("editor", "doc:*:share")
+    for name in ["alice", "bob", "carol"]:
+        manager.add_user(name)
+    manager.assign_role("alice", "editor")
+    manager.assign_role("bob", "editor")
+    manager.assign_role("carol", "viewer")
+    return manager
+
+
+def test_compile_reports_stats_and_deduplicates_role_sets():
+    """Users sharing a role set share one compiled group."""
+    manager = build_manager()
+    stats = manager.compile()
+    assert stats.users == 3
+    assert stats.role_groups == 2
+    assert stats.permissions == 2
+    assert stats.memory_bytes > 0
+    assert stats.compile_seconds >= 0
+
+
+def test_compiled_checks_match_live_checks():
+    """Compiled decisions agree with hierarchical evaluation."""
+    manager = build_manager()
+    manager.compile()
+    assert manager.check_permission("alice", "read")
+    assert manager.check_permission("alice", "write")
+    assert not manager.check_permission("carol", "write")
+    # Concrete names only covered by a pattern fall back to the live path
+    assert manager.check_permission("bob", "doc:1:share")
+
+
+def test_assignment_patches_compiled_policy_in_place():
+    """Role assignment updates the snapshot without a rebuild."""
+    manager = build_manager()
+    manager.compile()
+    compiled = manager.compiled
+    manager.assign_role("carol", "editor")
+    assert manager.compiled is compiled
+    assert manager.check_permission("carol", "write")
+
+    manager.revoke_role("carol", "editor")
+    assert not manager.check_permission("carol", "write")
+
+
+def test_grant_triggers_recompile():
+    """Grant and hierarchy changes invalidate the snapshot."""
+    manager = build_manager()
+    manager.compile()
+    compiled = manager.compiled
+    manager.add_permission("delete")
+    manager.grant_permission("viewer", "delete")
+    assert manager.check_permission("carol", "delete")
+    assert manager.compiled is not compiled
+
+    admin = Role("admin")
+    manager.storage.get_role("viewer").add_parent(admin)
+    admin.add_permission(Permission("write"))
+    assert manager.check_permission("carol", "write")
+
+
+def test_compiled_masks_cover_diamond_hierarchies():
+    """Roles reachable through several parents are resolved before their children."""
+    manager = RBACManager(storage=InMemoryStorage())
+    top, left, right, root = Role("top"), Role("left"), Role("right"), Role("root")
+    left.add_parent(root)
+    right.add_parent(root)
+    right.add_parent(left)
+    top.add_parent(root)
+    top.add_parent(right)
+    for role in [top, left, right, root]:
+        manager.add_role(role)
+    manager.add_permission("base")
+    manager.grant_permission("root", "base")
+    manager.add_user("dan")
+    manager.assign_role("dan", "top")
+
+    manager.compile()
+    assert manager.compiled.lookup("dan", "base") is True
+
+
+def test_changes_in_another_manager_keep_the_compiled_policy():
+    """Only role changes in a manager's own storage, made through it or not, force a recompile."""
+    first, second = build_manager(), build_manager()
+    second.compile()
+    compiled = second.compiled
+
+    first.grant_permission("viewer", "write")
+    first.storage.get_role("editor").add_parent(Role("auditor"))
+    assert second.check_permission("carol", "read")
+    assert second.compiled is compiled
+    assert first.check_permission("carol", "write")
+
+    second.storage.get_role("viewer").add_permission(Permission("write"))
+    assert second.check_permission("carol", "write")
+    assert second.compiled is not compiled
@@ -100,3 +100,105 @@ def test_conflict_applies_only_to_active_roles():
     # Valid: only one active role
     session = manager.create_session("carol", {"admin"})
     assert session.active_roles == {"admin"}
+
+
+def test_activating_conflicting_role_in_live_session_fails():
+    """Live activation is checked against DSD sets, not just session creation."""
+    dsd = InMemoryDSDConstraint(conflict_sets={
+        "grading_restriction": {"exam_creator", "exam_grader"}
+    })
+    manager = RBACManager(storage=InMemoryStorage(), dsd_constraint=dsd)
+    manager.add_role(Role("exam_creator"))
+    manager.add_role(Role("exam_grader"))
+    manager.add_role(Role("viewer"))
+    manager.add_user("erin")
+    for role in ["exam_creator", "exam_grader", "viewer"]:
+        manager.assign_role("erin", role)
+
+    session = manager.create_session("erin", {"exam_creator"})
+    with pytest.raises(ValueError, match="DSD violation"):
+        manager.activate_session_role(session.session_id, "exam_grader")
+    assert session.active_roles == {"exam_creator"}
+
+    manager.activate_session_role(session.session_id, "viewer")
+    manager.deactivate_session_role(session.session_id, "exam_creator")
+    manager.activate_session_role(session.session_id, "exam_grader")
+    assert session.active_roles == {"viewer", "exam_grader"}
+
+
+def test_live_session_recounts_after_dsd_set_changes():
+    """Changing DSD sets is picked up by existing sessions."""
+    dsd = InMemoryDSDConstraint()
+    manager = RBACManager(storage=InMemoryStorage(), dsd_constraint=dsd)
+    manager.add_role(Role("X"))
+    manager.add_role(Role("Y"))
+    manager.add_user("fay")
+    manager.assign_role("fay", "X")
+    manager.assign_role("fay", "Y")
+
+    session = manager.create_session("fay", {"X"})
+    dsd.add_set("conflict", {"X", "Y"})
+    with pytest.raises(ValueError, match="DSD violation"):
+        manager.activate_session_role(session.session_id, "Y")
+
+    dsd.remove_set("conflict")
+    manager.activate_session_role(session.session_id, "Y")
+    assert session.active_roles == {"X", "Y"}
+
+
+def test_session_activation_requires_assignment_and_live_session():
+    """Unassigned roles and unknown sessions are rejected."""
+    manager = RBACManager(storage=InMemoryStorage())
+    manager.add_role(Role("admin"))
+    manager.add_user("gus")
+    session = manager.create_session("gus", set())
+
+    with pytest.raises(ValueError, match="not assigned"):
+        manager.activate_session_role(session.session_id, "admin")
+
+    manager.end_session(session.session_id)
+    with pytest.raises(ValueError, match="not found"):
+        manager.activate_session_role(session.session_id, "admin")
+
+
+def test_dsd_cardinality_limits_active_roles():
+    """A DSD set with max_roles=2 lets a session hold two of its roles active, not three."""
+    dsd = InMemoryDSDConstraint()
+    dsd.add_set("desk", {"trader", "sales", "risk"}, max_roles=2)
+    manager = RBACManager(storage=InMemoryStorage(), dsd_constraint=dsd)
+    for name in ["trader", "sales", "risk"]:
+        manager.add_role(Role(name))
+    manager.add_user("kim")
+    for name in ["trader", "sales", "risk"]:
+        manager.assign_role("kim", name)
+
+    session = manager.create_session("kim", {"trader", "sales"})
+    with pytest.raises(ValueError, match="DSD violation"):
+        manager.activate_session_role(session.session_id, "risk")
+    manager.deactivate_session_role(session.session_id, "sales")
+    manager.activate_session_role(session.session_id, "risk")
+    with pytest.raises(ValueError, match="DSD violation"):
+        manager.create_session("kim", {"trader", "sales", "risk"})
+
+
+def test_dsd_counts_inherited_roles():
+    """A session cannot activate a role whose ancestor conflicts with an active role."""
+    dsd = InMemoryDSDConstraint()
+    dsd.add_set("payments", {"payer", "approver"})
+    manager = RBACManager(storage=InMemoryStorage(), dsd_constraint=dsd)
+    approver = Role("approver")
+    manager_role = Role("finance_manager")
+    manager_role.add_parent(approver)
+    for role in [approver, manager_role, Role("payer")]:
+        manager.add_role(role)
+    manager.add_user("max")
+    manager.assign_role("max", "payer")
+    manager.assign_role("max", "finance_manager")
+
+    with pytest.raises(ValueError, match="DSD violation"):
+        manager.create_session("max", {"payer", "finance_manager"})
+    session = manager.create_session("max", {"payer"})
+    with pytest.raises(ValueError, match="DSD violation"):
+        manager.activate_session_role(session.session_id, "finance_manager")
+    manager.deactivate_session_role(session.session_id, "payer")
+    manager.activate_session_role(session.session_id, "finance_manager")
@@ -0,0 +1,27 @@
+import json
+import subprocess
+import sys
+
+# Worst-case wall time allowed for importing the decision core in a fresh interpreter.
+IMPORT_BUDGET_SECONDS = 0.5
+
+WEB_PACKAGES = {"fastapi", "pydantic", "starlette", "uvicorn", "httpx"}
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import rbac.core, rbac.models, rbac.storage, rbac.ssd.memory, rbac.dsd.memory
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "elapsed": elapsed,
+    "web": sorted(name for name in sys.modules if name.split(".")[0] in %r),
+}))
+""" % (WEB_PACKAGES,)
+
+
+def test_core_imports_without_web_dependencies_within_budget():
+    """The decision core loads no web framework modules and imports quickly."""
+    result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+    probe = json.loads(result.stdout)
+    assert probe["web"] == []
+    assert probe["elapsed"] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,98 @@
+import pytest
+from rbac.core.jobs import JobRunner
+from rbac.core.manager import RBACManager
+from rbac.dsd.memory import InMemoryDSDConstraint
+from rbac.models import Role
+from rbac.ssd.memory import InMemorySSDConstraint
+from rbac.storage import InMemoryStorage
+from rbac.storage.journal import encode_state, load_state
+
+
+def make_manager():
+    ssd, dsd = InMemorySSDConstraint(), InMemoryDSDConstraint()
+    manager = RBACManager(InMemoryStorage(), ssd_constraint=ssd, dsd_constraint=dsd)
+    manager.add_users(["alice", "bob"])
+    for name in ("payer", "approver", "viewer"):
+        manager.add_role(Role(name))
+    manager.add_permission("pay")
+    manager.add_permission("read")
+    manager.grant_permission("payer", "pay")
+    manager.grant_permission("viewer", "read")
+    manager.grant_permission("payer", "read")
+    manager.assign_role("alice", "payer")
+    manager.assign_role("alice", "approver")
+    manager.assign_role("bob", "viewer")
+    dsd.add_set("payments", {"payer", "approver"})
+    return manager
+
+
+def test_snapshot_round_trip():
+    """load_state rebuilds the storage and constraint engines that encode_state captured."""
+    manager = make_manager()
+    storage, ssd, dsd = load_state(encode_state(manager.storage, manager.ssd, manager.dsd))
+    copy = RBACManager(storage, ssd_constraint=ssd, dsd_constraint=dsd)
+    assert copy.get_user_permissions("alice") == {"pay", "read"}
+    assert {role.name for role in copy.storage.get_user("alice").roles} == {"payer", "approver"}
+    assert dsd.get_conflict_sets() == manager.dsd.get_conflict_sets()
+
+
+def test_jobs_run_in_worker_processes():
+    """Pool results match the same operations run in process."""
+    manager = make_manager()
+    runner = JobRunner(manager, max_workers=1)
+    try:
+        jobs = {kind: runner.submit(kind) for kind in ("audit", "lint", "permission_report")}
+        diff = runner.submit("policy_diff", {"document": {"users": {"carol": []}}})
+        for job in [*jobs.values(), diff]:
+            finished = runner.wait(job.job_id, timeout=60)
+            assert finished.status == "succeeded", finished.error
+            assert finished.progress == 1.0
+        assert runner.get(jobs["permission_report"].job_id).result == "".join(manager.permission_matrix().iter_csv())
+        audit = runner.get(jobs["audit"].job_id).result
+        assert audit["dsd_violations"] == []
+        assert runner.get(jobs["lint"].job_id).result["traversal_saved"] == manager.lint().traversal_saved
+        assert runner.get(diff.job_id).result["change_count"] == manager.reconcile(
+            {"users": {"carol": []}}, dry_run=True
+        ).change_count
+        assert manager.storage.get_user("carol") is None
+    finally:
+        runner.shutdown()
+
+
+def test_unknown_jobs_are_rejected():
+    """Unknown kinds and job IDs raise ValueError without starting the pool."""
+    runner = JobRunner(make_manager())
+    with pytest.raises(ValueError):
+        runner.submit("recompile")
+    with pytest.raises(ValueError):
+        runner.get("missing")
+    assert runner._executor is None
+
+
+def test_job_routes():
+    """Jobs are submitted, polled and their results downloaded over HTTP."""
+    import asyncio
+    import httpx
+    from rbac.api import create_app
+
+    app = create_app(make_manager(), prefix="", job_workers=1)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.post("/jobs", json={"kind": "nope"})).status_code == 422
+            assert (await client.get("/jobs/missing")).status_code == 404
+            resp = await client.post("/jobs", json={"kind": "permission_report"})
+            assert resp.status_code == 202
+            job_id = resp.json()["job_id"]
+            app.state.jobs.wait(job_id, timeout=60)
+            assert (await client.get(f"/jobs/{job_id}")).json()["status"] == "succeeded"
+            resp = await client.get(f"/jobs/{job_id}/result")
+            assert resp.headers["content-type"].startswith("text/csv")
+            assert resp.text.splitlines()[0] == "username,permission"
+            assert [job["job_id"] for job in (await client.get("/jobs")).json()] == [job_id]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        app.state.jobs.shutdown()
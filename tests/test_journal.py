@@ -0,0 +1,141 @@
+import threading
+import pytest
+from rbac.models import Role
+from rbac.core.manager import RBACManager
+from rbac.storage.journal import JournaledStorage, JOURNAL_FILE
+
+
+def open_manager(path, **kwargs):
+    storage = JournaledStorage(str(path), **kwargs)
+    return RBACManager(storage, ssd_constraint=storage.ssd, dsd_constraint=storage.dsd)
+
+
+def populate(manager):
+    viewer = Role("viewer")
+    editor = Role("editor")
+    editor.add_parent(viewer)
+    manager.add_role(viewer)
+    manager.add_role(editor)
+    manager.add_permission("read")
+    manager.grant_permission("viewer", "read")
+    manager.add_user("alice")
+    manager.assign_role("alice", "editor")
+    manager.ssd.add_set("exclusive", {"editor", "auditor"})
+    manager.dsd.add_set("live", {"viewer", "auditor"})
+
+
+def test_replay_restores_state_after_restart(tmp_path):
+    """Every journaled mutation is replayed on startup."""
+    manager = open_manager(tmp_path, fsync=False)
+    populate(manager)
+    manager.storage.close()
+
+    restored = open_manager(tmp_path, fsync=False)
+    assert restored.check_permission("alice", "read")
+    assert restored.ssd.get_all_sets().keys() == {"exclusive"}
+    assert restored.dsd.get_conflict_sets() == {"live": {"viewer", "auditor"}}
+
+
+def test_compaction_writes_checkpoint_and_truncates_journal(tmp_path):
+    """After compaction the journal is empty and state comes from the checkpoint."""
+    manager = open_manager(tmp_path, fsync=False)
+    populate(manager)
+    manager.storage.compact()
+    assert (tmp_path / JOURNAL_FILE).stat().st_size == 0
+    manager.add_user("bob")
+    manager.storage.close()
+
+    restored = open_manager(tmp_path, fsync=False)
+    assert restored.check_permission("alice", "read")
+    assert restored.storage.get_user("bob") is not None
+
+
+def test_torn_tail_is_discarded(tmp_path):
+    """A partially written record at the end of the journal is ignored and truncated."""
+    manager = open_manager(tmp_path, fsync=False)
+    populate(manager)
+    manager.storage.close()
+    with open(tmp_path / JOURNAL_FILE, "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x01\x02")
+
+    restored = open_manager(tmp_path, fsync=False)
+    assert restored.check_permission("alice", "read")
+    restored.add_user("carol")
+    restored.storage.close()
+    assert open_manager(tmp_path, fsync=False).storage.get_user("carol") is not None
+
+
+def test_concurrent_writers_share_commits(tmp_path):
+    """Writers that arrive during a flush are committed together."""
+    manager = open_manager(tmp_path)
+    threads = [
+        threading.Thread(target=lambda i=i: [manager.add_permission(f"p{i}_{j}") for j in range(20)])
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    journal = manager.storage.journal
+    assert journal.records_since_checkpoint == 160
+    assert journal.commits <= 160
+    manager.storage.close()
+    assert len(open_manager(tmp_path, fsync=False).storage.get_all_permissions()) == 160
+
+
+def test_auto_compaction_after_threshold(tmp_path):
+    """The journal is compacted once it holds `checkpoint_every` records."""
+    manager = open_manager(tmp_path, checkpoint_every=5, fsync=False)
+    for i in range(7):
+        manager.add_permission(f"p{i}")
+    assert manager.storage.journal.records_since_checkpoint == 2
+    with pytest.raises(ValueError):
+        manager.ssd.remove_set("missing")
+    assert manager.storage.journal.records_since_checkpoint == 2
+
+
+def test_role_expiry_survives_restart(tmp_path):
+    """Expiry times are journaled with the user and re-armed on startup."""
+    from datetime import datetime, timedelta, timezone
+    manager = open_manager(tmp_path, fsync=False)
+    populate(manager)
+    manager.add_role(Role("oncall"))
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=8)
+    manager.assign_role("alice", "oncall", expires_at=expires_at)
+    manager.storage.close()
+
+    restored = open_manager(tmp_path, fsync=False)
+    user = restored.storage.get_user("alice")
+    assert user.expirations == {"oncall": expires_at.timestamp()}
+    assert restored.expire_assignments(now=expires_at.timestamp()) == 1
+    assert not restored.storage.get_user("alice").has_role("oncall")
+
+
+def test_constraint_limits_survive_restart(tmp_path):
+    """SSD and DSD max_roles are journaled and checkpointed."""
+    manager = open_manager(tmp_path, fsync=False)
+    manager.ssd.add_set("trio", {"a", "b", "c"}, max_roles=2)
+    manager.dsd.add_set("duo", {"a", "b"})
+    manager.storage.compact()
+    manager.dsd.add_set("quad", {"a", "b", "c", "d"}, max_roles=3)
+    manager.storage.close()
+
+    restored = open_manager(tmp_path, fsync=False)
+    assert restored.ssd.get_limits() == {"trio": 2}
+    assert restored.dsd.get_limits() == {"duo": 1, "quad": 3}
+
+
+def test_save_many_is_one_commit(tmp_path):
+    """A bulk assignment is journaled with a single group commit and replays fully."""
+    manager = open_manager(tmp_path, fsync=False)
+    manager.add_role(Role("viewer"))
+    names = [f"user{i}" for i in range(50)]
+    manager.add_users(names)
+    commits = manager.storage.journal.commits
+    manager.assign_roles([(name, "viewer") for name in names])
+    assert manager.storage.journal.commits == commits + 1
+    manager.storage.close()
+
+    restored = open_manager(tmp_path, fsync=False)
+    assert all(restored.storage.get_user(name).get_role_names() == {"viewer"} for name in names)
@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+from rbac.models import Role
+from rbac.core.manager import RBACManager
+from rbac.storage.memory import InMemoryStorage
+
+
+def build_manager():
+    """viewer <- editor <- admin, with a shortcut admin -> viewer and duplicated grants."""
+    manager = RBACManager(storage=InMemoryStorage())
+    viewer, editor, admin = Role("viewer"), Role("editor"), Role("admin")
+    editor.add_parent(viewer)
+    admin.add_parent(editor)
+    admin.add_parent(viewer)
+    for role in [viewer, editor, admin]:
+        manager.add_role(role)
+    for perm in ["read", "write", "doc:*:read"]:
+        manager.add_permission(perm)
+    manager.grant_permission("viewer", "read")
+    manager.grant_permission("viewer", "doc:*:read")
+    manager.grant_permission("editor", "write")
+    manager.grant_permission("admin", "read")
+    manager.add_user("alice")
+    manager.assign_role("alice", "admin")
+    manager.assign_role("alice", "viewer")
+    manager.add_user("bob")
+    manager.assign_role("bob", "editor")
+    return manager
+
+
+def test_lint_finds_redundant_edges():
+    """Shortcut parents, inherited grants and ancestor assignments are reported."""
+    report = build_manager().lint()
+    assert report.redundant_parents == [("admin", "viewer")]
+    assert report.redundant_grants == [("admin", "read")]
+    assert report.redundant_assignments == [("alice", "viewer")]
+    assert report.traversal_saved > 0
+    assert not report.applied
+
+
+def test_apply_reduction_preserves_effective_permissions():
+    """Applying the reduction removes edges without changing any decision."""
+    manager = build_manager()
+    before = {u: manager.get_user_permissions(u) for u in ["alice", "bob"]}
+    report = manager.lint(apply=True)
+
+    assert report.applied
+    assert {u: manager.get_user_permissions(u) for u in ["alice", "bob"]} == before
+    assert manager.check_permission("alice", "doc:7:read")
+    assert manager.storage.get_user("alice").get_role_names() == {"admin"}
+
+    again = manager.lint()
+    assert not (again.redundant_parents or again.redundant_grants or again.redundant_assignments)
+    assert again.traversal_cost_before == report.traversal_cost_after
+
+
+def test_time_bound_roles_do_not_make_assignments_redundant():
+    """A permanent assignment implied only by an expiring role is kept, and lapsed roles are not linted."""
+    now = [1_000.0]
+    manager = RBACManager(storage=InMemoryStorage(), clock=lambda: now[0])
+    viewer, editor = Role("viewer"), Role("editor")
+    editor.add_parent(viewer)
+    manager.add_role(viewer)
+    manager.add_role(editor)
+    manager.add_permission("read")
+    manager.grant_permission("viewer", "read")
+    manager.add_user("carol")
+    manager.assign_role("carol", "viewer")
+    manager.assign_role("carol", "editor", expires_at=datetime.fromtimestamp(1_060, tz=timezone.utc))
+
+    report = manager.lint(apply=True)
+    assert report.redundant_assignments == []
+    now[0] = 2_000.0
+    assert manager.check_permission("carol", "read")
+    assert manager.lint().traversal_cost_before == 1
+
+
+def test_narrower_inherited_pattern_does_not_make_a_pattern_redundant():
+    """`doc:**` is kept under a parent granting `doc:*`; `doc:*:read` is dropped under `doc:**`."""
+    manager = RBACManager(storage=InMemoryStorage())
+    base, child = Role("base"), Role("child")
+    child.add_parent(base)
+    manager.add_role(base)
+    manager.add_role(child)
+    for perm in ["doc:*", "doc:**", "doc:*:read"]:
+        manager.add_permission(perm)
+    manager.grant_permission("base", "doc:*")
+    manager.grant_permission("child", "doc:**")
+    manager.add_user("dave")
+    manager.assign_role("dave", "child")
+
+    report = manager.lint(apply=True)
+    assert report.redundant_grants == []
+    assert manager.check_permission("dave", "doc:a:b")
+
+    manager.grant_permission("base", "doc:**")
+    manager.grant_permission("child", "doc:*:read")
+    assert manager.lint().redundant_grants == [("child", "doc:**"), ("child", "doc:*:read")]
@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime, timezone
 from rbac.models import Role, Permission
 from rbac.core.manager import RBACManager
 from rbac.storage.memory import InMemoryStorage
@@ -199,6 +200,87 @@ def test_removal_of_ssd_set_allows_combination():
     manager.assign_role("irene", "beta")  # Now allowed
 
 
+def test_ssd_cardinality_allows_up_to_max_roles():
+    """A set with max_roles=2 allows two of its roles and blocks the third, also after a revoke."""
+    ssd = InMemorySSDConstraint()
+    ssd.add_set("finance", {"payer", "approver", "auditor", "clerk"}, max_roles=2)
+
+    manager = RBACManager(storage=InMemoryStorage(), ssd_constraint=ssd)
+    for name in ["payer", "approver", "auditor", "clerk"]:
+        manager.add_role(Role(name))
+    manager.add_user("judy")
+    manager.assign_role("judy", "payer")
+    manager.assign_role("judy", "approver")
+    with pytest.raises(ValueError, match="SSD violation"):
+        manager.assign_role("judy", "auditor")
+
+    manager.revoke_role("judy", "payer")
+    manager.assign_role("judy", "auditor")
+    assert ssd.get_limits() == {"finance": 2}
+    with pytest.raises(ValueError):
+        ssd.add_set("broken", {"a", "b"}, max_roles=0)
+
+
+def test_ssd_counts_inherited_roles():
+    """Assigning a junior role whose ancestor conflicts with a held role is rejected."""
+    ssd = InMemorySSDConstraint()
+    ssd.add_set("duties", {"approver", "requester"})
+    manager = RBACManager(storage=InMemoryStorage(), ssd_constraint=ssd)
+
+    chain = [Role("approver")]
+    for i in range(300):
+        role = Role(f"level{i}")
+        role.add_parent(chain[-1])
+        chain.append(role)
+    for role in chain:
+        manager.add_role(role)
+    manager.add_role(Role("requester"))
+    manager.add_user("leo")
+    manager.assign_role("leo", "requester")
+
+    with pytest.raises(ValueError, match="SSD violation"):
+        manager.assign_role("leo", "level299")
+    manager.revoke_role("leo", "requester")
+    manager.assign_role("leo", "level299")
+    manager.assign_role("leo", "level10")  # Shares the same ancestor, counted once
+    with pytest.raises(ValueError, match="SSD violation"):
+        manager.assign_role("leo", "requester")
+
+
+
+def test_ssd_engine_with_only_is_valid_assignment_is_consulted():
+    """An engine without counting support is asked through is_valid_assignment, inherited roles included."""
+    from rbac.ssd.base import AbstractSSDConstraint
+
+    class NoPayingApprovers(AbstractSSDConstraint):
+        def add_set(self, name, roles, max_roles=1):
+            pass
+
+        def remove_set(self, name):
+            pass
+
+        def get_all_sets(self):
+            return {}
+
+        def is_valid_assignment(self, username, new_role, current_roles):
+            return not {new_role, *current_roles} >= {"payer", "approver"}
+
+    manager = RBACManager(storage=InMemoryStorage(), ssd_constraint=NoPayingApprovers())
+    approver, lead = Role("approver"), Role("lead")
+    lead.add_parent(approver)
+    for role in [Role("payer"), approver, lead]:
+        manager.add_role(role)
+    manager.add_users(["pat", "quinn"])
+    manager.assign_role("pat", "payer")
+
+    with pytest.raises(ValueError, match="SSD violation"):
+        manager.assign_role("pat", "lead")
+    with pytest.raises(ValueError, match="SSD violation"):
+        manager.assign_roles([("quinn", "payer"), ("quinn", "approver")])
+    assert manager.storage.get_user("quinn").roles == set()
+    manager.assign_role("quinn", "lead")
+
+
 # ─── LISTING ROLES AND PERMISSIONS ────────────────────────────────────────────
 
 def test_get_all_role_names():
@@ -217,3 +299,155 @@ def test_get_all_permission_names():
         manager.add_permission(p)
     assert set(p.name for p in manager.storage.get_all_permissions()) == {"read", "write"}
 
+
+
+# ─── EXPLAIN ──────────────────────────────────────────────────────────────────
+
+def test_explain_returns_shortest_grant_path():
+    """Explain follows the shortest chain of parents to the granting role."""
+    base = Role("base")
+    mid = Role("mid")
+    top = Role("top")
+    mid.add_parent(base)
+    top.add_parent(mid)
+    top.add_parent(base)
+
+    manager = RBACManager(storage=InMemoryStorage())
+    for role in [base, mid, top]:
+        manager.add_role(role)
+    manager.add_permission("report:*:read")
+    manager.grant_permission("base", "report:*:read")
+    manager.add_user("kate")
+    manager.assign_role("kate", "top")
+
+    explanation = manager.explain("kate", "report:q3:read")
+    assert explanation.granted
+    assert explanation.path == ["kate", "top", "base"]
+    assert explanation.matched_grant == "report:*:read"
+
+
+def test_explain_lists_nearest_misses_on_deny():
+    """A denied check reports the roles that would have granted it."""
+    manager = RBACManager(storage=InMemoryStorage())
+    manager.add_role(Role("viewer"))
+    manager.add_role(Role("publisher"))
+    manager.add_permission("publish")
+    manager.grant_permission("publisher", "publish")
+    manager.add_user("liam")
+    manager.assign_role("liam", "viewer")
+
+    explanation = manager.explain("liam", "publish")
+    assert not explanation.granted
+    assert explanation.path == []
+    assert explanation.nearest_misses == ["publisher"]
+
+    with pytest.raises(ValueError):
+        manager.explain("nobody", "publish")
+
+
+def test_explain_ranks_misses_by_distance_from_user_roles():
+    """Roles a few parent links away from the user's roles come before unrelated ones."""
+    manager = RBACManager(storage=InMemoryStorage())
+    viewer, editor, chief = Role("viewer"), Role("editor"), Role("chief")
+    editor.add_parent(viewer)
+    chief.add_parent(editor)
+    for role in (viewer, editor, chief, Role("aardvark")):
+        manager.add_role(role)
+    manager.add_permission("publish")
+    for role_name in ("aardvark", "chief", "editor"):
+        manager.grant_permission(role_name, "publish")
+    manager.add_user("mia")
+    manager.assign_role("mia", "viewer")
+
+    assert manager.explain("mia", "publish").nearest_misses == ["editor", "chief", "aardvark"]
+    assert manager.explain("mia", "publish", max_misses=1).nearest_misses == ["editor"]
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_oncall_manager(clock):
+    manager = RBACManager(storage=InMemoryStorage(), clock=clock)
+    manager.add_role(Role("oncall"))
+    manager.add_permission("prod:write")
+    manager.grant_permission("oncall", "prod:write")
+    manager.add_user("ivan")
+    return manager
+
+
+def test_expired_role_is_never_granted():
+    """Checks after the expiry deny even though no sweeper ran, including compiled lookups."""
+    clock = FakeClock()
+    manager = make_oncall_manager(clock)
+    manager.compile()
+    manager.assign_role("ivan", "oncall", expires_at=datetime.fromtimestamp(1_060, tz=timezone.utc))
+    session = manager.create_session("ivan", {"oncall"})
+    assert manager.check_permission("ivan", "prod:write")
+
+    clock.now = 1_060
+    assert not manager.check_permission("ivan", "prod:write")
+    assert "oncall" not in manager.storage.get_user("ivan").get_role_names()
+    assert session.active_roles == set()
+
+
+def test_reassignment_supersedes_earlier_expiry():
+    """Reassigning without an expiry makes the role permanent; stale heap entries are skipped."""
+    clock = FakeClock()
+    manager = make_oncall_manager(clock)
+    manager.assign_role("ivan", "oncall", expires_at=datetime.fromtimestamp(1_060, tz=timezone.utc))
+    manager.assign_role("ivan", "oncall")
+    clock.now = 2_000
+    assert manager.expire_assignments() == 0
+    assert manager.check_permission("ivan", "prod:write")
+
+
+def test_expiry_in_the_past_is_rejected():
+    """An assignment cannot start out expired."""
+    manager = make_oncall_manager(FakeClock())
+    with pytest.raises(ValueError):
+        manager.assign_role("ivan", "oncall", expires_at=datetime.fromtimestamp(999, tz=timezone.utc))
+
+
+def test_assign_roles_is_all_or_nothing_under_ssd():
+    """A conflicting pair anywhere in a bulk assignment leaves every user unchanged."""
+    ssd = InMemorySSDConstraint()
+    ssd.add_set("duties", {"payer", "approver"})
+    manager = RBACManager(storage=InMemoryStorage(), ssd_constraint=ssd)
+    manager.add_users(["ann", "ben"])
+    for name in ("payer", "approver", "viewer"):
+        manager.add_role(Role(name))
+
+    with pytest.raises(ValueError, match="SSD violation"):
+        manager.assign_roles([("ann", "viewer"), ("ben", "payer"), ("ben", "approver")])
+    assert manager.storage.get_user("ann").get_role_names() == set()
+    assert manager.storage.get_user("ben").get_role_names() == set()
+
+    manager.assign_roles([("ann", "viewer"), ("ann", "payer"), ("ben", "approver")])
+    assert manager.storage.get_user("ann").get_role_names() == {"viewer", "payer"}
+    with pytest.raises(ValueError, match="SSD violation"):
+        manager.assign_role("ann", "approver")
+
+
+def test_bulk_grants_and_batched_checks():
+    """grant_permissions validates every pair first; check_permissions reports unknowns as None."""
+    manager = RBACManager(storage=InMemoryStorage())
+    manager.add_role(Role("editor"))
+    manager.add_permission("doc:read")
+    manager.add_permission("doc:*")
+    with pytest.raises(ValueError, match="missing"):
+        manager.grant_permissions([("editor", "doc:read"), ("editor", "missing")])
+    assert manager.storage.get_role("editor").permissions == set()
+
+    manager.grant_permissions([("editor", "doc:read")])
+    manager.add_user("ann")
+    manager.assign_role("ann", "editor")
+    assert manager.check_permissions([
+        ("ann", "doc:read"), ("ann", "doc:write"), ("ann", "nope"), ("nobody", "doc:read"),
+    ]) == [True, False, None, None]
+    with pytest.raises(ValueError, match="already exists"):
+        manager.add_users(["bob", "bob"])
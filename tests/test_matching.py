@@ -0,0 +1,88 @@
+import pytest
+from rbac.matching import PermissionTrie, is_pattern, subsumes
+from rbac.models import Role, Permission, User
+from rbac.core.manager import RBACManager
+from rbac.storage.memory import InMemoryStorage
+
+
+def test_exact_names_match_without_patterns():
+    """Plain names behave like set membership."""
+    trie = PermissionTrie(["read", "article:1:edit"])
+    assert trie.matches("read")
+    assert trie.matches("article:1:edit")
+    assert not trie.matches("article:2:edit")
+
+
+def test_single_segment_wildcard():
+    """`*` matches exactly one segment."""
+    trie = PermissionTrie(["article:*:edit"])
+    assert trie.matches("article:123:edit")
+    assert not trie.matches("article:123:delete")
+    assert not trie.matches("article:1:2:edit")
+    assert not trie.matches("article:edit")
+
+
+def test_trailing_globstar_matches_remaining_segments():
+    """`**` matches one or more remaining segments."""
+    trie = PermissionTrie(["billing:**"])
+    assert trie.matches("billing:invoice")
+    assert trie.matches("billing:invoice:42:refund")
+    assert not trie.matches("billing")
+    assert not trie.matches("shipping:invoice")
+
+
+def test_overlapping_literal_and_wildcard_branches():
+    """Matching explores literal and wildcard branches together."""
+    trie = PermissionTrie(["a:b:c", "a:*:d"])
+    assert trie.matches("a:b:d")
+    assert trie.matches("a:b:c")
+    assert not trie.matches("a:x:c")
+
+
+def test_globstar_must_be_last_segment():
+    """A `**` segment in the middle of a pattern is rejected."""
+    assert is_pattern("billing:**")
+    with pytest.raises(ValueError):
+        PermissionTrie(["billing:**:read"])
+
+
+def test_pattern_subsumption():
+    """A pattern subsumes another only if it matches every name the other matches."""
+    assert subsumes("doc:**", "doc:*")
+    assert subsumes("doc:**", "doc:a:**")
+    assert subsumes("doc:*", "doc:a")
+    assert not subsumes("doc:*", "doc:**")
+    assert not subsumes("doc:a:**", "doc:**")
+    assert not subsumes("doc:**", "doc")
+    assert not subsumes("doc:a", "doc:*")
+
+
+def test_role_matcher_tracks_inherited_grants():
+    """Role matchers are rebuilt when grants or parents change."""
+    base = Role("base")
+    child = Role("child")
+    child.add_parent(base)
+    assert not child.grants("doc:1:read")
+
+    base.add_permission(Permission("doc:*:read"))
+    assert child.grants("doc:1:read")
+
+    user = User("alice")
+    user.add_role(child)
+    assert user.has_permission(Permission("doc:7:read"))
+
+
+def test_manager_wildcard_grant_and_check():
+    """Wildcard grants cover concrete permissions that were never registered."""
+    manager = RBACManager(storage=InMemoryStorage())
+    manager.add_user("alice")
+    manager.add_role(Role("editor"))
+    manager.add_permission("article:*:edit")
+    manager.grant_permission("editor", "article:*:edit")
+    manager.assign_role("alice", "editor")
+
+    assert manager.check_permission("alice", "article:123:edit")
+    assert manager.user_has_permission("alice", "article:9:edit")
+    assert not manager.user_has_permission("alice", "article:9:delete")
+    with pytest.raises(ValueError, match="not found"):
+        manager.check_permission("alice", "article:123:delete")
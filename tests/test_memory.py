@@ -0,0 +1,71 @@
+from rbac.core import RBACManager
+from rbac.core.memory import deep_size
+from rbac.models import Role
+from rbac.storage import InMemoryStorage
+
+
+def make_manager(users: int) -> RBACManager:
+    manager = RBACManager(InMemoryStorage())
+    manager.add_permission("doc:read")
+    manager.add_role(Role("reader"))
+    manager.grant_permission("reader", "doc:read")
+    for i in range(users):
+        manager.add_user(f"user{i}")
+        manager.assign_role(f"user{i}", "reader")
+    return manager
+
+
+def test_deep_size_counts_shared_objects_once():
+    """Objects reachable twice are charged only to the first walk."""
+    shared = ["x" * 100]
+    seen: set[int] = set()
+    first = deep_size({"a": shared}, seen)
+    second = deep_size({"b": shared}, seen)
+    assert first > second
+
+
+def test_deep_size_stops_at_entities():
+    """Walking a user does not charge the roles it references."""
+    role = Role("big")
+    for i in range(100):
+        role.add_parent(Role(f"parent{i}"))
+    manager = make_manager(1)
+    user = manager.storage.get_user("user0")
+    without = deep_size(user, set())
+    user.add_role(role)
+    assert deep_size(user, set()) - without < deep_size(role, set())
+
+
+def test_memory_report_breakdown_and_extrapolation():
+    """Reports categories and counts, and projections grow with users."""
+    manager = make_manager(50)
+    manager.compile()
+    report = manager.memory_report()
+    assert report.counts["users"] == 50
+    assert report.categories["models.users"] > 0
+    assert report.categories["caches.compiled"] > 0
+    assert report.total_bytes == sum(report.categories.values())
+    assert report.per_entity["users"] > 0
+    assert report.extrapolate(users=500, roles=1, permissions=1) > report.extrapolate(users=50, roles=1, permissions=1)
+    assert report.traced_bytes is None
+
+
+def test_memory_report_counts_filter_token_and_expiry_caches():
+    """The name filter, token dictionary and expiry heap are charged to caches."""
+    from datetime import datetime, timezone
+
+    manager = make_manager(20)
+    report = manager.memory_report()
+    assert report.categories["caches.name_filter"] == 0
+    assert report.categories["caches.token_dictionary"] == 0
+
+    manager.enable_name_filter(max_bytes=4096)
+    manager.permission_dictionary()
+    username = manager.storage.get_all_users()[0].username
+    role_name = manager.storage.get_all_roles()[0].name
+    manager.revoke_role(username, role_name)
+    manager.assign_role(username, role_name, expires_at=datetime.fromtimestamp(4_000_000_000, tz=timezone.utc))
+    report = manager.memory_report()
+    assert report.categories["caches.name_filter"] >= manager.name_filter.stats.memory_bytes
+    assert report.categories["caches.token_dictionary"] > 0
+    assert report.categories["caches.expiry_heap"] > 0
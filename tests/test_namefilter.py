@@ -0,0 +1,116 @@
+import logging
+import pytest
+from rbac.core.manager import RBACManager
+from rbac.core.namefilter import BloomFilter
+from rbac.models import Role, User
+from rbac.storage.memory import InMemoryStorage
+
+
+class CountingStorage(InMemoryStorage):
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+
+    def get_user(self, username):
+        self.lookups += 1
+        return super().get_user(username)
+
+    def get_permission(self, name):
+        self.lookups += 1
+        return super().get_permission(name)
+
+
+def build_manager():
+    manager = RBACManager(CountingStorage())
+    manager.add_role(Role("editor"))
+    for perm in ["read", "doc:*:share"]:
+        manager.add_permission(perm)
+    manager.grant_permission("editor", "read")
+    manager.grant_permission("editor", "doc:*:share")
+    manager.add_user("alice")
+    manager.assign_role("alice", "editor")
+    return manager
+
+
+def test_bloom_filter_sizing():
+    """Added names are always found and the false-positive rate stays near the target."""
+    bloom = BloomFilter(10_000, false_positive_rate=0.01)
+    names = [f"user-{i}" for i in range(10_000)]
+    for name in names:
+        bloom.add(name)
+    assert all(name in bloom for name in names)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+    assert bloom.memory_bytes < 13_000
+    assert BloomFilter(10_000, 0.01, max_bytes=1_000).memory_bytes == 1_000
+    with pytest.raises(ValueError):
+        BloomFilter(10, false_positive_rate=1.5)
+
+
+def test_unknown_names_skip_storage(caplog):
+    """Unknown users and permissions are rejected without a lookup and logged at error level once."""
+    manager = build_manager()
+    stats = manager.enable_name_filter(false_positive_rate=0.001)
+    assert (stats.users, stats.permissions) == (1, 2)
+    manager.storage.lookups = 0
+    with caplog.at_level(logging.DEBUG, logger="rbac.core.manager"):
+        for _ in range(3):
+            with pytest.raises(ValueError, match="not found"):
+                manager.check_permission("mallory", "read")
+            with pytest.raises(ValueError, match="not found"):
+                manager.check_permission("alice", "delete")
+        assert manager.user_has_permission("mallory", "read") is False
+        assert manager.check_permissions([("mallory", "read"), ("alice", "read")]) == [None, True]
+    assert manager.storage.lookups == 0
+    errors = [r.getMessage() for r in caplog.records if r.levelno == logging.ERROR]
+    assert errors == [
+        "User not found during permission check: mallory",
+        "Permission not found during check: delete",
+    ]
+    assert manager.name_filter.rejected == 7
+    # Names covered by a wildcard pattern are not rejected
+    assert manager.check_permission("alice", "doc:42:share") is True
+
+
+def test_filter_follows_new_names():
+    """Names added through the manager or reconcile pass the filter, also past its capacity."""
+    manager = build_manager()
+    manager.enable_name_filter(capacity=4)
+    manager.add_users([f"user-{i}" for i in range(10)])
+    manager.add_permission("write")
+    assert manager.check_permission("user-9", "write") is False
+    assert manager.name_filter.users.capacity >= 11
+    manager.add_user("late")
+    assert manager.check_permission("late", "read") is False
+    manager.reconcile({"users": {"carol": ["editor"]}})
+    assert manager.check_permission("carol", "read") is True
+    manager.compile()
+    with pytest.raises(ValueError):
+        manager.check_permission("nobody", "read")
+    manager.storage.save_user(User("direct"))
+    manager.refresh_name_filter()
+    assert manager.check_permission("direct", "read") is False
+
+
+def test_rebuild_keeps_names_added_while_reading_storage():
+    """A user saved after a rebuild has read storage is still known to the new filter."""
+
+    class RacingStorage(InMemoryStorage):
+        during_read = None
+
+        def get_all_users(self):
+            users = super().get_all_users()
+            if self.during_read is not None:
+                during_read, self.during_read = self.during_read, None
+                during_read()
+            return users
+
+    storage = RacingStorage()
+    manager = RBACManager(storage)
+    manager.add_permission("read")
+    manager.enable_name_filter()
+    storage.during_read = lambda: manager.add_user("late")
+    manager.refresh_name_filter()
+
+    assert manager.storage.get_user("late") is not None
+    assert manager.check_permission("late", "read") is False
@@ -0,0 +1,67 @@
+import asyncio
+import time
+import pytest
+
+pytest.importorskip("fastapi")
+import httpx
+from rbac.api import create_app
+from rbac.api.profiling import ProfilingMiddleware, RequestProfiler
+from rbac.core.manager import RBACManager
+from rbac.storage.memory import InMemoryStorage
+
+
+class SlowStorage(InMemoryStorage):
+    def get_user(self, username):
+        time.sleep(0.03)
+        return super().get_user(username)
+
+
+def make_app(profiler=None):
+    manager = RBACManager(SlowStorage())
+    manager.add_user("alice")
+    manager.add_permission("read")
+    return create_app(manager, profiler=profiler)
+
+
+def request_all(app, calls):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.request(method, url, **kwargs) for method, url, kwargs in calls]
+    return asyncio.run(scenario())
+
+
+CHECK = ("POST", "/rbac/check-permission", {"json": {"username": "alice", "permission": "read"}})
+
+
+def test_slow_requests_are_profiled_and_downloadable(tmp_path):
+    """Sampled stacks from the worker thread reach the manager; the routes list and serve them."""
+    profiler = RequestProfiler(str(tmp_path), sample_rate=1.0, slow_ms=10, path_prefix="/rbac/check")
+    app = make_app(profiler)
+    responses = request_all(app, [CHECK, ("GET", "/rbac/users", {})])
+    assert responses[0].json() == {"has_permission": False}
+
+    listing, = request_all(app, [("GET", "/rbac/profiles", {})])
+    names = listing.json()
+    assert len(names) == 1 and "check-permission" in names[0]
+    download, missing = request_all(app, [
+        ("GET", f"/rbac/profiles/{names[0]}", {}), ("GET", "/rbac/profiles/..%2Fsecret", {}),
+    ])
+    assert "check_permission (manager.py:" in download.text
+    assert missing.status_code == 404
+
+
+def test_fast_requests_and_rotation(tmp_path):
+    """Requests under the threshold are not kept, and only the newest profiles survive."""
+    assert RequestProfiler(str(tmp_path), slow_ms=1e9).record("GET", "/x", 0.5, {}) is None
+    profiler = RequestProfiler(str(tmp_path), sample_rate=1.0, max_profiles=2)
+    request_all(make_app(profiler), [CHECK] * 3)
+    assert len(profiler.list_profiles()) == 2
+
+
+def test_disabled_profiling_installs_nothing():
+    """Without a profiler there is no middleware and no profile route."""
+    app = make_app()
+    assert not any(m.cls is ProfilingMiddleware for m in app.user_middleware)
+    response, = request_all(app, [("GET", "/rbac/profiles", {})])
+    assert response.status_code == 404
@@ -0,0 +1,142 @@
+import pytest
+from rbac.models import Role
+from rbac.core.manager import RBACManager
+from rbac.storage.memory import InMemoryStorage
+from rbac.storage.journal import JournaledStorage
+
+POLICY = {
+    "permissions": ["doc:read", "doc:write", "pay:*"],
+    "roles": {
+        "viewer": {"permissions": ["doc:read"]},
+        "editor": {"permissions": ["doc:write"], "parents": ["viewer"]},
+        "payer": {"permissions": ["pay:*"]},
+        "approver": {},
+    },
+    "users": {"alice": ["editor"], "bob": ["payer"]},
+    "ssd": {"duties": {"roles": ["payer", "approver"]}},
+}
+
+
+def test_reconcile_creates_policy_and_is_idempotent():
+    """A first run creates everything; a second run finds nothing to change."""
+    manager = RBACManager(InMemoryStorage())
+    diff = manager.reconcile(POLICY)
+    assert diff.applied
+    assert manager.check_permission("alice", "doc:read")
+    assert manager.check_permission("bob", "pay:send")
+    assert manager.ssd.get_limits() == {"duties": 1}
+
+    again = manager.reconcile(POLICY)
+    assert again.change_count == 0
+    assert not again.applied
+
+
+def test_reconcile_applies_minimal_diff_and_dry_run():
+    """Only differences are reported, and a dry run changes nothing."""
+    manager = RBACManager(InMemoryStorage())
+    manager.reconcile(POLICY)
+    desired = {**POLICY, "users": {"alice": ["viewer"], "bob": ["payer"], "carol": ["editor"]}}
+
+    preview = manager.reconcile(desired, dry_run=True)
+    assert preview.added_users == ["carol"]
+    assert preview.added_assignments == [("alice", "viewer"), ("carol", "editor")]
+    assert preview.removed_assignments == [("alice", "editor")]
+    assert preview.change_count == 4
+    assert not preview.applied
+    assert manager.storage.get_user("carol") is None
+
+    manager.reconcile(desired)
+    assert not manager.check_permission("alice", "doc:write")
+    assert manager.check_permission("carol", "doc:write")
+
+
+def test_reconcile_rejects_invalid_state_without_changes():
+    """Violations in the final state are reported and nothing is applied."""
+    manager = RBACManager(InMemoryStorage())
+    manager.reconcile(POLICY)
+    bad = {
+        **POLICY,
+        "roles": {**POLICY["roles"], "approver": {"parents": ["payer"]}},
+        "users": {"alice": ["editor", "ghost"], "bob": ["payer"]},
+    }
+    with pytest.raises(ValueError, match="unknown role 'ghost'"):
+        manager.reconcile(bad)
+    assert not manager.storage.get_role("approver").parents
+
+    # Inheriting payer makes every approver hold both roles of the SSD set.
+    conflicting = {**POLICY, "roles": {**POLICY["roles"], "approver": {"parents": ["payer"]}},
+                   "users": {"alice": ["editor"], "bob": ["approver"]}}
+    with pytest.raises(ValueError, match="SSD violation"):
+        manager.reconcile(conflicting)
+    assert manager.storage.get_user("bob").get_role_names() == {"payer"}
+
+
+def test_reconcile_checks_dsd_against_live_sessions():
+    """A DSD change that an active session breaks is rejected unless the diff also unassigns a role."""
+    manager = RBACManager(InMemoryStorage())
+    manager.reconcile({**POLICY, "ssd": {}, "users": {"alice": ["editor", "payer"], "bob": ["payer"]}})
+    session = manager.create_session("alice", {"editor", "payer"})
+
+    live = {"dsd": {"live": {"roles": ["viewer", "payer"]}}}
+    with pytest.raises(ValueError, match=f"DSD violation: session '{session.session_id}'"):
+        manager.reconcile(live, dry_run=True)
+    with pytest.raises(ValueError, match="DSD violation"):
+        manager.reconcile(live)
+    assert manager.dsd.get_conflict_sets() == {}
+
+    manager.reconcile({**live, "users": {"alice": ["editor"]}})
+    assert session.active_roles == {"editor"}
+    assert manager.dsd.get_conflict_sets() == {"live": {"viewer", "payer"}}
+
+
+def test_reconcile_swaps_conflicting_roles_in_one_step():
+    """Removing one role of an SSD set and adding the other is valid as a whole."""
+    manager = RBACManager(InMemoryStorage())
+    manager.reconcile(POLICY)
+    manager.reconcile({"users": {"bob": ["approver"]}})
+    assert manager.storage.get_user("bob").get_role_names() == {"approver"}
+
+
+def test_reconcile_prune_removes_unlisted_entities(tmp_path):
+    """Pruning deletes unlisted entities and detaches them; deletions are journaled."""
+    storage = JournaledStorage(str(tmp_path), fsync=False)
+    manager = RBACManager(storage, ssd_constraint=storage.ssd, dsd_constraint=storage.dsd)
+    manager.reconcile(POLICY)
+    manager.add_role(Role("temp"))
+    manager.add_user("dave")
+    manager.assign_role("dave", "temp")
+
+    diff = manager.reconcile(POLICY, prune=True)
+    assert diff.removed_roles == ["temp"]
+    assert diff.removed_users == ["dave"]
+    assert ("dave", "temp") in diff.removed_assignments
+    storage.close()
+
+    restored = JournaledStorage(str(tmp_path), fsync=False)
+    assert restored.get_role("temp") is None
+    assert restored.get_user("dave") is None
+    assert restored.get_user("alice").get_role_names() == {"editor"}
+
+
+def test_reconcile_rolls_back_when_apply_fails():
+    """A failure while writing undoes the changes already made."""
+
+    class FailingStorage(InMemoryStorage):
+        fail = False
+
+        def save_many(self, users=(), roles=(), permissions=()):
+            users = list(users)
+            if self.fail and any(user.username == "bob" for user in users):
+                raise RuntimeError("disk full")
+            super().save_many(users, roles, permissions)
+
+    storage = FailingStorage()
+    manager = RBACManager(storage)
+    manager.reconcile(POLICY)
+    storage.fail = True
+    desired = {**POLICY, "users": {"alice": ["viewer"], "bob": ["approver"]}, "ssd": {}}
+    with pytest.raises(RuntimeError):
+        manager.reconcile(desired, prune=True)
+    storage.fail = False
+    assert storage.get_user("alice").get_role_names() == {"editor"}
+    assert set(manager.ssd.get_all_sets()["duties"]) == {"payer", "approver"}
@@ -96,3 +96,52 @@ def test_detects_circular_role_inheritance():
 
     with pytest.raises(ValueError, match="create a cycle"):
         c.add_parent(a)
+
+
+def test_bulk_operations_use_batched_storage_calls():
+    """Bulk manager operations cost a fixed number of storage calls, not one per item."""
+    from rbac.core.manager import RBACManager
+
+    class CountingStorage(InMemoryStorage):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+
+        def __getattribute__(self, name):
+            if name.startswith(("get_", "save_")) and name not in ("get_all_permissions", "get_all_users"):
+                object.__setattr__(self, "calls", object.__getattribute__(self, "calls") + 1)
+            return super().__getattribute__(name)
+
+    store = CountingStorage()
+    manager = RBACManager(store)
+    manager.add_role(Role("viewer"))
+    manager.add_permission("doc:read")
+    names = [f"user{i}" for i in range(100)]
+
+    store.calls = 0
+    manager.add_users(names)
+    manager.assign_roles([(name, "viewer") for name in names])
+    manager.grant_permissions([("viewer", "doc:read")])
+    manager.check_permissions([(name, "doc:read") for name in names])
+    assert store.calls <= 12
+    assert store.get_user("user99").get_role_names() == {"viewer"}
+
+
+def test_name_index_queries_scale_with_the_result():
+    """Prefix queries over a large catalog return quickly and do not scan it."""
+    import time
+    from rbac.storage.index import NameIndex
+
+    index = NameIndex(f"role{i:06d}" for i in range(200_000))
+    index.add("billing_admin")
+    index.add_many([f"billing_{i}" for i in range(40)] + ["billing_admin"])
+    index.discard("role000000")
+
+    started = time.perf_counter()
+    for _ in range(1_000):
+        found = index.query("billing_", limit=5)
+    assert time.perf_counter() - started < 0.5
+    assert found == ["billing_0", "billing_1", "billing_10", "billing_11", "billing_12"]
+    assert len(index.query("billing_")) == 41
+    assert index.query("role", end="role000003") == ["role000001", "role000002"]
+    assert "role000000" not in index and len(index) == 200_040
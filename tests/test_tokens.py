@@ -0,0 +1,135 @@
+import pytest
+from rbac.core.manager import RBACManager
+from rbac.models import Role
+from rbac.storage.memory import InMemoryStorage
+from rbac.tokens import CapabilityVerifier, PermissionDictionary, peek
+
+KEY = b"test-signing-key"
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_manager(clock):
+    manager = RBACManager(storage=InMemoryStorage(), clock=clock)
+    viewer = Role("viewer")
+    editor = Role("editor")
+    editor.add_parent(viewer)
+    manager.add_role(viewer)
+    manager.add_role(editor)
+    for name in ("doc:read", "doc:write", "doc:*"):
+        manager.add_permission(name)
+    manager.grant_permission("viewer", "doc:read")
+    manager.grant_permission("editor", "doc:*")
+    manager.add_user("alice")
+    manager.assign_role("alice", "editor")
+    return manager
+
+
+def test_user_token_is_checked_offline():
+    """Inherited and wildcard grants are embedded; unknown permissions are denied."""
+    clock = FakeClock()
+    manager = make_manager(clock)
+    token = manager.issue_capability_token(KEY, username="alice", ttl=60)
+    dictionary = PermissionDictionary.from_dict(manager.permission_dictionary().to_dict())
+    verifier = CapabilityVerifier(KEY, dictionary, clock=clock)
+
+    assert verifier.allows(token, "doc:read")
+    assert verifier.allows(token, "doc:write")
+    assert not verifier.allows(token, "billing:read")
+    assert verifier.permissions(token) == ["doc:read", "doc:write"]
+    assert verifier.verify(token).policy_version == manager.policy_version
+
+    clock.now += 60
+    with pytest.raises(ValueError, match="expired"):
+        verifier.verify(token)
+
+
+def test_session_token_embeds_active_roles_only():
+    """A session token grants what the active roles grant, not every assigned role."""
+    manager = make_manager(FakeClock())
+    session = manager.create_session("alice", {"editor"})
+    token = manager.issue_capability_token(KEY, session_id=session.session_id)
+    assert peek(token).session_id == session.session_id
+
+    manager.deactivate_session_role(session.session_id, "editor")
+    empty = manager.issue_capability_token(KEY, session_id=session.session_id)
+    verifier = CapabilityVerifier(KEY, manager.permission_dictionary(), clock=FakeClock())
+    assert verifier.allows(token, "doc:write")
+    assert verifier.permissions(empty) == []
+    with pytest.raises(ValueError):
+        manager.issue_capability_token(KEY, username="alice", session_id=session.session_id)
+
+
+def test_forged_and_stale_tokens_are_rejected():
+    """Tampering, a wrong key, a new dictionary or an old policy version all fail verification."""
+    clock = FakeClock()
+    manager = make_manager(clock)
+    token = manager.issue_capability_token(KEY, username="alice")
+    verifier = CapabilityVerifier(KEY, manager.permission_dictionary(), clock=clock)
+    verifier.verify(token)
+
+    tampered = token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1]
+    with pytest.raises(ValueError, match="signature"):
+        verifier.verify(tampered)
+    with pytest.raises(ValueError, match="signature"):
+        CapabilityVerifier(b"other", manager.permission_dictionary(), clock=clock).verify(token)
+
+    manager.revoke_role("alice", "editor")
+    verifier.reject_before(manager.policy_version)
+    with pytest.raises(ValueError, match="older"):
+        verifier.verify(token)
+
+    manager.add_permission("doc:delete")
+    fresh = manager.issue_capability_token(KEY, username="alice")
+    with pytest.raises(ValueError, match="dictionary"):
+        verifier.verify(fresh)
+
+
+def test_token_expires_with_time_bound_roles():
+    """Tokens are capped at the earliest expiry among the roles they carry."""
+    from datetime import datetime, timezone
+
+    clock = FakeClock()
+    manager = make_manager(clock)
+    manager.add_role(Role("oncall"))
+    manager.assign_role("alice", "oncall", expires_at=datetime.fromtimestamp(1_060, tz=timezone.utc))
+
+    assert peek(manager.issue_capability_token(KEY, username="alice", ttl=300)).expires_at == 1_060
+    session = manager.create_session("alice", {"editor"})
+    assert peek(manager.issue_capability_token(KEY, session_id=session.session_id, ttl=300)).expires_at == 1_300
+    oncall = manager.create_session("alice", {"oncall"})
+    assert peek(manager.issue_capability_token(KEY, session_id=oncall.session_id, ttl=300)).expires_at == 1_060
+    clock.now = 1_059.5
+    with pytest.raises(ValueError, match="less than a second"):
+        manager.issue_capability_token(KEY, username="alice")
+
+
+def test_policy_version_survives_restart_and_moves_only_on_revocation(tmp_path):
+    """The version is journaled with the policy and is not raised by grants or assignments."""
+    from rbac.storage import JournaledStorage
+
+    storage = JournaledStorage(str(tmp_path), fsync=False)
+    manager = RBACManager(storage=storage, ssd_constraint=storage.ssd, dsd_constraint=storage.dsd)
+    manager.add_role(Role("viewer"))
+    manager.add_permission("doc:read")
+    manager.grant_permission("viewer", "doc:read")
+    manager.add_user("alice")
+    manager.assign_role("alice", "viewer")
+    assert manager.policy_version == 0
+    manager.revoke_role("alice", "viewer")
+    manager.revoke_role("alice", "viewer")
+    assert manager.policy_version == 1
+    storage.compact()
+    manager.assign_role("alice", "viewer")
+    manager.revoke_role("alice", "viewer")
+    storage.close()
+
+    reopened = JournaledStorage(str(tmp_path), fsync=False)
+    assert RBACManager(storage=reopened).policy_version == 2
+    reopened.close()